@@ -0,0 +1,489 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+GYOKER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KALKULATOR = os.path.join(GYOKER, "kalkulator")
+LOESS = os.path.join(GYOKER, "kutatasok", "loess")
+sys.path[:0] = [KALKULATOR, LOESS]
+
+import matplotlib
+matplotlib.use("Agg")
+
+from meres import Meres
+
+ALAP_CSV = os.path.join(KALKULATOR, "2024_ep_input_korzetek_bovitett.csv")
+ALAP_SVG = os.path.join(KALKULATOR, "2026_korzetek_alap.svg")
+EREDMENY_KONYVTAR = os.path.join(GYOKER, "benchmark", "eredmenyek")
+
+PELDA_EREDMENY = {
+    "Fidesz": 35.0, "Tisza": 50.0, "DK-MSZP-Párbeszéd": 2.0, "Momentum": 0,
+    "MKKP": 3.0, "Mi Hazánk": 5.0, "Független": 1.0,
+}
+PELDA_PARAMETEREK = {
+    "reszvetel_szazalek": 70.0,
+    "kulhoni_szavazatok": {"Fidesz": 300000},
+    "fix_mandatumok": {"Fidesz": 2},
+}
+
+# Szakaszidők gyűjtése egy futáson belül
+class Szakaszok:
+    def __init__(self):
+        self.idok = {}
+
+    def meres(self, nev, fuggveny, *args, **kwargs):
+        eleje = time.perf_counter()
+        eredmeny = fuggveny(*args, **kwargs)
+        self.idok[nev] = self.idok.get(nev, 0.0) + time.perf_counter() - eleje
+        return eredmeny
+
+# Szintetikus bemenetek
+
+# A körzeti CSV n-szeres változata: minden körzet n példányban, kis zajjal
+def szintetikus_korzet_csv(utvonal, szorzo=10, mag=0):
+    rng = np.random.default_rng(mag)
+    df = pd.read_csv(ALAP_CSV, sep=";", encoding="utf-8-sig")
+    reszek = []
+    for k in range(szorzo):
+        resz = df.copy()
+        if k:
+            resz["Körzet"] = resz["Körzet"] + f" x{k}"
+            szazalek = [c for c in df.columns if c.endswith("(%)")]
+            resz[szazalek] = np.clip(resz[szazalek] + rng.normal(0, 1.0, (len(df), len(szazalek))), 0, None).round(1)
+        reszek.append(resz)
+    uj = pd.concat(reszek, ignore_index=True)
+    uj["Index"] = np.arange(1, len(uj) + 1)
+    uj.to_csv(utvonal, sep=";", encoding="utf-8-sig", index=False)
+    return utvonal
+
+# Az SVG n-szeres változata: minden körzeti path "-x{k}" végű azonosítóval megismételve
+def szintetikus_svg(utvonal, szorzo=10):
+    from bs4 import BeautifulSoup
+    from terkepkalkulator import korzet_to_svg_id
+    korzet_idk = {korzet_to_svg_id(k) for k in pd.read_csv(ALAP_CSV, sep=";", encoding="utf-8-sig")["Körzet"]}
+    with open(ALAP_SVG, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), "xml")
+    for path in list(soup.find_all("path")):
+        if path.get("id") in korzet_idk:
+            for k in range(1, szorzo):
+                masolat = soup.new_tag("path", attrs=dict(path.attrs))
+                masolat["id"] = f"{path['id']}-x{k}"
+                path.insert_after(masolat)
+    with open(utvonal, "w", encoding="utf-8") as f:
+        f.write(str(soup))
+    return utvonal
+
+# Közvélemény-kutatási CSV (hu.csv formátum) n sorral
+def szintetikus_kutatas_csv(utvonal, n=10000, n_part=15, mag=0):
+    rng = np.random.default_rng(mag)
+    napok = np.sort(rng.integers(0, 4 * 365, n))
+    datumok = pd.Timestamp("2022-05-01") + pd.to_timedelta(napok, unit="D")
+    cegek = ["21 Kutató", "Medián", "Publicus", "ZRI", "IDEA", "Nézőpont", "Századvég", "Real-PR 93"]
+    df = pd.DataFrame({"polldate": datumok.strftime("%Y-%m-%d"), "polling_firm": rng.choice(cegek, n)})
+    for j in range(n_part):
+        szint = rng.uniform(2, 40)
+        trend = szint + 5 * np.sin(napok / 300 + j)
+        df[f"Párt {j + 1}"] = np.clip(trend + rng.normal(0, 2, n), 0, None).round(1)
+    df.to_csv(utvonal, sep=";", index=False)
+    return utvonal
+
+def szintetikus_kutatas_adatok(n, mag=0):
+    rng = np.random.default_rng(mag)
+    x = np.sort(rng.integers(0, 4 * 365, n)).astype(float)
+    y = 20 + 5 * np.sin(x / 300) + rng.normal(0, 2, n)
+    return x, y
+
+# Benchmark esetek: mindegyik előkészít (nem mért), majd egy mért futtatást ad vissza
+
+def eset_mandatum(csv_path):
+    from alapmodell import BaselineModel
+    from mandatumkalkulator import mandatumkalkulacio
+
+    kimenet = os.path.join(tempfile.mkdtemp(), "eredmeny.csv")
+
+    def futtatas(sz):
+        sz.meres("alapmodell (hideg)", BaselineModel.csv_bol, csv_path)
+        sz.meres("kalkulacio", mandatumkalkulacio, csv_path, PELDA_EREDMENY, output_path=kimenet, **PELDA_PARAMETEREK)
+    return futtatas
+
+def eset_mandatum_tomeges(n_forgatokonyv):
+    from alapmodell import alapmodell
+    from mandatumkalkulator import mandatumkalkulacio_tomeges
+
+    alap = alapmodell(ALAP_CSV)
+    rng = np.random.default_rng(0)
+    kozep = np.array([PELDA_EREDMENY.get(p, 0) for p in alap.partok])
+    orszagos = np.maximum(kozep + rng.normal(0, 2, (n_forgatokonyv, len(kozep))), 0)
+
+    def futtatas(sz):
+        sz.meres("tomeges kalkulacio", mandatumkalkulacio_tomeges, alap, orszagos, **PELDA_PARAMETEREK)
+    return futtatas
+
+def eset_terkep(svg_path, szorzo=1):
+    from bs4 import BeautifulSoup
+    from mandatumkalkulator import mandatumkalkulacio
+    import terkepkalkulator
+
+    konyvtar = tempfile.mkdtemp()
+    csv_path = ALAP_CSV if szorzo == 1 else szintetikus_korzet_csv(os.path.join(konyvtar, "korzetek.csv"), szorzo)
+    _, _, _, korzet_df = mandatumkalkulacio(
+        csv_path, PELDA_EREDMENY, output_path=os.path.join(konyvtar, "eredmeny.csv"), **PELDA_PARAMETEREK
+    )
+
+    def futtatas(sz):
+        with open(svg_path, "r", encoding="utf-8") as f:
+            szoveg = sz.meres("beolvasas", f.read)
+        soup = sz.meres("elemzes", BeautifulSoup, szoveg, "xml")
+        svg = sz.meres("rajzolas", terkepkalkulator.terkep_svg_renderelese, soup, korzet_df.copy(), 30, True)
+        with open(os.path.join(konyvtar, "terkep.svg"), "w", encoding="utf-8") as f:
+            sz.meres("iras", f.write, svg)
+    return futtatas
+
+# Előre lefordított sablonból rajzolás; a fordítás (elemzés, nagyítás, indexelés) egyszer, előre történik
+def eset_terkep_sablon(svg_path, szorzo=1, **sablon_kwargs):
+    from mandatumkalkulator import mandatumkalkulacio
+    from terkepsablon import TerkepSablon
+
+    konyvtar = tempfile.mkdtemp()
+    csv_path = ALAP_CSV if szorzo == 1 else szintetikus_korzet_csv(os.path.join(konyvtar, "korzetek.csv"), szorzo)
+    _, _, _, korzet_df = mandatumkalkulacio(
+        csv_path, PELDA_EREDMENY, output_path=os.path.join(konyvtar, "eredmeny.csv"), **PELDA_PARAMETEREK
+    )
+    sablon = TerkepSablon.svg_bol(svg_path, **sablon_kwargs)
+
+    def futtatas(sz):
+        svg = sz.meres("rajzolas", sablon.rendereles, korzet_df.copy(), 30, True)
+        with open(os.path.join(konyvtar, "terkep.svg"), "w", encoding="utf-8") as f:
+            sz.meres("iras", f.write, svg)
+    return futtatas
+
+# Interaktív HTML-térkép egy forgatókönyvének adatrétege: ennyi készül forgatókönyv-váltásonként
+def eset_terkep_html_reteg():
+    import json
+    from mandatumkalkulator import mandatumkalkulacio
+    from terkephtml import adatreteg
+    from terkepsablon import TerkepSablon
+
+    konyvtar = tempfile.mkdtemp()
+    _, _, _, korzet_df = mandatumkalkulacio(
+        ALAP_CSV, PELDA_EREDMENY, output_path=os.path.join(konyvtar, "eredmeny.csv"), **PELDA_PARAMETEREK
+    )
+    sablon = TerkepSablon.svg_bol(ALAP_SVG, tizedesjegyek=2, tures=0.05)
+
+    def futtatas(sz):
+        reteg = sz.meres("reteg", adatreteg, sablon, korzet_df.copy(), "pelda")
+        sz.meres("szerializalas", json.dumps, reteg, ensure_ascii=False, separators=(",", ":"))
+    return futtatas
+
+def eset_terkep_tomeges(n_terkep):
+    from mandatumkalkulator import mandatumkalkulacio
+    from terkepsablon import terkep_sablon, terkep_svg_tomeges
+
+    konyvtar = tempfile.mkdtemp()
+    _, _, _, korzet_df = mandatumkalkulacio(
+        ALAP_CSV, PELDA_EREDMENY, output_path=os.path.join(konyvtar, "eredmeny.csv"), **PELDA_PARAMETEREK
+    )
+    terkep_sablon(ALAP_SVG)
+    terkepek = {f"terkep_{i:04d}": korzet_df for i in range(n_terkep)}
+
+    def futtatas(sz):
+        sz.meres("tomeges rajzolas", terkep_svg_tomeges, ALAP_SVG, terkepek,
+                 kimeneti_konyvtar=os.path.join(konyvtar, "terkepek"))
+    return futtatas
+
+def eset_loess(n, pontok=2500, tures=None):
+    import loess
+
+    x, y = szintetikus_kutatas_adatok(n)
+    x_dense = np.linspace(x.min(), x.max(), pontok)
+
+    def futtatas(sz):
+        if tures is None:
+            sz.meres("loess", loess.loess, x, y, x_dense, 0.7, degree=1)
+        else:
+            sz.meres("loess_interpolalt", loess.loess_interpolalt, x, y, x_dense, 0.7, degree=1, tures=tures)
+    return futtatas
+
+# A horgonypontos közelítés tűrésének ellenőrzése a pontos loess-hez képest; túllépésnél ValueError.
+# Az első eset a régi, negyedelőpont-ellenőrzéses változat 0,0195 pp-os túllépése (kis k, erős zaj, a
+# kimeneti rács az adattartományon túlnyúlik), a többi véletlen adat.
+def eset_loess_tures(tures=0.01):
+    import loess
+
+    esetek = []
+    for mag, n, span, fok, f, zaj in [(56, 2000, 0.05, 1, 60, 3), (21, 3000, 0.02, 2, 20, 6),
+                                      (5, 500, 0.1, 1, 300, 0.5), (8, 4000, 0.3, 2, 60, 3)]:
+        rng = np.random.default_rng(mag)
+        x = np.sort(rng.uniform(0, 1500, n))
+        y = 20 + 5 * np.sin(x / f) + rng.normal(0, zaj, n)
+        x_dense = np.linspace(0, 1500, 5000)
+        esetek.append((x, y, x_dense, span, fok, loess.loess(x, y, x_dense, span, degree=fok)))
+
+    def futtatas(sz):
+        for x, y, x_dense, span, fok, pontos in esetek:
+            kozelites = sz.meres("loess_interpolalt", loess.loess_interpolalt, x, y, x_dense, span,
+                                 degree=fok, tures=tures)
+            elteres = np.abs(kozelites - pontos).max()
+            if elteres > tures:
+                raise ValueError(f"A közelítés eltérése a tűrés felett: {elteres:.4g} > {tures} (span {span}, fok {fok})")
+    return futtatas
+
+def eset_trendallapot(n, span=0.05, uj=10):
+    import copy
+    from trendallapot import TrendAllapot
+
+    x, y = szintetikus_kutatas_adatok(n)
+    allapot = TrendAllapot(x, y, span)
+    uj_x = x.max() + np.arange(uj) // 3
+    uj_y = 20 + np.random.default_rng(1).normal(0, 2, uj)
+
+    def futtatas(sz):
+        a = copy.deepcopy(allapot)
+
+        def frissitesek():
+            for xi, yi in zip(uj_x, uj_y):
+                a.hozzaadas(xi, yi)
+        sz.meres("hozzaadas", frissitesek)
+    return futtatas
+
+def eset_grafikon(n):
+    import loess
+
+    konyvtar = tempfile.mkdtemp()
+    csv_path = szintetikus_kutatas_csv(os.path.join(konyvtar, "kutatasok.csv"), n)
+    partok = pd.read_csv(csv_path, sep=";", nrows=1).columns[2:]
+    szinek = {p: f"C{i % 10}" for i, p in enumerate(partok)}
+
+    def futtatas(sz):
+        sz.meres("grafikon", loess.kozvelemeny_grafikon,
+                 csv_fajl=csv_path, csv_elvalaszto=";", partok_es_szinek=szinek,
+                 loess_szigor=0.7, loess_pontok=2500, kimenet=os.path.join(konyvtar, "grafikon"))
+        loess.plt.close("all")
+    return futtatas
+
+def eset_trendek(n, sav_szint=None):
+    import trendek
+
+    konyvtar = tempfile.mkdtemp()
+    df = pd.read_csv(szintetikus_kutatas_csv(os.path.join(konyvtar, "kutatasok.csv"), n), sep=";")
+    df["date"] = pd.to_datetime(df["polldate"])
+    partok = list(df.columns[2:-1])
+    df_long = pd.melt(df, id_vars=["date"], value_vars=partok, var_name="party", value_name="value")
+
+    def futtatas(sz):
+        sz.meres("trendek", trendek.trendek, df_long, partok, loess_szigor=0.7, loess_pontok=2500,
+                 sav_szint=sav_szint)
+    return futtatas
+
+# Egy betöltés, három intézetcsoport nézetei (mint a narancsos / narancsmentes / összes grafikonnál)
+def eset_kutatastar(n):
+    from kutatastar import KutatasTar
+
+    konyvtar = tempfile.mkdtemp()
+    csv_path = szintetikus_kutatas_csv(os.path.join(konyvtar, "kutatasok.csv"), n)
+    KutatasTar.betoltes(csv_path, ";")
+    csoportok = [["Nézőpont", "Századvég", "Real-PR 93"], ["21 Kutató", "Medián", "Publicus", "ZRI", "IDEA"], None]
+
+    def futtatas(sz):
+        tar = sz.meres("betoltes (npz)", KutatasTar.betoltes, csv_path, ";")
+
+        def nezetek():
+            for intezetek in csoportok:
+                nezet = tar.nezet(intezetek, "2023-01-01", None)
+                for party in tar.partok:
+                    nezet.part_adatok(party)
+        sz.meres("nezetek", nezetek)
+    return futtatas
+
+def eset_hazhatas(n):
+    from hazhatas import hazhatas_korrekcio
+    from kutatastar import KutatasTar
+
+    konyvtar = tempfile.mkdtemp()
+    tar = KutatasTar.betoltes(szintetikus_kutatas_csv(os.path.join(konyvtar, "kutatasok.csv"), n), ";")
+
+    def futtatas(sz):
+        sz.meres("hazhatas_korrekcio", hazhatas_korrekcio, tar.nezet(), tar.partok)
+    return futtatas
+
+def _korzet_10x():
+    konyvtar = tempfile.mkdtemp()
+    return szintetikus_korzet_csv(os.path.join(konyvtar, "korzetek.csv"), 10)
+
+def _svg_10x():
+    konyvtar = tempfile.mkdtemp()
+    return szintetikus_svg(os.path.join(konyvtar, "terkep.svg"), 10)
+
+# név -> (leírás, csomagok, előkészítő)
+ESETEK = {
+    "mandatum": ("mandatumkalkulacio, szállított CSV (106 körzet)", ("gyors", "teljes"),
+                 lambda: eset_mandatum(ALAP_CSV)),
+    "mandatum_10x_korzet": ("mandatumkalkulacio, 10× körzet", ("teljes",),
+                            lambda: eset_mandatum(_korzet_10x())),
+    "mandatum_tomeges_1k": ("mandatumkalkulacio_tomeges, 1000 forgatókönyv", ("gyors", "teljes"),
+                            lambda: eset_mandatum_tomeges(1000)),
+    "terkep": ("terkep_svg, szállított SVG", ("gyors", "teljes"),
+               lambda: eset_terkep(ALAP_SVG)),
+    "terkep_10x_korzet": ("terkep_svg, 10× körzet", ("teljes",),
+                          lambda: eset_terkep(_svg_10x(), 10)),
+    "terkep_sablon": ("TerkepSablon.rendereles, szállított SVG", ("gyors", "teljes"),
+                      lambda: eset_terkep_sablon(ALAP_SVG)),
+    "terkep_tomor": ("TerkepSablon.rendereles, tömör (kvantált, egyszerűsített) sablon", ("gyors", "teljes"),
+                     lambda: eset_terkep_sablon(ALAP_SVG, tizedesjegyek=2, tures=0.05)),
+    "terkep_sablon_10x_korzet": ("TerkepSablon.rendereles, 10× körzet", ("teljes",),
+                                 lambda: eset_terkep_sablon(_svg_10x(), 10)),
+    "terkep_html_reteg": ("terkephtml.adatreteg, szállított SVG (egy forgatókönyv)", ("gyors", "teljes"),
+                          eset_terkep_html_reteg),
+    "terkep_tomeges_100": ("terkep_svg_tomeges, 100 térkép, minden magon", ("teljes",),
+                           lambda: eset_terkep_tomeges(100)),
+    "loess_500": ("LOESS, 500 kutatás, 2500 pont", ("gyors", "teljes"),
+                  lambda: eset_loess(500)),
+    "loess_10k": ("LOESS, 10 000 kutatás, 2500 pont", ("teljes",),
+                  lambda: eset_loess(10000)),
+    "loess_10k_interpolalt": ("LOESS horgonypontos közelítéssel (0,01 pp), 10 000 kutatás, 20 000 pont", ("teljes",),
+                              lambda: eset_loess(10000, 20000, tures=0.01)),
+    "loess_interpolalt_tures": ("loess_interpolalt tűrésellenőrzés a pontos loess-hez képest (0,01 pp), 4 adatsor",
+                                ("gyors", "teljes"), eset_loess_tures),
+    "trendek_10k": ("trendek, 10 000 soros CSV, 15 párt közös illesztéssel", ("teljes",),
+                    lambda: eset_trendek(10000)),
+    "trendek_sav_10k": ("trendek 90%-os bootstrap sávval (1000 minta), 10 000 soros CSV, 15 párt", ("teljes",),
+                        lambda: eset_trendek(10000, 0.9)),
+    "trendallapot_10k": ("TrendAllapot.hozzaadas, 10 új kutatás egyenként, 10 000 kutatásos előzmény (span 0,05)",
+                         ("gyors", "teljes"), lambda: eset_trendallapot(10000)),
+    "kutatastar_10k": ("KutatasTar betöltés és 3 intézetcsoport nézetei, 10 000 soros CSV, 15 párt",
+                       ("gyors", "teljes"), lambda: eset_kutatastar(10000)),
+    "hazhatas_50k": ("hazhatas_korrekcio, 50 000 soros CSV, 15 párt, 8 intézet", ("teljes",),
+                     lambda: eset_hazhatas(50000)),
+    "grafikon_10k": ("kozvelemeny_grafikon, 10 000 soros CSV, 15 párt", ("teljes",),
+                     lambda: eset_grafikon(10000)),
+}
+
+# Egy eset futtatása a saját (gyermek)folyamatában: idők az ismétlésekből, memória egy külön futásból
+def eset_futtatasa(nev, ismetles):
+    futtatas = ESETEK[nev][2]()
+    idok, szakaszok, belso = [], [], []
+    for _ in range(ismetles):
+        sz = Szakaszok()
+        with Meres() as m:
+            eleje = time.perf_counter()
+            futtatas(sz)
+            idok.append(time.perf_counter() - eleje)
+        szakaszok.append(sz.idok)
+        belso.append({nev: s["ossz_s"] for nev, s in m.osszesites().items()})
+
+    tracemalloc.start()
+    futtatas(Szakaszok())
+    _, csucs = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    legjobb = int(np.argmin(idok))
+    return {
+        "leiras": ESETEK[nev][0],
+        "ismetles": ismetles,
+        "ido_min_s": min(idok),
+        "ido_median_s": float(np.median(idok)),
+        "szakaszok_s": szakaszok[legjobb],
+        "belso_szakaszok_s": belso[legjobb],
+        "csucs_memoria_python_mb": csucs / 2**20,
+        "csucs_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=GYOKER,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def osszehasonlitas(regi, uj):
+    print(f"\n{'eset':<24}{'régi (s)':>12}{'új (s)':>12}{'arány':>10}")
+    for nev, eredmeny in uj["esetek"].items():
+        elozo = regi.get("esetek", {}).get(nev)
+        if not elozo or "ido_min_s" not in elozo or "ido_min_s" not in eredmeny:
+            continue
+        arany = eredmeny["ido_min_s"] / elozo["ido_min_s"]
+        print(f"{nev:<24}{elozo['ido_min_s']:>12.4f}{eredmeny['ido_min_s']:>12.4f}{arany:>9.2f}×")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mandátumkalkulátor, térképrajzoló és LOESS benchmark")
+    parser.add_argument("--csomag", choices=("gyors", "teljes"), default="gyors")
+    parser.add_argument("--eset", action="append", help="csak a megadott eset(ek) futnak")
+    parser.add_argument("--ismetles", type=int, default=3)
+    parser.add_argument("--idokorlat", type=float, default=900, help="esetenkénti időkorlát másodpercben")
+    parser.add_argument("--kimenet", help="JSON kimenet (alapból benchmark/eredmenyek/<commit>_<időpont>.json)")
+    parser.add_argument("--osszehasonlitas", help="korábbi JSON eredmény, amihez viszonyítunk")
+    parser.add_argument("--gyermek", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gyermek:
+        print(json.dumps(eset_futtatasa(args.eset[0], args.ismetles)))
+        return
+
+    nevek = args.eset or [nev for nev, (_, csomagok, _) in ESETEK.items() if args.csomag in csomagok]
+    ismeretlen = [nev for nev in nevek if nev not in ESETEK]
+    if ismeretlen:
+        parser.error(f"ismeretlen eset(ek): {', '.join(ismeretlen)}; lehetséges: {', '.join(ESETEK)}")
+
+    commit = _git_commit()
+    osszesito = {
+        "commit": commit,
+        "idopont": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processzorok": os.cpu_count(),
+        "esetek": {},
+    }
+
+    # Minden eset külön folyamatban fut, hogy a memóriacsúcs és az időkorlát esetenként értelmezett legyen
+    for nev in nevek:
+        print(f">> {nev}: {ESETEK[nev][0]}", flush=True)
+        try:
+            kesz = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--gyermek", "--eset", nev, "--ismetles", str(args.ismetles)],
+                capture_output=True, text=True, timeout=args.idokorlat,
+            )
+        except subprocess.TimeoutExpired:
+            osszesito["esetek"][nev] = {"leiras": ESETEK[nev][0], "hiba": f"időtúllépés ({args.idokorlat} s)"}
+            print(f"   időtúllépés ({args.idokorlat} s)")
+            continue
+        if kesz.returncode != 0:
+            osszesito["esetek"][nev] = {"leiras": ESETEK[nev][0], "hiba": kesz.stderr.strip().splitlines()[-1:]}
+            print(f"   hiba: {kesz.stderr.strip().splitlines()[-1:]}")
+            continue
+        eredmeny = json.loads(kesz.stdout.strip().splitlines()[-1])
+        osszesito["esetek"][nev] = eredmeny
+        szakaszok = ", ".join(f"{k}: {v * 1000:.1f} ms" for k, v in eredmeny["szakaszok_s"].items())
+        print(f"   {eredmeny['ido_min_s'] * 1000:.1f} ms (medián {eredmeny['ido_median_s'] * 1000:.1f} ms), "
+              f"Python csúcs {eredmeny['csucs_memoria_python_mb']:.1f} MB, RSS {eredmeny['csucs_rss_mb']:.0f} MB")
+        print(f"   szakaszok: {szakaszok}")
+        if eredmeny["belso_szakaszok_s"]:
+            belso = ", ".join(f"{k}: {v * 1000:.1f} ms" for k, v in eredmeny["belso_szakaszok_s"].items())
+            print(f"   belső szakaszok: {belso}")
+
+    kimenet = args.kimenet
+    if not kimenet:
+        os.makedirs(EREDMENY_KONYVTAR, exist_ok=True)
+        kimenet = os.path.join(EREDMENY_KONYVTAR, f"{commit or 'ismeretlen'}_{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(kimenet, "w", encoding="utf-8") as f:
+        json.dump(osszesito, f, ensure_ascii=False, indent=2)
+    print(f">> Eredmények elmentve: {kimenet}")
+
+    if args.osszehasonlitas:
+        with open(args.osszehasonlitas, "r", encoding="utf-8") as f:
+            osszehasonlitas(json.load(f), osszesito)
+
+if __name__ == "__main__":
+    main()
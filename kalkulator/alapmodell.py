@@ -0,0 +1,140 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# A gyorsítótár formátumának verziója; változáskor a régi .npz fájlok érvénytelenek
+GYORSITOTAR_VERZIO = 1
+
+def normalize_party_name(name: str) -> str:
+
+    # Normalizálja a pártneveket: eltávolítja a ' (%)' végződést, és egységesíti az elnevezéseket.
+
+    name = name.strip()
+    if name.endswith(" (%)"):
+        name = name[:-4]
+    return name
+
+# Körzeti bemeneti CSV beolvasása, oszlopnevek normalizálása
+def korzeti_alapadatok(csv_path):
+    df = pd.read_csv(csv_path, sep=';', encoding='utf-8-sig')
+    df.drop(columns=['Index'], inplace=True, errors='ignore')
+
+    df.columns = [normalize_party_name(col) if col not in ['Körzet', 'Népesség'] else col for col in df.columns]
+
+    parties = [col for col in df.columns if col not in ['Körzet', 'Népesség']]
+    return df, parties
+
+# Népességgel súlyozott országos EP eredmények a körzeti adatokból
+def ep_orszagos_eredmenyek(df, parties):
+    total_population = df['Népesség'].sum()
+    return {
+        party: (df['Népesség'] * df[party] / 100).sum() / total_population * 100
+        for party in parties
+    }
+
+def fajl_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for darab in iter(lambda: f.read(1 << 20), b""):
+            h.update(darab)
+    return h.hexdigest()
+
+# A körzeti CSV-ből egyszer felépített, forgatókönyvtől független alapmodell.
+# Minden tömb folytonos float64 (a népesség összege egész), a pártok és körzetek sorrendje a CSV-é.
+class BaselineModel:
+    def __init__(self, partok, korzetek, nepesseg, korzeti_szazalek, ep_eredmenyek, aranyok, forras_hash=None):
+        self.partok = list(partok)
+        self.korzetek = list(korzetek)
+        self.nepesseg = np.ascontiguousarray(nepesseg, dtype=float)
+        self.korzeti_szazalek = np.ascontiguousarray(korzeti_szazalek, dtype=float)
+        self.ep_eredmenyek = np.ascontiguousarray(ep_eredmenyek, dtype=float)
+        self.aranyok = np.ascontiguousarray(aranyok, dtype=float)
+        self.total_population = int(self.nepesseg.sum())
+        self.forras_hash = forras_hash
+
+    @classmethod
+    def csv_bol(cls, csv_path):
+        df, parties = korzeti_alapadatok(csv_path)
+        ep_eredmenyek = ep_orszagos_eredmenyek(df, parties)
+
+        # Arányszám számítása: körzeti % / országos %
+        aranyok = np.column_stack([(df[p] / ep_eredmenyek[p]).to_numpy() for p in parties])
+        return cls(
+            parties,
+            df['Körzet'].tolist(),
+            df['Népesség'].to_numpy(),
+            df[parties].to_numpy(dtype=float),
+            [ep_eredmenyek[p] for p in parties],
+            aranyok,
+            forras_hash=fajl_hash(csv_path),
+        )
+
+    def mentes(self, cache_path):
+        # Először ideiglenes fájlba írunk, hogy párhuzamos olvasó ne lásson félkész gyorsítótárat
+        ideiglenes = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            ideiglenes,
+            verzio=np.array(GYORSITOTAR_VERZIO),
+            forras_hash=np.array(self.forras_hash or ""),
+            partok=np.array(self.partok),
+            korzetek=np.array(self.korzetek),
+            nepesseg=self.nepesseg,
+            korzeti_szazalek=self.korzeti_szazalek,
+            ep_eredmenyek=self.ep_eredmenyek,
+            aranyok=self.aranyok,
+        )
+        os.replace(ideiglenes, cache_path)
+
+    @classmethod
+    def npz_bol(cls, cache_path):
+        with np.load(cache_path) as npz:
+            return cls(
+                npz["partok"].tolist(),
+                npz["korzetek"].tolist(),
+                npz["nepesseg"],
+                npz["korzeti_szazalek"],
+                npz["ep_eredmenyek"],
+                npz["aranyok"],
+                forras_hash=str(npz["forras_hash"]) or None,
+            )
+
+    # Betöltés a gyorsítótárból, ha az a forrásfájl jelenlegi tartalmához készült; különben újraépítés és mentés
+    @classmethod
+    def betoltes(cls, csv_path, cache_path=None):
+        cache_path = cache_path or alapmodell_gyorsitotar_utvonal(csv_path)
+        forras_hash = fajl_hash(csv_path)
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as npz:
+                    ervenyes = int(npz["verzio"]) == GYORSITOTAR_VERZIO and str(npz["forras_hash"]) == forras_hash
+                if ervenyes:
+                    return cls.npz_bol(cache_path)
+            except (OSError, ValueError, KeyError):
+                print(f"Figyelmeztetés: sérült alapmodell-gyorsítótár, újraépítés: {cache_path}")
+
+        model = cls.csv_bol(csv_path)
+        try:
+            model.mentes(cache_path)
+        except OSError as e:
+            print(f"Figyelmeztetés: az alapmodell-gyorsítótár nem menthető ({cache_path}): {e}")
+        return model
+
+def alapmodell_gyorsitotar_utvonal(csv_path):
+    return os.path.splitext(csv_path)[0] + ".alapmodell.npz"
+
+# Folyamaton belüli memória: abszolút útvonal -> ((módosítási idő, méret, gyorsítótár), BaselineModel)
+_betoltott = {}
+
+# Alapmodell egy CSV-hez: folyamaton belül csak akkor tölt újra, ha a fájl megváltozott.
+# Ha már BaselineModel-t kap, azt adja vissza.
+def alapmodell(csv_path, cache_path=None):
+    if isinstance(csv_path, BaselineModel):
+        return csv_path
+    allapot = os.stat(csv_path)
+    utvonal = os.path.abspath(csv_path)
+    kulcs = (allapot.st_mtime_ns, allapot.st_size, cache_path)
+    if utvonal not in _betoltott or _betoltott[utvonal][0] != kulcs:
+        _betoltott[utvonal] = (kulcs, BaselineModel.betoltes(csv_path, cache_path))
+    return _betoltott[utvonal][1]
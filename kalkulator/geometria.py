@@ -0,0 +1,161 @@
+import re
+
+import numpy as np
+
+# Körzethatárok tömörítése: koordináták kvantálása és topológiamegőrző egyszerűsítés.
+#
+# A körzetek gyűrűi (M ... L ... zárt sokszögek) a kvantálás után egész rácspontokon vannak, így a
+# szomszédos körzetek közös határpontjai pontosan egyeznek. Csomópont az a pont, amelynek kettőnél
+# több különböző szomszédja van (ahol kettőnél több körzet, vagy körzet és külső határ találkozik).
+# A gyűrűk a csomópontoknál ívekre bomlanak; minden ív egyszer egyszerűsödik (Douglas-Peucker),
+# és minden gyűrű ugyanazt az egyszerűsített ívet kapja, irányhelyesen. Így a közös határok azonosak
+# maradnak, a csomópontok helyben, nem keletkezik rés vagy átfedés a szomszédok között.
+
+_GYURU = re.compile(r"M([^M]*)")
+_SZAM = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# Egy path "d" attribútumának gyűrűi egész rácspontokként (x, y) párok listájaként, vagy None,
+# ha a path nem csak abszolút M/L/Z parancsokból áll (ilyenkor a path változatlan marad)
+def gyuruk_beolvasasa(d, szorzo):
+    if re.search(r"[^MLZz\d\s.,eE+-]", d):
+        return None
+    gyuruk = []
+    for resz in _GYURU.findall(d):
+        szamok = [float(s) for s in _SZAM.findall(resz)]
+        if len(szamok) % 2:
+            return None
+        pontok = [(round(x * szorzo), round(y * szorzo)) for x, y in zip(szamok[::2], szamok[1::2])]
+        # Kvantálás után egybeeső szomszédos pontok és a záró (kezdővel azonos) pont elhagyása
+        gyuru = [p for i, p in enumerate(pontok) if i == 0 or p != pontok[i - 1]]
+        while len(gyuru) > 1 and gyuru[-1] == gyuru[0]:
+            gyuru.pop()
+        if len(gyuru) >= 3:
+            gyuruk.append(gyuru)
+    return gyuruk
+
+# Douglas-Peucker egy nyitott íven (a két végpont marad); a megtartott pontok indexei.
+# min_belso: legalább ennyi belső pontot megtart (a legnagyobb eltérésűeket), hogy a gyűrű ne fajuljon el.
+def _douglas_peucker(pontok, tures, min_belso=0):
+    n = len(pontok)
+    if n <= 2:
+        return list(range(n))
+    p = np.asarray(pontok, dtype=float)
+    megtart = np.zeros(n, dtype=bool)
+    megtart[0] = megtart[-1] = True
+    verem = [(0, n - 1)]
+    kotelezo = min_belso
+    while verem:
+        a, b = verem.pop()
+        if b - a < 2:
+            continue
+        kozep = p[a + 1:b]
+        irany = p[b] - p[a]
+        hossz = np.hypot(*irany)
+        if hossz == 0:
+            tav = np.hypot(*(kozep - p[a]).T)
+        else:
+            tav = np.abs(irany[0] * (kozep[:, 1] - p[a, 1]) - irany[1] * (kozep[:, 0] - p[a, 0])) / hossz
+        i = int(tav.argmax())
+        if tav[i] > tures or kotelezo > 0:
+            kotelezo -= 1
+            megtart[a + 1 + i] = True
+            verem.append((a, a + 1 + i))
+            verem.append((a + 1 + i, b))
+    return np.flatnonzero(megtart).tolist()
+
+# Több path "d" attribútuma kvantálva és közös ívek szerint egyszerűsítve. A bemeneti sorrendet
+# követő listát ad; a nem értelmezhető path-ok helyén None áll.
+def egyszerusitett_utvonalak(d_lista, tizedesjegyek=2, tures=0.05):
+    szorzo = 10 ** tizedesjegyek
+    tures_racs = tures * szorzo
+    osszes = [gyuruk_beolvasasa(d, szorzo) for d in d_lista]
+
+    # Szomszédok pontonként, minden gyűrűben körbe
+    szomszedok = {}
+    for gyuruk in osszes:
+        for gyuru in gyuruk or ():
+            n = len(gyuru)
+            for i, pont in enumerate(gyuru):
+                s = szomszedok.setdefault(pont, set())
+                s.add(gyuru[i - 1])
+                s.add(gyuru[(i + 1) % n])
+    csomopont = {pont for pont, s in szomszedok.items() if len(s) > 2}
+
+    # Gyűrűk ívekre bontása; az ív kulcsa az irányfüggetlen (kanonikus) pontsorozat
+    def ivek(gyuru):
+        jelolt = [i for i, pont in enumerate(gyuru) if pont in csomopont]
+        if not jelolt:
+            # Csomópont nélküli gyűrű (sziget, lyuk): a legkisebb ponttól, kanonikus irányban
+            k = gyuru.index(min(gyuru))
+            elore = gyuru[k:] + gyuru[:k]
+            return [(elore + [elore[0]], True)]
+        elso = jelolt[0]
+        korbe = gyuru[elso:] + gyuru[:elso] + [gyuru[elso]]
+        hatarok = [i - elso for i in jelolt] + [len(gyuru)]
+        return [(korbe[a:b + 1], False) for a, b in zip(hatarok, hatarok[1:])]
+
+    gyuru_ivek = [[ivek(gyuru) for gyuru in gyuruk] if gyuruk is not None else None for gyuruk in osszes]
+
+    # A kevés csomópontú gyűrűk ívei belső pontot is megtartanak, hogy a gyűrű ne fajuljon vonallá.
+    # A jelölés ívenként globális, így a közös ív minden gyűrűben ugyanúgy egyszerűsödik.
+    min_belso = {}
+    for gyuruk in gyuru_ivek:
+        for gyuru in gyuruk or ():
+            kell = 2 if len(gyuru) == 1 else (1 if len(gyuru) == 2 else 0)
+            for iv, _ in gyuru:
+                kulcs = min(tuple(iv), tuple(reversed(iv)))
+                min_belso[kulcs] = max(min_belso.get(kulcs, 0), kell)
+
+    egyszerusitett = {}
+    def iv_egyszerusitese(iv):
+        elore = tuple(iv)
+        kulcs = min(elore, tuple(reversed(iv)))
+        if kulcs not in egyszerusitett:
+            egyszerusitett[kulcs] = [kulcs[i] for i in _douglas_peucker(kulcs, tures_racs, min_belso[kulcs])]
+        eredmeny = egyszerusitett[kulcs]
+        return eredmeny if kulcs == elore else eredmeny[::-1]
+
+    kimenet = []
+    for gyuruk in gyuru_ivek:
+        if gyuruk is None:
+            kimenet.append(None)
+            continue
+        reszek = []
+        for gyuru in gyuruk:
+            pontok = []
+            for iv, _ in gyuru:
+                pontok.extend(iv_egyszerusitese(iv)[:-1])
+            # Önmagát érintő gyűrűben az egyszerűsítés után egymás mellé kerülhet ugyanaz a pont
+            pontok = [p for i, p in enumerate(pontok) if p != pontok[i - 1]]
+            if len(pontok) >= 3:
+                reszek.append(_relativ_gyuru(pontok, szorzo, tizedesjegyek))
+        kimenet.append("".join(reszek))
+    return kimenet
+
+# Szám a lehető legrövidebb alakban: felesleges nullák és vezető nulla nélkül (0.25 -> .25, -0.5 -> -.5)
+def _szam(ertek, szorzo, tizedesjegyek):
+    s = f"{ertek / szorzo:.{tizedesjegyek}f}".rstrip("0").rstrip(".") if tizedesjegyek else str(ertek)
+    if s.startswith("0."):
+        s = s[1:]
+    elif s.startswith("-0."):
+        s = "-" + s[2:]
+    return s if s not in ("", "-0", "-") else "0"
+
+# Számsor minimális elválasztókkal: a "-" előjel és a második tizedespont maga is elválaszt
+def _szamsor(szamok):
+    reszek = [szamok[0]]
+    for elozo, kov in zip(szamok, szamok[1:]):
+        if not (kov.startswith("-") or (kov.startswith(".") and "." in elozo)):
+            reszek.append(" ")
+        reszek.append(kov)
+    return "".join(reszek)
+
+# Zárt gyűrű "M x y l dx dy ... z" alakban; a relatív lépések egész rácson számolódnak, így pontosak
+def _relativ_gyuru(pontok, szorzo, tizedesjegyek):
+    x0, y0 = pontok[0]
+    szamok = []
+    for (xa, ya), (xb, yb) in zip(pontok, pontok[1:]):
+        szamok.append(_szam(xb - xa, szorzo, tizedesjegyek))
+        szamok.append(_szam(yb - ya, szorzo, tizedesjegyek))
+    eleje = f"M{_szamsor([_szam(x0, szorzo, tizedesjegyek), _szam(y0, szorzo, tizedesjegyek)])}"
+    return f"{eleje}l{_szamsor(szamok)}z" if szamok else f"{eleje}z"
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from alapmodell import BaselineModel, fajl_hash
+from terkepkalkulator import SzinSkala
+
+# Tartalomcímzett gyorsítótár a számítások eredményeihez (mandátumkalkuláció, térkép).
+#
+# A kulcs a bemenetek kanonikus alakjának SHA-256 kivonata (bemenet_kulcs): a szótárak kulcssorrendje,
+# a listák és tuple-ök különbsége nem számít, a DataFrame-ek és tömbök tartalmuk szerint, a forrásfájlok
+# (CSV, SVG) a tartalmuk kivonatával kerülnek bele. Így azonos bemenet azonos kulcsot ad folyamatok és
+# újraindítások között is, a forrásfájl változása pedig minden régi bejegyzést érvénytelenít.
+#
+# Két szint: a memóriában egy bájtméretre korlátozott LRU, lemezen (konyvtar megadásakor) egy méretre
+# korlátozott tár, amelyből a legrégebben használt bejegyzések törlődnek. Az értékek pickle-ként tárolódnak
+# (a memóriában is), így minden találat önálló másolat, a hívó módosításai nem hatnak vissza a tárra.
+# A lemezes tárat csak megbízható helyre szabad tenni: a pickle betöltése kódot futtathat.
+
+# A kulcsképzés verziója; változáskor a régi bejegyzések nem találhatók meg többé
+KULCS_VERZIO = 1
+
+# Folyamaton belüli memória: abszolút útvonal -> ((módosítási idő, méret), kivonat)
+_fajl_kivonatok = {}
+
+# Egy forrásfájl tartalmának kivonata; folyamaton belül csak akkor számolja újra, ha a fájl megváltozott
+def fajl_kivonat(path):
+    allapot = os.stat(path)
+    utvonal = os.path.abspath(path)
+    kulcs = (allapot.st_mtime_ns, allapot.st_size)
+    if utvonal not in _fajl_kivonatok or _fajl_kivonatok[utvonal][0] != kulcs:
+        _fajl_kivonatok[utvonal] = (kulcs, fajl_hash(path))
+    return _fajl_kivonatok[utvonal][1]
+
+def _tomb_kivonat(tomb):
+    tomb = np.ascontiguousarray(tomb)
+    if tomb.dtype == object:
+        return kanonikus(tomb.tolist())
+    return {"tomb": [tomb.dtype.str, list(tomb.shape), hashlib.sha256(tomb.tobytes()).hexdigest()]}
+
+# JSON-ba írható, determinisztikus alak a kulcsba kerülő bemenetekhez. Más típusú objektum (pl. függvény)
+# ValueError-t ad, nem kap az állapotától független, ütköző kulcsot.
+def kanonikus(ertek):
+    if ertek is None or isinstance(ertek, (bool, int, str)):
+        return ertek
+    if isinstance(ertek, float):
+        return repr(ertek)
+    if isinstance(ertek, np.generic):
+        return kanonikus(ertek.item())
+    if isinstance(ertek, dict):
+        return {"szotar": sorted([kanonikus(k), kanonikus(v)] for k, v in ertek.items())}
+    if isinstance(ertek, (list, tuple)):
+        return [kanonikus(e) for e in ertek]
+    if isinstance(ertek, (set, frozenset)):
+        return {"halmaz": sorted(json.dumps(kanonikus(e), ensure_ascii=False) for e in ertek)}
+    if isinstance(ertek, np.ndarray):
+        return _tomb_kivonat(ertek)
+    if isinstance(ertek, (pd.DataFrame, pd.Series)):
+        oszlopok = list(ertek.columns) if isinstance(ertek, pd.DataFrame) else [ertek.name]
+        tipusok = [str(t) for t in (ertek.dtypes if isinstance(ertek, pd.DataFrame) else [ertek.dtype])]
+        return {"tabla": [kanonikus(oszlopok), tipusok,
+                          _tomb_kivonat(pd.util.hash_pandas_object(ertek, index=True).to_numpy())]}
+    if isinstance(ertek, BaselineModel):
+        if ertek.forras_hash:
+            return {"alapmodell": ertek.forras_hash}
+        return {"alapmodell": kanonikus([ertek.partok, ertek.korzetek, ertek.nepesseg, ertek.aranyok])}
+    if isinstance(ertek, os.PathLike):
+        return {"fajl": fajl_kivonat(ertek)}
+    if isinstance(ertek, SzinSkala):
+        return {"szinskala": kanonikus([ertek.szinek, ertek.vmin, ertek.vmax, len(ertek.tablazat), ertek.cim])}
+    raise ValueError(f"Nem kulcsolható bemenet: {type(ertek).__name__}")
+
+# A bemenetek kulcsa (hexadecimális SHA-256); a forrásfájlokat fajl_kivonat-tal kell átadni
+def bemenet_kulcs(*reszek):
+    szoveg = json.dumps([KULCS_VERZIO, kanonikus(list(reszek))], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(szoveg.encode("utf-8")).hexdigest()
+
+class Gyorsitotar:
+    def __init__(self, konyvtar=None, memoria_max_bajt=64 * 2 ** 20, lemez_max_bajt=2 ** 30):
+        self.konyvtar = konyvtar
+        self.memoria_max_bajt = memoria_max_bajt
+        self.lemez_max_bajt = lemez_max_bajt
+        self._memoria = OrderedDict()
+        self._memoria_meret = 0
+        self._lemez_meret = None
+        self._zar = threading.Lock()
+        self.statisztika = {"memoria_talalat": 0, "lemez_talalat": 0, "hiany": 0}
+
+    def _utvonal(self, kulcs):
+        return os.path.join(self.konyvtar, kulcs[:2], kulcs + ".pkl")
+
+    def _memoriaba(self, kulcs, adat):
+        if len(adat) > self.memoria_max_bajt:
+            return
+        with self._zar:
+            if kulcs in self._memoria:
+                self._memoria_meret -= len(self._memoria.pop(kulcs))
+            self._memoria[kulcs] = adat
+            self._memoria_meret += len(adat)
+            while self._memoria_meret > self.memoria_max_bajt:
+                _, regi = self._memoria.popitem(last=False)
+                self._memoria_meret -= len(regi)
+
+    # A tárolt érték (új másolat), vagy "alapertelmezett", ha nincs ilyen bejegyzés
+    def lekeres(self, kulcs, alapertelmezett=None):
+        with self._zar:
+            adat = self._memoria.get(kulcs)
+            if adat is not None:
+                self._memoria.move_to_end(kulcs)
+                self.statisztika["memoria_talalat"] += 1
+        if adat is None and self.konyvtar is not None:
+            utvonal = self._utvonal(kulcs)
+            try:
+                with open(utvonal, "rb") as f:
+                    adat = f.read()
+                # A módosítási idő jelzi a legutóbbi használatot a lemezes tár takarításakor
+                os.utime(utvonal)
+            except OSError:
+                adat = None
+            if adat is not None:
+                self._memoriaba(kulcs, adat)
+                self.statisztika["lemez_talalat"] += 1
+        if adat is None:
+            self.statisztika["hiany"] += 1
+            return alapertelmezett
+        try:
+            return pickle.loads(adat)
+        except Exception:
+            print(f"Figyelmeztetés: sérült gyorsítótár-bejegyzés, törölve: {kulcs}")
+            self.torles(kulcs)
+            return alapertelmezett
+
+    def mentes(self, kulcs, ertek):
+        adat = pickle.dumps(ertek, protocol=pickle.HIGHEST_PROTOCOL)
+        self._memoriaba(kulcs, adat)
+        if self.konyvtar is None or len(adat) > self.lemez_max_bajt:
+            return
+        utvonal = self._utvonal(kulcs)
+        ideiglenes = f"{utvonal}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(utvonal), exist_ok=True)
+            with open(ideiglenes, "wb") as f:
+                f.write(adat)
+            os.replace(ideiglenes, utvonal)
+        except OSError as e:
+            print(f"Figyelmeztetés: a gyorsítótár-bejegyzés nem menthető ({utvonal}): {e}")
+            return
+        with self._zar:
+            if self._lemez_meret is not None:
+                self._lemez_meret += len(adat)
+            if self._lemez_meret is None or self._lemez_meret > self.lemez_max_bajt:
+                self._lemez_takaritas()
+
+    # A lemezes tár tényleges mérete (más folyamatok is írhatják); a korlát felett a legrégebben használt
+    # bejegyzések törlődnek, amíg a méret a korlát 90%-a alá nem kerül
+    def _lemez_takaritas(self):
+        bejegyzesek = []
+        for gyoker, _, fajlok in os.walk(self.konyvtar):
+            for nev in fajlok:
+                if nev.endswith(".pkl"):
+                    utvonal = os.path.join(gyoker, nev)
+                    try:
+                        allapot = os.stat(utvonal)
+                    except OSError:
+                        continue
+                    bejegyzesek.append((allapot.st_mtime_ns, allapot.st_size, utvonal))
+        meret = sum(b[1] for b in bejegyzesek)
+        if meret > self.lemez_max_bajt:
+            for _, bajt, utvonal in sorted(bejegyzesek):
+                if meret <= 0.9 * self.lemez_max_bajt:
+                    break
+                try:
+                    os.remove(utvonal)
+                    meret -= bajt
+                except OSError:
+                    pass
+        self._lemez_meret = meret
+
+    # Az érték a tárból, vagy a szamitas() eredménye, amely el is tárolódik
+    def szamitas(self, kulcs, szamitas):
+        eredmeny = self.lekeres(kulcs, _HIANY)
+        if eredmeny is _HIANY:
+            eredmeny = szamitas()
+            self.mentes(kulcs, eredmeny)
+        return eredmeny
+
+    def torles(self, kulcs):
+        with self._zar:
+            if kulcs in self._memoria:
+                self._memoria_meret -= len(self._memoria.pop(kulcs))
+        if self.konyvtar is not None:
+            try:
+                os.remove(self._utvonal(kulcs))
+            except OSError:
+                pass
+
+    def allapot(self):
+        with self._zar:
+            return {**self.statisztika, "memoria_db": len(self._memoria), "memoria_bajt": self._memoria_meret,
+                    "lemez_bajt": self._lemez_meret}
+
+_HIANY = object()
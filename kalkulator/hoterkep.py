@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from alapmodell import alapmodell, normalize_party_name
+from kuszobkereso import forgatokonyvek
+from mandatumkalkulator import mandatumkalkulacio_tomeges, orszagos_eredmenyek_tombje
+
+# Kétdimenziós mandátum-söprés: az x_part (pl. Fidesz) és y_part (pl. Tisza) országos %-ainak minden
+# rácspontján kiszámolja a mandátumokat; a többi párt fix marad vagy arányosan kitölti a maradékot.
+#
+# A rács sorai (x_part egy értéke, y_part összes értéke) együtt, kötegelt hívásokban futnak. A pontos
+# mandátumszám a körzetenként kerekített szavazatokon múlik, és ezek két szomszédos rácspont között minden
+# körzetben változnak, ezért minden cellában minden körzet kiértékelődik; a drága rész (fájl, DataFrame,
+# pártonkénti ciklus) viszont cellánként elmarad. A szomszédos cellák közti körzeti győztesváltásokat
+# a győztes-tömbök különbségéből adjuk vissza (billenési térképek).
+def mandatum_soepres(
+    csv_path,
+    alap_eredmenyek: dict,
+    x_part: str = "Fidesz",
+    y_part: str = "Tisza",
+    x_ertekek=np.arange(30.0, 55.0, 0.1),
+    y_ertekek=np.arange(30.0, 55.0, 0.1),
+    reszvetel_szazalek: float = 70.0,
+    maradek: str = "aranyos",
+    sorok_hivasonkent: int = 16,
+    **kalkulacio_kwargs
+):
+    alap = alapmodell(csv_path)
+    parties = alap.partok
+    x_part, y_part = normalize_party_name(x_part), normalize_party_name(y_part)
+    if x_part not in parties or y_part not in parties:
+        raise ValueError(f"Ismeretlen párt: {x_part if x_part not in parties else y_part}, lehetséges: {parties}")
+    j_x, j_y = parties.index(x_part), parties.index(y_part)
+    alap_vektor = orszagos_eredmenyek_tombje(alap_eredmenyek, parties)[0]
+
+    x_ertekek = np.asarray(x_ertekek, dtype=float)
+    y_ertekek = np.asarray(y_ertekek, dtype=float)
+    nx, ny = len(x_ertekek), len(y_ertekek)
+
+    osszes = np.zeros((nx, ny, len(parties)), dtype=np.int16)
+    egyeni = np.zeros((nx, ny, len(parties)), dtype=np.int16)
+    listas = np.zeros((nx, ny, len(parties)), dtype=np.int16)
+    gyoztes = np.zeros((nx, ny, len(alap.korzetek)), dtype=np.int8)
+
+    for eleje in range(0, nx, sorok_hivasonkent):
+        sorok = slice(eleje, min(eleje + sorok_hivasonkent, nx))
+        x = np.repeat(x_ertekek[sorok], ny)
+        y = np.tile(y_ertekek, len(x) // ny)
+        orszagos = forgatokonyvek(alap_vektor, j_y, j_x, y, x, maradek)
+        eredmeny = mandatumkalkulacio_tomeges(alap, orszagos, reszvetel_szazalek, **kalkulacio_kwargs)
+        osszes[sorok] = eredmeny["osszes"].reshape(-1, ny, len(parties))
+        egyeni[sorok] = eredmeny["egyeni"].reshape(-1, ny, len(parties))
+        listas[sorok] = eredmeny["listas"].reshape(-1, ny, len(parties))
+        gyoztes[sorok] = eredmeny["gyoztes"].reshape(-1, ny, len(alap.korzetek))
+
+    return {
+        "partok": parties,
+        "korzetek": alap.korzetek,
+        "x_part": x_part,
+        "y_part": y_part,
+        "x_ertekek": x_ertekek,
+        "y_ertekek": y_ertekek,
+        "osszes": osszes,
+        "egyeni": egyeni,
+        "listas": listas,
+        "gyoztes": gyoztes,
+        # Hány körzet vált győztest a szomszédos cellához képest az y, illetve az x tengely mentén
+        "valtas_y": (gyoztes[:, 1:] != gyoztes[:, :-1]).sum(axis=2),
+        "valtas_x": (gyoztes[1:] != gyoztes[:-1]).sum(axis=2),
+    }
+
+# Egy párt mandátumai rajzolható táblaként: sorok az x_part, oszlopok az y_part %-ai
+def mandatum_tabla(soepres, part, mezo="osszes"):
+    j = soepres["partok"].index(normalize_party_name(part))
+    return pd.DataFrame(
+        soepres[mezo][..., j],
+        index=pd.Index(np.round(soepres["x_ertekek"], 4), name=f"{soepres['x_part']} %"),
+        columns=pd.Index(np.round(soepres["y_ertekek"], 4), name=f"{soepres['y_part']} %"),
+    )
+
+# Egy körzet győztese a rács minden pontján (pártnevekkel), körzeti billenési térképhez
+def korzeti_gyoztes_tabla(soepres, korzet):
+    k = soepres["korzetek"].index(korzet)
+    nevek = np.array(soepres["partok"])
+    return pd.DataFrame(
+        nevek[soepres["gyoztes"][..., k]],
+        index=pd.Index(np.round(soepres["x_ertekek"], 4), name=f"{soepres['x_part']} %"),
+        columns=pd.Index(np.round(soepres["y_ertekek"], 4), name=f"{soepres['y_part']} %"),
+    )
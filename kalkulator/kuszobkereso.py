@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from alapmodell import alapmodell, normalize_party_name
+from mandatumkalkulator import mandatumkalkulacio_tomeges, orszagos_eredmenyek_tombje
+
+TOBBSEG = 100
+KETHARMAD = 133
+
+# Forgatókönyvek a vizsgált párt (x) és az ellenfél (f) %-ával; a többi párt vagy marad ("fix"),
+# vagy arányosan kitölti a maradék 100 - f - x százalékot ("aranyos").
+def forgatokonyvek(alap_vektor, j_part, j_ellenfel, x, f, maradek="aranyos"):
+    x = np.asarray(x, dtype=float)
+    f = np.broadcast_to(np.asarray(f, dtype=float), x.shape)
+    tomb = np.repeat(alap_vektor[None, :], len(x), axis=0)
+    tomb[:, j_part] = x
+    tomb[:, j_ellenfel] = f
+
+    if maradek == "aranyos":
+        tobbi = np.ones(len(alap_vektor), dtype=bool)
+        tobbi[[j_part, j_ellenfel]] = False
+        alap_osszeg = alap_vektor[tobbi].sum()
+        if alap_osszeg > 0:
+            szorzo = np.maximum(100.0 - f - x, 0.0) / alap_osszeg
+            tomb[:, tobbi] = alap_vektor[tobbi][None, :] * szorzo[:, None]
+    elif maradek != "fix":
+        raise ValueError(f"Ismeretlen maradék-kezelés: {maradek} (lehetséges: aranyos, fix)")
+    return tomb
+
+# Billenési görbe: az ellenfél %-ainak és a részvételeknek minden kombinációjára megkeresi a vizsgált
+# párt legkisebb országos %-át, amelynél a mandátumszáma eléri a célt (alapból 100 és 133).
+#
+# A mandátumszám lépcsős függvény, ezért a keresés k-felezéssel halad: minden lépésben az összes
+# nyitott cella "jeloltek" darab belső pontját egyetlen kötegelt hívással értékeli ki, és a cél első
+# teljesülését tartalmazó részintervallumra szűkít, amíg a szélesség a "pontossag" alá nem csökken.
+# Az első lépés a teljes [also, felso] intervallumot rácsozza, így az ennél finomabb nem monoton
+# ingadozások közül mindig az alsó határhoz legközelebbi átlépést adja.
+#
+# A billenő körzetek a küszöb alatti (utolsó nem teljesülő) és a küszöbnél (első teljesülő) pont
+# egyéni győzteseinek eltérései; üres, ha a küszöböt listás mandátum billenti át.
+def billenesi_gorbe(
+    csv_path,
+    alap_eredmenyek: dict,
+    part: str = "Tisza",
+    ellenfel: str = "Fidesz",
+    ellenfel_szazalekok=(45.0,),
+    reszvetelek=(70.0,),
+    cel_mandatumok=(TOBBSEG, KETHARMAD),
+    also: float = 0.0,
+    felso: float = 100.0,
+    pontossag: float = 0.01,
+    jeloltek: int = 15,
+    maradek: str = "aranyos",
+    **kalkulacio_kwargs
+):
+    alap = alapmodell(csv_path)
+    parties = alap.partok
+    part, ellenfel = normalize_party_name(part), normalize_party_name(ellenfel)
+    if part not in parties or ellenfel not in parties:
+        raise ValueError(f"Ismeretlen párt: {part if part not in parties else ellenfel}, lehetséges: {parties}")
+    j_part, j_ellenfel = parties.index(part), parties.index(ellenfel)
+    alap_vektor = orszagos_eredmenyek_tombje(alap_eredmenyek, parties)[0]
+
+    # Cellák: (ellenfél %, részvétel, cél mandátum) minden kombinációja
+    f, t, cel = (a.ravel() for a in np.meshgrid(
+        np.asarray(ellenfel_szazalekok, dtype=float),
+        np.asarray(reszvetelek, dtype=float),
+        np.asarray(cel_mandatumok, dtype=int),
+        indexing="ij",
+    ))
+    n = len(f)
+
+    def kiertekeles(cellak, x):
+        # cellak: (m,) cellaindexek, x: (m, k) jelöltpontok -> mandátumok és a teljes eredmény
+        k = x.shape[1]
+        orszagos = forgatokonyvek(alap_vektor, j_part, j_ellenfel, x.ravel(), np.repeat(f[cellak], k), maradek)
+        eredmeny = mandatumkalkulacio_tomeges(alap, orszagos, np.repeat(t[cellak], k), **kalkulacio_kwargs)
+        return eredmeny["osszes"][:, j_part].reshape(-1, k), eredmeny
+
+    # Első lépés: a teljes intervallum rácsozása
+    racs = np.linspace(also, felso, jeloltek + 2)
+    mand, _ = kiertekeles(np.arange(n), np.repeat(racs[None, :], n, axis=0))
+    teljesul = mand >= cel[:, None]
+    elerheto = teljesul.any(axis=1)
+    elso = teljesul.argmax(axis=1)
+
+    lo = np.where(elso > 0, racs[np.maximum(elso - 1, 0)], np.nan)
+    hi = np.where(elerheto, racs[elso], np.nan)
+    # Ha már az alsó határ is teljesül, nincs mit szűkíteni
+    nyitott = elerheto & (elso > 0) & (hi - lo > pontossag)
+
+    while nyitott.any():
+        cellak = np.flatnonzero(nyitott)
+        lepes = (hi[cellak] - lo[cellak]) / (jeloltek + 1)
+        x = lo[cellak, None] + lepes[:, None] * np.arange(1, jeloltek + 1)
+        mand, _ = kiertekeles(cellak, x)
+        teljesul = mand >= cel[cellak, None]
+        van = teljesul.any(axis=1)
+        elso = teljesul.argmax(axis=1)
+        # Ha egyik belső pont sem teljesül, a küszöb az utolsó belső pont és a régi felső határ között van
+        uj_lo = np.where(van, np.where(elso > 0, x[np.arange(len(cellak)), elso - 1], lo[cellak]), x[:, -1])
+        uj_hi = np.where(van, x[np.arange(len(cellak)), elso], hi[cellak])
+        lo[cellak], hi[cellak] = uj_lo, uj_hi
+        nyitott[cellak] = hi[cellak] - lo[cellak] > pontossag
+
+    # A küszöb két oldalának kiértékelése: mandátumok és billenő körzetek
+    sorok = []
+    cellak = np.flatnonzero(elerheto)
+    also_pont = np.where(np.isnan(lo[cellak]), hi[cellak], lo[cellak])
+    _, eredmeny = kiertekeles(cellak, np.column_stack([also_pont, hi[cellak]]))
+    gyoztes = eredmeny["gyoztes"].reshape(len(cellak), 2, -1)
+    egyeni = eredmeny["egyeni"][:, j_part].reshape(-1, 2)
+    listas = eredmeny["listas"][:, j_part].reshape(-1, 2)
+    reszletek = {}
+    for i, c in enumerate(cellak):
+        valtozott = np.flatnonzero(gyoztes[i, 0] != gyoztes[i, 1])
+        reszletek[c] = {
+            "Mandátum": int(egyeni[i, 1] + listas[i, 1]),
+            "Egyéni": int(egyeni[i, 1]),
+            "Listás": int(listas[i, 1]),
+            "Billenő körzetek": [
+                f"{alap.korzetek[k]}: {parties[gyoztes[i, 0, k]]} -> {parties[gyoztes[i, 1, k]]}"
+                for k in valtozott
+            ],
+        }
+
+    for c in range(n):
+        r = reszletek.get(c, {"Mandátum": None, "Egyéni": None, "Listás": None, "Billenő körzetek": []})
+        sorok.append({
+            f"{ellenfel} %": f[c],
+            "Részvétel": t[c],
+            "Cél mandátum": int(cel[c]),
+            f"{part} %": hi[c],
+            "Alsó korlát": lo[c],
+            **r,
+        })
+    return pd.DataFrame(sorok)
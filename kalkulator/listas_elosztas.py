@@ -0,0 +1,102 @@
+import heapq
+
+import numpy as np
+
+MODSZEREK = ("dhondt", "sainte-lague", "hare")
+
+# Közös listák küszöbe a listát állító pártok száma szerint (3 vagy több párt: 15%)
+KOZOS_LISTA_KUSZOB = {1: 5.0, 2: 10.0, 3: 15.0}
+
+# Osztósorozat a legnagyobb hányados módszerekhez: D'Hondt 1, 2, 3, ...; Sainte-Laguë 1, 3, 5, ...
+def _osztok(modszer, n):
+    d = np.arange(1, n + 1)
+    if modszer == "dhondt":
+        return d
+    if modszer == "sainte-lague":
+        return 2 * d - 1
+    raise ValueError(f"Ismeretlen elosztási módszer: {modszer} (lehetséges: {', '.join(MODSZEREK)})")
+
+# Listás jogosultság: (forgatókönyv × párt) logikai tömb az országos %-ok alapján.
+# kuszob: egységes küszöb vagy {párt: küszöb}; kozos_listak: {párt: a közös listát állító pártok száma}.
+# Pártonként a sorrend: a kuszob szótár bejegyzése, ennek hiányában a közös lista küszöbe, végül az egységes
+# küszöb (szótárnál 5%).
+def jogosultsag(orszagos, parties, kuszob=5.0, kozos_listak=None, kizart=("Független",)):
+    orszagos = np.atleast_2d(np.asarray(orszagos, dtype=float))
+    kozos_listak = kozos_listak or {}
+    for p, db in kozos_listak.items():
+        if isinstance(db, bool) or not isinstance(db, (int, np.integer)) or db < 1:
+            raise ValueError(f"A közös listát állító pártok száma legalább 1 egész szám kell legyen: {p}: {db!r}")
+    egyedi = kuszob if isinstance(kuszob, dict) else {}
+    alap = 5.0 if isinstance(kuszob, dict) else kuszob
+    kuszobok = []
+    for p in parties:
+        if p in egyedi:
+            k = egyedi[p]
+        elif p in kozos_listak:
+            k = KOZOS_LISTA_KUSZOB[min(kozos_listak[p], 3)]
+        else:
+            k = alap
+        kuszobok.append(k)
+    jogosult = orszagos >= np.array(kuszobok)
+    jogosult &= np.array([p not in kizart for p in parties])
+    return jogosult
+
+# Egy forgatókönyv listás mandátumai. Legnagyobb hányados módszereknél prioritási sorral
+# (O(helyek · log párt)), azonos hányadosnál a pártsorrendben előrébb álló párt kapja a helyet.
+def listas_mandatumok(szavazatok, helyek, modszer="dhondt", jogosult=None):
+    szavazatok = np.asarray(szavazatok)
+    jogosult = np.ones(len(szavazatok), dtype=bool) if jogosult is None else np.asarray(jogosult)
+    mand = np.zeros(len(szavazatok), dtype=np.int64)
+    if helyek <= 0 or not jogosult.any():
+        return mand
+    if modszer == "hare":
+        return listas_mandatumok_tomeges(szavazatok[None], helyek, modszer, jogosult[None])[0]
+
+    osztok = _osztok(modszer, helyek + 1)
+    sor = [(-(szavazatok[p] / osztok[0]), p) for p in np.flatnonzero(jogosult)]
+    heapq.heapify(sor)
+    for _ in range(helyek):
+        _, p = heapq.heappop(sor)
+        mand[p] += 1
+        heapq.heappush(sor, (-(szavazatok[p] / osztok[mand[p]]), p))
+    return mand
+
+# Sok forgatókönyv listás mandátumai egyszerre: szavazatok (forgatókönyv × párt).
+# Legnagyobb hányados módszereknél zárt alakban: a helyek-edik legnagyobb hányados feletti hányadosok
+# mind helyet kapnak, az azzal egyenlőek közül a pártsorrendben előrébb állók (mint a ciklusos változatban).
+def listas_mandatumok_tomeges(szavazatok, helyek, modszer="dhondt", jogosult=None):
+    szavazatok = np.atleast_2d(np.asarray(szavazatok))
+    n, n_part = szavazatok.shape
+    jogosult = np.ones((n, n_part), dtype=bool) if jogosult is None else np.broadcast_to(jogosult, (n, n_part))
+    mand = np.zeros((n, n_part), dtype=np.int64)
+    if helyek <= 0:
+        return mand
+    van_jogosult = jogosult.any(axis=1)
+
+    if modszer == "hare":
+        ervenyes = np.where(jogosult, szavazatok, 0).astype(float)
+        ossz = ervenyes.sum(axis=1, keepdims=True)
+        kvota = np.divide(ossz, helyek, out=np.ones_like(ossz), where=ossz > 0)
+        hanyados = ervenyes / kvota
+        mand = np.floor(hanyados).astype(np.int64)
+        maradek = np.where(jogosult, hanyados - mand, -np.inf)
+        # Legnagyobb maradékok; azonos maradéknál a pártsorrend dönt (stabil rendezés)
+        sorrend = np.argsort(-maradek, axis=1, kind="stable")
+        hianyzo = helyek - mand.sum(axis=1)
+        rang = np.empty_like(sorrend)
+        np.put_along_axis(rang, sorrend, np.arange(n_part)[None, :].repeat(n, axis=0), axis=1)
+        mand += (rang < hianyzo[:, None]) & jogosult
+        return np.where(van_jogosult[:, None], mand, 0)
+
+    osztok = _osztok(modszer, helyek)
+    hanyadosok = np.where(jogosult[..., None], szavazatok[..., None] / osztok, -np.inf)
+    lapos = hanyadosok.reshape(n, -1)
+    kuszob = -np.partition(-lapos, helyek - 1, axis=1)[:, helyek - 1]
+
+    mand = (hanyadosok > kuszob[:, None, None]).sum(axis=2)
+    egyenlo = (hanyadosok == kuszob[:, None, None]).sum(axis=2)
+    hianyzo = helyek - mand.sum(axis=1)
+    # Az egyenlő hányadosok pártsorrendben kapják a maradék helyeket
+    elotte = np.cumsum(egyenlo, axis=1) - egyenlo
+    mand += np.clip(hianyzo[:, None] - elotte, 0, egyenlo)
+    return np.where(van_jogosult[:, None], mand, 0)
@@ -1,14 +1,37 @@
+import numpy as np
 import pandas as pd
 
-def normalize_party_name(name: str) -> str:
-    
-    # Normalizálja a pártneveket: eltávolítja a ' (%)' végződést, és egységesíti az elnevezéseket.
-    
-    name = name.strip()
-    if name.endswith(" (%)"):
-        name = name[:-4]
-    return name
+from alapmodell import BaselineModel, alapmodell, normalize_party_name
+from listas_elosztas import jogosultsag, listas_mandatumok, listas_mandatumok_tomeges
+from meres import stopper
 
+# Körzeti győztesek, töredék- és kompenzációs szavazatok egész tömbökön, tetszőleges számú forgatókönyvre.
+# szavazat: (... × körzet × párt) egész tömb. Visszaad:
+#   gyoztes (... × körzet): a győztes párt indexe,
+#   kulonbseg (... × körzet): a győztes és a második helyezett szavazatkülönbsége,
+#   holtverseny (... × körzet): több párt is a legtöbb szavazatot kapta,
+#   egyeni, kompenzacio, toredek (... × párt): elnyert körzetek, győztesi kompenzáció (különbség + 1),
+#   a vesztesek töredékszavazatai.
+# Holtverseny esetén a pártsorrendben előrébb álló párt nyer (mint a pandas idxmax), a különbség 0,
+# a győztes kompenzációja 1 szavazat, a holtversenyben vesztes párt szavazatai töredékként számítanak.
+def korzeti_eredmenyek(szavazat):
+    szavazat = np.asarray(szavazat)
+    n_part = szavazat.shape[-1]
+    gyoztes = szavazat.argmax(axis=-1)
+    elso_ket = np.partition(szavazat, -2, axis=-1)
+    kulonbseg = elso_ket[..., -1] - elso_ket[..., -2]
+    gyoztes_maszk = gyoztes[..., None] == np.arange(n_part)
+
+    return {
+        "gyoztes": gyoztes,
+        "kulonbseg": kulonbseg,
+        "holtverseny": kulonbseg == 0,
+        "egyeni": gyoztes_maszk.sum(axis=-2),
+        "kompenzacio": np.where(gyoztes_maszk, (kulonbseg + 1)[..., None], 0).sum(axis=-2),
+        "toredek": np.where(gyoztes_maszk, 0, szavazat).sum(axis=-2),
+    }
+
+# gyorsitotar: gyorsitotar.Gyorsitotar; azonos paraméterekre (és változatlan CSV-re) a tárolt eredményt adja
 def mandatumkalkulacio(
     csv_path,
     orszagos_eredmenyek: dict,
@@ -17,50 +40,55 @@ def mandatumkalkulacio(
     fix_mandatumok: dict = None,
     taktikai_atszavazas: dict = None,
     taktikai_atszavazas_korzet: dict = None,
-    output_path: str = "mandatum_kalkulacio_eredmeny.csv"
+    output_path: str = "mandatum_kalkulacio_eredmeny.csv",
+    taktikai_atszavazas_megye: dict = None,
+    listas_modszer: str = "dhondt",
+    kuszob=5.0,
+    kozos_listak: dict = None,
+    gyorsitotar=None
 ):
+    ora = stopper("mandatumkalkulacio")
+    ora("betoltes")
+
     # Normalizáljuk az országos eredmények kulcsait
     orszagos_eredmenyek = {normalize_party_name(k): v for k, v in orszagos_eredmenyek.items()}
+    kuszob = {normalize_party_name(k): v for k, v in kuszob.items()} if isinstance(kuszob, dict) else kuszob
+    kozos_listak = {normalize_party_name(k): v for k, v in (kozos_listak or {}).items()}
     kulhoni_szavazatok = {normalize_party_name(k): v for k, v in (kulhoni_szavazatok or {}).items()}
     fix_mandatumok = {normalize_party_name(k): v for k, v in (fix_mandatumok or {}).items()}
-    taktikai_atszavazas = {
-        normalize_party_name(k): (v[0], normalize_party_name(v[1]))
-        for k, v in (taktikai_atszavazas or {}).items()
-    }
-    taktikai_atszavazas_korzet = {
-        korzet: {
-            normalize_party_name(k): (v[0], normalize_party_name(v[1]))
-            for k, v in szabalyok.items()
-        }
-        for korzet, szabalyok in (taktikai_atszavazas_korzet or {}).items()
-    }
 
-    df = pd.read_csv(csv_path, sep=';', encoding='utf-8-sig')
-    df.drop(columns=['Index'], inplace=True, errors='ignore')
+    # Gyorsítótárazott eredmény: a kiírt CSV ugyanaz, a mandátumösszesítő nem íródik ki újra
+    if gyorsitotar is not None:
+        from gyorsitotar import bemenet_kulcs, fajl_kivonat
+        forras = csv_path if isinstance(csv_path, BaselineModel) else fajl_kivonat(csv_path)
+        kulcs = bemenet_kulcs(
+            "mandatumkalkulacio", forras, orszagos_eredmenyek, reszvetel_szazalek, kulhoni_szavazatok,
+            fix_mandatumok, taktikai_atszavazas, taktikai_atszavazas_korzet, taktikai_atszavazas_megye,
+            listas_modszer, kuszob, kozos_listak,
+        )
+        eredmeny = gyorsitotar.lekeres(kulcs)
+        if eredmeny is not None:
+            ora("iras")
+            print(">> Mandátumeredmény a gyorsítótárból.")
+            eredmeny[3].to_csv(output_path, sep=';', encoding='utf-8-sig', index=False)
+            ora.vege()
+            return eredmeny
 
-    df.columns = [normalize_party_name(col) if col not in ['Körzet', 'Népesség'] else col for col in df.columns]
+    # Alapmodell (arányszámok: körzeti % / országos EP %) - fájlonként egyszer épül fel
+    alap = alapmodell(csv_path)
+    parties = alap.partok
+    korzetek = alap.korzetek
+    total_population = alap.total_population
 
-    parties = [col for col in df.columns if col not in ['Körzet', 'Népesség']]
-
-    total_population = df['Népesség'].sum()
-
-    # EP országos eredmények számítása a fájlból
-    ep_eredmenyek = {
-        party: (df['Népesség'] * df[party] / 100).sum() / total_population * 100
-        for party in parties
-    }
-
-    # Arányszám számítása: körzeti % / országos %
-    aranyok = {
-        party: df[party] / ep_eredmenyek[party]
-        for party in parties
-    }
+    ora("elorejelzes")
 
     # Előrejelzett körzeti %-ok
-    pred_szazalek_df = pd.DataFrame({
-        party: aranyok[party] * orszagos_eredmenyek.get(party, 0)
-        for party in parties
-    })
+    pred_szazalek_df = pd.DataFrame(
+        alap.aranyok * np.array([orszagos_eredmenyek.get(p, 0) for p in parties], dtype=float),
+        columns=parties
+    )
+
+    ora("korrekcio")
 
     # Korrigálás, ha több mint 100%
     row_sums = pred_szazalek_df.sum(axis=1)
@@ -70,55 +98,39 @@ def mandatumkalkulacio(
     pred_szazalek_df = pred_szazalek_df.mul(faktor, axis=0)
 
     # Körzeti szavazatszám
-    korzeti_szavazok = (df['Népesség'] * reszvetel_szazalek / 100).round().astype(int)
+    korzeti_szavazok = pd.Series(alap.nepesseg * reszvetel_szazalek / 100).round().astype(int)
     pred_szavazat_df = pd.DataFrame({
         party: (pred_szazalek_df[party] / 100 * korzeti_szavazok).round().astype(int)
         for party in parties
     })
 
-    # Átszavazás alkalmazása körzetenként
-    for idx, korzet in enumerate(df["Körzet"]):
-        # Ellenőrizzük, van-e külön szabály adott körzetre
-        if korzet in taktikai_atszavazas_korzet:
-            atszavazas_szabalyok = taktikai_atszavazas_korzet[korzet]
-        else:
-            atszavazas_szabalyok = taktikai_atszavazas
-
-        # Alkalmazzuk az átszavazási szabályokat
-        for party, (arany, cel_party) in atszavazas_szabalyok.items():
-            if party in pred_szavazat_df.columns and cel_party in pred_szavazat_df.columns:
-                athelyezendo = int(round(pred_szavazat_df.at[idx, party] * arany))
-                pred_szavazat_df.at[idx, party] -= athelyezendo
-                pred_szavazat_df.at[idx, cel_party] += athelyezendo
-            else:
-                print(f"Figyelmeztetés: Érvénytelen párt a körzetben: {korzet}, párt: {party}, cél: {cel_party}")
+    ora("atszavazas")
+
+    # Átszavazás alkalmazása: országos, megyei és körzeti átszavazási mátrixok
+    atszavazasi_matrixok = korzeti_atszavazasi_matrixok(
+        korzetek, parties,
+        taktikai_atszavazas, taktikai_atszavazas_megye, taktikai_atszavazas_korzet
+    )
+    pred_szavazat_df = pd.DataFrame(
+        atszavazas_alkalmazasa(pred_szavazat_df.to_numpy(), atszavazasi_matrixok),
+        columns=parties
+    )
+
+    ora("korzeti_gyoztesek")
 
     # Új százalékok kiszámítása
     total_votes_per_district = pred_szavazat_df.sum(axis=1)
     pred_szazalek_df_adjusted = (pred_szavazat_df.div(total_votes_per_district, axis=0) * 100).round(2)
 
     # Egyéni győztesek, töredék, kompenzációs értékek
-    egyeni_gyoztesek = []
-    egyeni_mand = {p: 0 for p in parties}
-    toredek = {p: 0 for p in parties}
-    komp = {p: 0 for p in parties}
-    kulonbsegek = []
-
-    for idx, row in pred_szavazat_df.iterrows():
-        winner = row.idxmax()
-        runnerup = row.drop(winner).max()
-        kulonbseg_szavazat = row[winner] - runnerup
-        total_votes = total_votes_per_district[idx]
-        kulonbseg_szazalek = (kulonbseg_szavazat / total_votes * 100).round(2)
-
-        egyeni_gyoztesek.append(winner)
-        egyeni_mand[winner] += 1
-        komp[winner] += int(kulonbseg_szavazat + 1)
-        kulonbsegek.append(kulonbseg_szazalek)
-
-        for p in parties:
-            if p != winner:
-                toredek[p] += int(row[p])
+    korzeti = korzeti_eredmenyek(pred_szavazat_df.to_numpy())
+    egyeni_gyoztesek = [parties[i] for i in korzeti["gyoztes"]]
+    egyeni_mand = dict(zip(parties, korzeti["egyeni"].tolist()))
+    toredek = dict(zip(parties, korzeti["toredek"].tolist()))
+    komp = dict(zip(parties, korzeti["kompenzacio"].tolist()))
+    kulonbsegek = list(np.round(korzeti["kulonbseg"] / total_votes_per_district.to_numpy() * 100, 2))
+
+    ora("listas_elosztas")
 
     # Összes szavazó (országosan)
     ossz_szavazo = int(round(reszvetel_szazalek / 100 * total_population))
@@ -138,40 +150,250 @@ def mandatumkalkulacio(
         for p in parties
     }
 
-    # 5% küszöb + D'Hondt mátrix
-    jogosult = [
-        p for p in parties
-        if p != "Független" and orszagos_eredmenyek.get(p, 0) >= 5.0
-    ]
-    list_mand = {p: 0 for p in jogosult}
+    # Küszöb (alapból 5%) + D'Hondt vagy más listás elosztás
+    jogosult_maszk = jogosultsag(
+        [orszagos_eredmenyek.get(p, 0) for p in parties], parties, kuszob, kozos_listak
+    )[0]
+    jogosult = [p for p, j in zip(parties, jogosult_maszk) if j]
     fix_db = sum(fix_mandatumok.get(p, 0) for p in parties)
     dhondt_helyek = 93 - fix_db
 
-    for _ in range(dhondt_helyek):
-        ertek = {p: listas[p] / (1 + list_mand[p]) for p in jogosult}
-        nyertes = max(ertek, key=ertek.get)
-        list_mand[nyertes] += 1
+    elosztas = listas_mandatumok([listas[p] for p in parties], dhondt_helyek, listas_modszer, jogosult_maszk)
+    list_mand = {p: int(elosztas[parties.index(p)]) for p in jogosult}
 
     for p in parties:
         list_mand[p] = list_mand.get(p, 0) + fix_mandatumok.get(p, 0)
 
     osszes_mand = {p: egyeni_mand[p] + list_mand[p] for p in parties}
 
+    ora("iras")
+
     print("\nMandátumösszesítő:")
     for p in parties:
         print(f"{p}: Összesen: {osszes_mand[p]}, Egyéni: {egyeni_mand[p]}, Listás: {list_mand[p]}, Listás szavazat: {listas_szavazat[p]}, Egyéni szavazat: {egyeni_szavazat[p]}")
 
     out_df = pd.DataFrame({
-        "Körzet": df["Körzet"],
+        "Körzet": korzetek,
         **{p: pred_szazalek_df_adjusted[p].round(2) for p in parties},
         "Győztes": egyeni_gyoztesek,
         "Különbség": kulonbsegek
     })
 
     out_df.to_csv(output_path, sep=';', encoding='utf-8-sig', index=False)
+    if gyorsitotar is not None:
+        gyorsitotar.mentes(kulcs, (egyeni_mand, list_mand, osszes_mand, out_df))
+    ora.vege()
     return egyeni_mand, list_mand, osszes_mand, out_df
 
 
+# Országos eredmények tömbbé alakítása: (forgatókönyv × párt), a CSV pártsorrendjében
+def orszagos_eredmenyek_tombje(orszagos_eredmenyek, parties):
+    if isinstance(orszagos_eredmenyek, dict):
+        orszagos_eredmenyek = [orszagos_eredmenyek]
+    if len(orszagos_eredmenyek) and isinstance(orszagos_eredmenyek[0], dict):
+        sorok = []
+        for eredmeny in orszagos_eredmenyek:
+            eredmeny = {normalize_party_name(k): v for k, v in eredmeny.items()}
+            sorok.append([eredmeny.get(p, 0) for p in parties])
+        return np.asarray(sorok, dtype=float).reshape(-1, len(parties))
+
+    tomb = np.atleast_2d(np.asarray(orszagos_eredmenyek, dtype=float))
+    if tomb.ndim != 2 or tomb.shape[1] != len(parties):
+        raise ValueError(f"Az országos eredmények tömbjének alakja (forgatókönyv × {len(parties)}) kell legyen, "
+                         f"a pártok sorrendje: {parties}")
+    return tomb
+
+def mandatumkalkulacio_tomeges(
+    csv_path,
+    orszagos_eredmenyek,
+    reszvetel_szazalek=70.0,
+    kulhoni_szavazatok: dict = None,
+    fix_mandatumok: dict = None,
+    taktikai_atszavazas: dict = None,
+    taktikai_atszavazas_korzet: dict = None,
+    taktikai_atszavazas_megye: dict = None,
+    listas_modszer: str = "dhondt",
+    kuszob=5.0,
+    kozos_listak: dict = None,
+    korzeti_zaj=None,
+    korzeti_adatok: bool = False,
+    blokk_meret: int = 4096
+):
+    # Sok forgatókönyv egyszerre: a számítás (forgatókönyv × körzet × párt) tömbökön fut,
+    # fájlírás és kiírás nélkül. Az eredmény tömbjeinek oszlopai a "partok" sorrendjét követik.
+    # A csv_path helyett kész BaselineModel is átadható.
+    # A korzeti_zaj (forgatókönyv × körzet × párt) százalékpontban adódik az előrejelzett körzeti %-okhoz.
+    # korzeti_adatok=True esetén a korrigált körzeti %-ok (forgatókönyv × körzet × párt) is visszajönnek.
+    kulhoni_szavazatok = {normalize_party_name(k): v for k, v in (kulhoni_szavazatok or {}).items()}
+    fix_mandatumok = {normalize_party_name(k): v for k, v in (fix_mandatumok or {}).items()}
+    kuszob = {normalize_party_name(k): v for k, v in kuszob.items()} if isinstance(kuszob, dict) else kuszob
+    kozos_listak = {normalize_party_name(k): v for k, v in (kozos_listak or {}).items()}
+
+    alap = alapmodell(csv_path)
+    parties = alap.partok
+    korzetek = alap.korzetek
+    nepesseg = alap.nepesseg
+    total_population = alap.total_population
+    aranyok = alap.aranyok
+
+    orszagos = orszagos_eredmenyek_tombje(orszagos_eredmenyek, parties)
+    n = orszagos.shape[0]
+    reszvetel = np.broadcast_to(np.asarray(reszvetel_szazalek, dtype=float), (n,))
+
+    atszavazasi_matrixok = korzeti_atszavazasi_matrixok(
+        korzetek, parties, taktikai_atszavazas, taktikai_atszavazas_megye, taktikai_atszavazas_korzet
+    )
+
+    kulhoni = np.array([kulhoni_szavazatok.get(p, 0) for p in parties], dtype=np.int64)
+    fix = np.array([fix_mandatumok.get(p, 0) for p in parties], dtype=np.int64)
+    dhondt_helyek = 93 - int(fix.sum())
+
+    egyeni_mand = np.zeros((n, len(parties)), dtype=np.int64)
+    list_mand = np.zeros((n, len(parties)), dtype=np.int64)
+    gyoztesek = np.zeros((n, len(korzetek)), dtype=np.int64)
+    kulonbsegek = np.zeros((n, len(korzetek)))
+    listas_szavazat = np.zeros((n, len(parties)), dtype=np.int64)
+    szazalekok = np.zeros((n, len(korzetek), len(parties))) if korzeti_adatok else None
+
+    for eleje in range(0, n, blokk_meret):
+        blokk = slice(eleje, min(eleje + blokk_meret, n))
+        orsz = orszagos[blokk]
+        resz = reszvetel[blokk]
+
+        # Előrejelzett körzeti %-ok, 100% feletti sorok visszaskálázása
+        pred = aranyok[None, :, :] * orsz[:, None, :]
+        if korzeti_zaj is not None:
+            pred = np.maximum(pred + korzeti_zaj[blokk], 0.0)
+        sorosszeg = pred[..., 0].copy()
+        for j in range(1, len(parties)):
+            sorosszeg += pred[..., j]
+        faktor = np.where(sorosszeg > 100, 100.0 / np.where(sorosszeg > 100, sorosszeg, 1.0), 1.0)
+        pred *= faktor[..., None]
+
+        # Körzeti szavazatszám
+        korzeti_szavazok = np.round(nepesseg[None, :] * resz[:, None] / 100).astype(np.int64)
+        szavazat = np.round(pred / 100 * korzeti_szavazok[..., None]).astype(np.int64)
+
+        szavazat = atszavazas_alkalmazasa(szavazat, atszavazasi_matrixok)
+
+        total_votes = szavazat.sum(axis=2)
+        pred_adjusted = np.round(szavazat / total_votes[..., None] * 100, 2)
+        if korzeti_adatok:
+            szazalekok[blokk] = pred_adjusted
+
+        korzeti = korzeti_eredmenyek(szavazat)
+        egyeni_mand[blokk] = korzeti["egyeni"]
+        toredek = korzeti["toredek"]
+        komp = korzeti["kompenzacio"]
+        gyoztesek[blokk] = korzeti["gyoztes"]
+        kulonbsegek[blokk] = np.round(korzeti["kulonbseg"] / total_votes * 100, 2)
+
+        # Listás szavazatok a korrigált körzeti arányok átlagából
+        ossz_szavazo = np.round(resz / 100 * total_population)
+        atlag = np.ascontiguousarray(pred_adjusted.transpose(0, 2, 1)).sum(axis=2) / len(korzetek)
+        listas_szavazat[blokk] = np.round(atlag / 100 * ossz_szavazo[:, None]).astype(np.int64) + kulhoni
+        listas = listas_szavazat[blokk] + toredek + komp
+
+        # Küszöb + listás elosztás
+        jogosult = jogosultsag(orsz, parties, kuszob, kozos_listak)
+        list_mand[blokk] = listas_mandatumok_tomeges(listas, dhondt_helyek, listas_modszer, jogosult) + fix
+
+    eredmeny = {
+        "partok": parties,
+        "korzetek": korzetek,
+        "egyeni": egyeni_mand,
+        "listas": list_mand,
+        "osszes": egyeni_mand + list_mand,
+        "gyoztes": gyoztesek,
+        "kulonbseg": kulonbsegek,
+        "listas_szavazat": listas_szavazat,
+    }
+    if korzeti_adatok:
+        eredmeny["szazalek"] = szazalekok
+    return eredmeny
+
+# Megyenév a körzet nevéből: "Bács-Kiskun 01" -> "Bács-Kiskun"
+def megye(korzet):
+    return korzet.rsplit(" ", 1)[0]
+
+# Egy forráspárt szabályának célpárjai. Elfogadott alakok:
+#   (0.5, "Tisza"), [(0.4, "Tisza"), (0.1, "Független")] vagy {"Tisza": 0.4, "Független": 0.1}
+def _atszavazasi_celok(szabaly):
+    if isinstance(szabaly, dict):
+        return [(arany, cel) for cel, arany in szabaly.items()]
+    if len(szabaly) == 2 and not isinstance(szabaly[0], (tuple, list)):
+        return [tuple(szabaly)]
+    return [tuple(s) for s in szabaly]
+
+# Átszavazási mátrix (párt × párt): M[i, j] az i. párt szavazatainak j-hez átkerülő hányada.
+# A szabályok megadhatók pártonkénti szabályként (lásd fent) vagy kész mátrixként; a főátló nem számít.
+def atszavazasi_matrix(szabalyok, parties):
+    if szabalyok is None:
+        return np.zeros((len(parties), len(parties)))
+
+    if isinstance(szabalyok, dict):
+        matrix = np.zeros((len(parties), len(parties)))
+        for party, szabaly in szabalyok.items():
+            party = normalize_party_name(party)
+            for arany, cel_party in _atszavazasi_celok(szabaly):
+                cel_party = normalize_party_name(cel_party)
+                if party in parties and cel_party in parties and party != cel_party:
+                    matrix[parties.index(party), parties.index(cel_party)] += arany
+                else:
+                    print(f"Figyelmeztetés: Érvénytelen átszavazási szabály, párt: {party}, cél: {cel_party}")
+    else:
+        matrix = np.array(szabalyok, dtype=float)
+        if matrix.shape != (len(parties), len(parties)):
+            raise ValueError(f"Az átszavazási mátrix alakja ({len(parties)} × {len(parties)}) kell legyen, "
+                             f"a pártok sorrendje: {parties}")
+        np.fill_diagonal(matrix, 0.0)
+
+    if (matrix < 0).any() or (matrix.sum(axis=1) > 1 + 1e-9).any():
+        raise ValueError("Az átszavazási arányok nem lehetnek negatívak, és pártonként összesen legfeljebb 1-et adhatnak ki")
+    return matrix
+
+# Körzetenkénti átszavazási mátrixok (körzet × párt × párt).
+# Elsőbbség: körzeti felülírás > megyei felülírás > országos alapértelmezés.
+def korzeti_atszavazasi_matrixok(korzetek, parties, taktikai_atszavazas=None,
+                                  taktikai_atszavazas_megye=None, taktikai_atszavazas_korzet=None):
+    matrixok = np.repeat(atszavazasi_matrix(taktikai_atszavazas, parties)[None], len(korzetek), axis=0)
+    megyek = [megye(k) for k in korzetek]
+    for nev, szabalyok in (taktikai_atszavazas_megye or {}).items():
+        maszk = np.array([m == nev for m in megyek])
+        if maszk.any():
+            matrixok[maszk] = atszavazasi_matrix(szabalyok, parties)
+    for korzet, szabalyok in (taktikai_atszavazas_korzet or {}).items():
+        maszk = np.array([k == korzet for k in korzetek])
+        if maszk.any():
+            matrixok[maszk] = atszavazasi_matrix(szabalyok, parties)
+    return matrixok
+
+# Átszavazás egyetlen kötegelt mátrixszorzással: szavazat (... × körzet × párt) egész tömb.
+# Minden szabály az átszavazás előtti szavazatokra vonatkozik (a szabályok sorrendje nem számít).
+# Egy forrás több célja esetén kumulált kerekítéssel dolgozunk, így egy párt sem ad ki többet, mint amennyi
+# szavazata van, és az összes szavazat körzetenként változatlan marad.
+def atszavazas_alkalmazasa(szavazat, matrixok):
+    forras, cel = np.nonzero(matrixok.any(axis=0))
+    if not len(forras):
+        return szavazat
+
+    aranyok = matrixok[:, forras, cel]
+    kumulalt = np.zeros_like(aranyok)
+    elozo = np.zeros_like(aranyok)
+    for k in range(len(forras)):
+        if k > 0 and forras[k] == forras[k - 1]:
+            elozo[:, k] = kumulalt[:, k - 1]
+        kumulalt[:, k] = elozo[:, k] + aranyok[:, k]
+
+    forras_szavazat = szavazat[..., forras]
+    aramlas = (np.round(forras_szavazat * kumulalt) - np.round(forras_szavazat * elozo)).astype(np.int64)
+
+    iranyok = np.zeros((len(forras), szavazat.shape[-1]), dtype=np.int64)
+    iranyok[np.arange(len(forras)), forras] -= 1
+    iranyok[np.arange(len(forras)), cel] += 1
+    return szavazat + aramlas @ iranyok
+
+
 #mandatumkalkulacio(
     csv_path="2024_ep_input_korzetek_bovitett.csv",
     orszagos_eredmenyek={
@@ -211,4 +433,4 @@ def mandatumkalkulacio(
         #}
     },
     output_path="mandatum_kalkulacio_eredmeny.csv"
-#)
\ No newline at end of file
+#)
@@ -0,0 +1,120 @@
+import contextvars
+import json
+import os
+import time
+import tracemalloc
+
+# Szakaszonkénti mérés a számítási láncokhoz (mandátumkalkuláció, térképrajzolás).
+#
+# A mérés egy Meres objektummal kapcsolható be, a "with" blokkon belül futó hívásokra:
+#
+#     with Meres(kimenet="meres.jsonl", memoria=True) as m:
+#         mandatumkalkulacio(...)
+#     print(m.osszesites())
+#
+# Minden lezárt szakasz egy esemény (dict): lanc, szakasz, ido_s, és memoria=True esetén memoria_bajt
+# (a szakasz alatti tracemalloc-csúcs a kezdeti foglaláshoz képest). Az események a Meres.esemenyek
+# listába kerülnek, kimenet megadásakor JSON sorokként fájlba (útvonal vagy írható objektum) is,
+# visszahivas megadásakor pedig az eseménnyel meghívódik a függvény.
+# Bekapcsolt mérés nélkül a stopper() üres objektumot ad, a szakaszhatárok költsége egy függvényhívás.
+
+_aktiv = contextvars.ContextVar("meres", default=None)
+
+class Meres:
+    def __init__(self, kimenet=None, memoria=False, visszahivas=None, **cimkek):
+        self.kimenet = kimenet
+        self.memoria = memoria
+        self.visszahivas = visszahivas
+        self.cimkek = cimkek
+        self.esemenyek = []
+        self._fajl = None
+        self._tracemalloc_inditva = False
+        self._token = None
+
+    def __enter__(self):
+        if isinstance(self.kimenet, (str, os.PathLike)):
+            self._fajl = open(self.kimenet, "a", encoding="utf-8")
+        else:
+            self._fajl = self.kimenet
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_inditva = True
+        self._token = _aktiv.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _aktiv.reset(self._token)
+        if self._tracemalloc_inditva:
+            tracemalloc.stop()
+            self._tracemalloc_inditva = False
+        if self._fajl is not None and self._fajl is not self.kimenet:
+            self._fajl.close()
+        self._fajl = None
+        return False
+
+    def esemeny(self, lanc, szakasz, ido_s, memoria_bajt=None):
+        e = {"lanc": lanc, "szakasz": szakasz, "ido_s": ido_s, **self.cimkek}
+        if memoria_bajt is not None:
+            e["memoria_bajt"] = memoria_bajt
+        self.esemenyek.append(e)
+        if self._fajl is not None:
+            self._fajl.write(json.dumps(e, ensure_ascii=False) + "\n")
+        if self.visszahivas is not None:
+            self.visszahivas(e)
+
+    # Szakaszonkénti összesítés: "lánc/szakasz" -> darab, összidő, maximum, memóriacsúcs
+    def osszesites(self):
+        eredmeny = {}
+        for e in self.esemenyek:
+            s = eredmeny.setdefault(f"{e['lanc']}/{e['szakasz']}", {"db": 0, "ossz_s": 0.0, "max_s": 0.0})
+            s["db"] += 1
+            s["ossz_s"] += e["ido_s"]
+            s["max_s"] = max(s["max_s"], e["ido_s"])
+            if "memoria_bajt" in e:
+                s["memoria_bajt"] = max(s.get("memoria_bajt", 0), e["memoria_bajt"])
+        return eredmeny
+
+# Egymást követő szakaszok mérése egy láncon belül: stopper("x") hívása lezárja az előző szakaszt és
+# elindítja az újat, vege() lezárja az utolsót.
+class Stopper:
+    def __init__(self, meres, lanc):
+        self.meres = meres
+        self.lanc = lanc
+        self.szakasz = None
+        self.eleje = 0.0
+        self.memoria_eleje = 0
+
+    def __call__(self, szakasz):
+        self.vege()
+        self.szakasz = szakasz
+        if self.meres.memoria and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.memoria_eleje = tracemalloc.get_traced_memory()[0]
+        self.eleje = time.perf_counter()
+
+    def vege(self):
+        if self.szakasz is None:
+            return
+        ido = time.perf_counter() - self.eleje
+        memoria = None
+        if self.meres.memoria and tracemalloc.is_tracing():
+            memoria = max(tracemalloc.get_traced_memory()[1] - self.memoria_eleje, 0)
+        self.meres.esemeny(self.lanc, self.szakasz, ido, memoria)
+        self.szakasz = None
+
+class _UresStopper:
+    def __call__(self, szakasz):
+        pass
+
+    def vege(self):
+        pass
+
+_URES_STOPPER = _UresStopper()
+
+# Stopper a jelenleg aktív méréshez, vagy üres stopper, ha nincs bekapcsolt mérés
+def stopper(lanc):
+    meres = _aktiv.get()
+    return _URES_STOPPER if meres is None else Stopper(meres, lanc)
+
+def aktiv_meres():
+    return _aktiv.get()
@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from alapmodell import alapmodell
+from gyorsitotar import Gyorsitotar, bemenet_kulcs, fajl_kivonat
+from mandatumkalkulator import mandatumkalkulacio_tomeges
+from terkepsablon import terkep_sablon
+
+KONYVTAR = os.path.dirname(os.path.abspath(__file__))
+ALAP_CSV = os.path.join(KONYVTAR, "2024_ep_input_korzetek_bovitett.csv")
+ALAP_SVG = os.path.join(KONYVTAR, "2026_korzetek_alap.svg")
+
+MAX_KERES_MERET = 10 * 1024 * 1024
+
+MANDATUM_PARAMETEREK = (
+    "orszagos_eredmenyek", "reszvetel_szazalek", "kulhoni_szavazatok", "fix_mandatumok",
+    "taktikai_atszavazas", "taktikai_atszavazas_korzet", "taktikai_atszavazas_megye",
+    "listas_modszer", "kuszob", "kozos_listak",
+)
+TERKEP_PARAMETEREK = ("korzetek", "shade_threshold", "bp_zoom_enabled")
+
+HTTP_UZENETEK = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 500: "Internal Server Error"}
+
+# A munkafolyamatokban egyszer betöltött alapmodell és térképsablon
+_munkas = {}
+
+def _munkas_inditas(csv_path, svg_path):
+    _munkas["alap"] = alapmodell(csv_path)
+    _munkas["sablon"] = terkep_sablon(svg_path)
+
+def _bemelegites():
+    return os.getpid()
+
+def _ellenorzes(keres, engedelyezett):
+    if not isinstance(keres, dict):
+        raise ValueError("A kérés törzse JSON objektum kell legyen")
+    ismeretlen = set(keres) - set(engedelyezett)
+    if ismeretlen:
+        raise ValueError(f"Ismeretlen paraméter(ek): {', '.join(sorted(ismeretlen))}")
+
+# Mandátumszámítás egy forgatókönyvre; a körzeti táblázat a mandatum_kalkulacio_eredmeny.csv oszlopait követi
+def mandatum_szamitas(keres):
+    _ellenorzes(keres, MANDATUM_PARAMETEREK)
+    if "orszagos_eredmenyek" not in keres:
+        raise ValueError("Hiányzó paraméter: orszagos_eredmenyek")
+    kwargs = {k: v for k, v in keres.items() if k != "orszagos_eredmenyek"}
+    e = mandatumkalkulacio_tomeges(_munkas["alap"], [keres["orszagos_eredmenyek"]], korzeti_adatok=True, **kwargs)
+    parties = e["partok"]
+    korzetek = [
+        {
+            "Körzet": korzet,
+            **dict(zip(parties, e["szazalek"][0, d].tolist())),
+            "Győztes": parties[e["gyoztes"][0, d]],
+            "Különbség": float(e["kulonbseg"][0, d]),
+        }
+        for d, korzet in enumerate(e["korzetek"])
+    ]
+    return {
+        "partok": parties,
+        "egyeni": dict(zip(parties, e["egyeni"][0].tolist())),
+        "listas": dict(zip(parties, e["listas"][0].tolist())),
+        "osszes": dict(zip(parties, e["osszes"][0].tolist())),
+        "listas_szavazat": dict(zip(parties, e["listas_szavazat"][0].tolist())),
+        "korzetek": korzetek,
+    }
+
+# Térkép: kész körzeti táblázatból ("korzetek"), vagy a mandátumszámítás paramétereiből
+def terkep_rajzolas(keres):
+    _ellenorzes(keres, MANDATUM_PARAMETEREK + TERKEP_PARAMETEREK)
+    if "korzetek" in keres:
+        korzet_df = pd.DataFrame(keres["korzetek"])
+    else:
+        szamitas = {k: v for k, v in keres.items() if k in MANDATUM_PARAMETEREK}
+        korzet_df = pd.DataFrame(mandatum_szamitas(szamitas)["korzetek"])
+    return _munkas["sablon"].rendereles(
+        korzet_df,
+        shade_threshold=keres.get("shade_threshold", 30),
+        bp_zoom_enabled=keres.get("bp_zoom_enabled", True),
+    )
+
+# Hosszan futó helyi HTTP/JSON szolgáltatás. Az eseményhurok csak a hálózati részt kezeli, a számítás
+# munkafolyamatokban fut, amelyek az alapmodellt és az SVG-t egyszer töltik be. Az egyszerre érkező,
+# azonos kérések (útvonal + kanonikus JSON törzs) egyetlen számításon osztoznak, a kész eredmények pedig
+# a gyorsítótárba kerülnek (alapból csak memóriában), a kulcsban a CSV és az SVG tartalmának kivonatával.
+class MandatumSzerver:
+    UTVONALAK = {
+        "/mandatum": (mandatum_szamitas, "application/json; charset=utf-8"),
+        "/terkep": (terkep_rajzolas, "image/svg+xml; charset=utf-8"),
+    }
+
+    def __init__(self, csv_path=ALAP_CSV, svg_path=ALAP_SVG, munkasok=None, gyorsitotar=None):
+        self.csv_path = csv_path
+        self.svg_path = svg_path
+        self.munkasok = (os.cpu_count() or 1) if munkasok is None else munkasok
+        self.gyorsitotar = Gyorsitotar() if gyorsitotar is None else gyorsitotar
+        self._forras = None
+        self.pool = None
+        self.server = None
+        self._folyamatban = {}
+
+    async def indit(self, host="127.0.0.1", port=8765):
+        # A munkafolyamatok az indításkori fájlokat töltik be, a kulcsok is ezekhez készülnek
+        self._forras = (fajl_kivonat(self.csv_path), fajl_kivonat(self.svg_path))
+        if self.munkasok == 0:
+            # Munkafolyamatok nélkül, a szerver folyamatában (teszteléshez, hibakereséshez)
+            _munkas_inditas(self.csv_path, self.svg_path)
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.munkasok,
+                initializer=_munkas_inditas,
+                initargs=(self.csv_path, self.svg_path),
+            )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self.pool, _bemelegites) for _ in range(max(self.munkasok, 1))
+        ])
+        self.server = await asyncio.start_server(self._kapcsolat, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def leallit(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def _szamitas(self, utvonal, keres):
+        kulcs = (utvonal, json.dumps(keres, sort_keys=True, ensure_ascii=False))
+        feladat = self._folyamatban.get(kulcs)
+        if feladat is None:
+            tarolt_kulcs = bemenet_kulcs("szerver", utvonal, keres, *self._forras)
+            eredmeny = self.gyorsitotar.lekeres(tarolt_kulcs)
+            if eredmeny is not None:
+                return eredmeny
+            feladat = asyncio.ensure_future(self._kiszamitas(utvonal, keres, tarolt_kulcs))
+            self._folyamatban[kulcs] = feladat
+            feladat.add_done_callback(lambda _: self._folyamatban.pop(kulcs, None))
+        return await asyncio.shield(feladat)
+
+    async def _kiszamitas(self, utvonal, keres, tarolt_kulcs):
+        loop = asyncio.get_running_loop()
+        eredmeny = await loop.run_in_executor(self.pool, self.UTVONALAK[utvonal][0], keres)
+        # A szerializálás és a lemezre írás ne tartsa fel az eseményhurkot
+        await loop.run_in_executor(None, self.gyorsitotar.mentes, tarolt_kulcs, eredmeny)
+        return eredmeny
+
+    async def _valasz(self, metodus, utvonal, torzs):
+        if utvonal == "/egeszseg":
+            return 200, "application/json; charset=utf-8", {"allapot": "ok", "munkasok": self.munkasok,
+                                                            "gyorsitotar": self.gyorsitotar.allapot()}
+        if utvonal not in self.UTVONALAK:
+            return 404, "application/json; charset=utf-8", {"hiba": f"Ismeretlen útvonal: {utvonal}"}
+        if metodus != "POST":
+            return 405, "application/json; charset=utf-8", {"hiba": "Csak POST kérés engedélyezett"}
+        try:
+            keres = json.loads(torzs.decode("utf-8") or "{}")
+            eredmeny = await self._szamitas(utvonal, keres)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, "application/json; charset=utf-8", {"hiba": str(e)}
+        except Exception as e:
+            return 500, "application/json; charset=utf-8", {"hiba": f"{type(e).__name__}: {e}"}
+        return 200, self.UTVONALAK[utvonal][1], eredmeny
+
+    async def _kapcsolat(self, reader, writer):
+        try:
+            while True:
+                sor = await reader.readline()
+                if not sor:
+                    break
+                try:
+                    metodus, utvonal, verzio = sor.decode("latin-1").split()
+                except ValueError:
+                    metodus = None
+                fejlecek = {}
+                while metodus is not None:
+                    fejlec = await reader.readline()
+                    if fejlec in (b"\r\n", b"\n", b""):
+                        break
+                    nev, _, ertek = fejlec.decode("latin-1").partition(":")
+                    fejlecek[nev.strip().lower()] = ertek.strip()
+
+                try:
+                    hossz = int(fejlecek.get("content-length", 0) or 0)
+                except ValueError:
+                    hossz = -1
+                if metodus is None:
+                    statusz, tipus = 400, "application/json; charset=utf-8"
+                    tartalom = {"hiba": "Érvénytelen kérési sor"}
+                    elo = False
+                elif hossz < 0:
+                    statusz, tipus = 400, "application/json; charset=utf-8"
+                    tartalom = {"hiba": "Érvénytelen Content-Length"}
+                    elo = False
+                elif hossz > MAX_KERES_MERET:
+                    statusz, tipus, tartalom = 413, "application/json; charset=utf-8", {"hiba": "Túl nagy kérés"}
+                    elo = False
+                else:
+                    torzs = await reader.readexactly(hossz) if hossz else b""
+                    statusz, tipus, tartalom = await self._valasz(metodus.upper(), utvonal.split("?")[0], torzs)
+                    kapcsolat = fejlecek.get("connection", "").lower()
+                    elo = kapcsolat == "keep-alive" if verzio == "HTTP/1.0" else kapcsolat != "close"
+
+                if isinstance(tartalom, str):
+                    adat = tartalom.encode("utf-8")
+                else:
+                    adat = json.dumps(tartalom, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {statusz} {HTTP_UZENETEK[statusz]}\r\n"
+                    f"Content-Type: {tipus}\r\n"
+                    f"Content-Length: {len(adat)}\r\n"
+                    f"Connection: {'keep-alive' if elo else 'close'}\r\n\r\n".encode("latin-1") + adat
+                )
+                await writer.drain()
+                if not elo:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def _futtatas(args):
+    gyorsitotar = Gyorsitotar(args.gyorsitotar, memoria_max_bajt=args.memoria_mb * 2 ** 20,
+                              lemez_max_bajt=args.gyorsitotar_mb * 2 ** 20)
+    szerver = MandatumSzerver(args.csv, args.svg, args.munkasok, gyorsitotar)
+    host, port = await szerver.indit(args.host, args.port)
+    print(f">> Mandátumkalkulátor szerver fut: http://{host}:{port} ({szerver.munkasok} munkafolyamat)")
+    try:
+        await szerver.server.serve_forever()
+    finally:
+        await szerver.leallit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Helyi HTTP/JSON mandátumkalkulátor és térképrajzoló szolgáltatás")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--munkasok", type=int, default=None,
+                        help="munkafolyamatok száma (alapból a magok száma, 0: a szerver folyamatában számol)")
+    parser.add_argument("--csv", default=ALAP_CSV)
+    parser.add_argument("--svg", default=ALAP_SVG)
+    parser.add_argument("--gyorsitotar", default=None, help="a lemezes gyorsítótár könyvtára (alapból csak memória)")
+    parser.add_argument("--gyorsitotar-mb", type=int, default=1024, help="a lemezes gyorsítótár mérete (MB)")
+    parser.add_argument("--memoria-mb", type=int, default=64, help="a memóriabeli gyorsítótár mérete (MB)")
+    try:
+        asyncio.run(_futtatas(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
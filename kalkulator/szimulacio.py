@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from alapmodell import alapmodell
+from mandatumkalkulator import (
+    normalize_party_name,
+    megye,
+    orszagos_eredmenyek_tombje,
+    mandatumkalkulacio_tomeges,
+)
+
+OSSZES_MANDATUM = 199
+TOBBSEG = 100
+KETHARMAD = 133
+
+# A munkafolyamatonként egyszer betöltött körzeti adatok
+_alap = None
+
+def _munkas_inditas(alap):
+    global _alap
+    _alap = alap
+
+# Országos hibák húzása a hibamodellből: (húzás × párt) százalékpontos eltérések
+# A hibamodell lehet:
+#   - dict: {párt: szórás} független normális hibák,
+#   - (párt × párt) kovarianciamátrix,
+#   - függvény (rng, n, partok) -> (n × párt) tömb (process poolban csak modulszintű függvény működik).
+def orszagos_hibak(hibamodell, rng, n, parties):
+    if hibamodell is None:
+        return np.zeros((n, len(parties)))
+    if callable(hibamodell):
+        hibak = np.asarray(hibamodell(rng, n, parties), dtype=float)
+        if hibak.shape != (n, len(parties)):
+            raise ValueError(f"A hibamodell ({n} × {len(parties)}) alakú tömböt kell adjon, kapott: {hibak.shape}")
+        return hibak
+    if isinstance(hibamodell, dict):
+        szorasok = {normalize_party_name(k): v for k, v in hibamodell.items()}
+        szoras = np.array([szorasok.get(p, 0.0) for p in parties], dtype=float)
+        return rng.standard_normal((n, len(parties))) * szoras
+
+    kovariancia = np.asarray(hibamodell, dtype=float)
+    if kovariancia.shape != (len(parties), len(parties)):
+        raise ValueError(f"A kovarianciamátrix alakja ({len(parties)} × {len(parties)}) kell legyen, "
+                         f"a pártok sorrendje: {parties}")
+    return rng.multivariate_normal(np.zeros(len(parties)), kovariancia, size=n, method="cholesky")
+
+# Egy blokk húzás kiértékelése, csak az összesítéshez szükséges darabszámokat adja vissza
+def _szimulacio_blokk(feladat):
+    (seed, n, kozepertek, hibamodell, reszvetel_szazalek, reszvetel_szoras,
+     regionalis_szoras, megye_index, kulhoni_szavazatok, fix_mandatumok,
+     taktikai_atszavazas, taktikai_atszavazas_megye, taktikai_atszavazas_korzet,
+     listas_modszer, kuszob, kozos_listak) = feladat
+    alap = _alap
+    parties = alap.partok
+    rng = np.random.default_rng(seed)
+
+    orszagos = np.maximum(kozepertek[None, :] + orszagos_hibak(hibamodell, rng, n, parties), 0.0)
+    reszvetel = np.full(n, float(reszvetel_szazalek))
+    if reszvetel_szoras:
+        reszvetel = np.clip(reszvetel + rng.standard_normal(n) * reszvetel_szoras, 1.0, 100.0)
+
+    # Megyénként korrelált zaj: egy megye minden körzete ugyanazt az eltérést kapja
+    korzeti_zaj = None
+    if np.any(regionalis_szoras):
+        n_megye = megye_index.max() + 1
+        megyei_zaj = rng.standard_normal((n, n_megye, len(parties))) * regionalis_szoras
+        korzeti_zaj = megyei_zaj[:, megye_index, :]
+
+    eredmeny = mandatumkalkulacio_tomeges(
+        alap, orszagos, reszvetel,
+        kulhoni_szavazatok=kulhoni_szavazatok,
+        fix_mandatumok=fix_mandatumok,
+        taktikai_atszavazas=taktikai_atszavazas,
+        taktikai_atszavazas_megye=taktikai_atszavazas_megye,
+        taktikai_atszavazas_korzet=taktikai_atszavazas_korzet,
+        listas_modszer=listas_modszer,
+        kuszob=kuszob,
+        kozos_listak=kozos_listak,
+        korzeti_zaj=korzeti_zaj,
+    )
+    osszes = eredmeny["osszes"]
+    hisztogram = np.stack([
+        np.bincount(np.minimum(osszes[:, j], OSSZES_MANDATUM), minlength=OSSZES_MANDATUM + 1)
+        for j in range(len(parties))
+    ])
+    gyozelmek = np.stack([
+        (eredmeny["gyoztes"] == j).sum(axis=0) for j in range(len(parties))
+    ], axis=1)
+    return hisztogram, gyozelmek
+
+def monte_carlo_szimulacio(
+    csv_path,
+    orszagos_eredmenyek: dict,
+    hibamodell=None,
+    n_huzas: int = 100000,
+    reszvetel_szazalek: float = 70.0,
+    reszvetel_szoras: float = 0.0,
+    regionalis_szoras=0.0,
+    kulhoni_szavazatok: dict = None,
+    fix_mandatumok: dict = None,
+    taktikai_atszavazas: dict = None,
+    taktikai_atszavazas_korzet: dict = None,
+    taktikai_atszavazas_megye: dict = None,
+    listas_modszer: str = "dhondt",
+    kuszob=5.0,
+    kozos_listak: dict = None,
+    mag: int = 0,
+    munkasok: int = None,
+    blokk_meret: int = 2000
+):
+    # A húzások rögzített méretű blokkokra oszlanak, minden blokk saját, a magból származtatott
+    # RNG folyamot kap (SeedSequence.spawn). Így az eredmény bitre azonos bármennyi munkással,
+    # csak a mag és a blokk_meret számít.
+    alap = alapmodell(csv_path)
+    parties = alap.partok
+    korzetek = alap.korzetek
+    kozepertek = orszagos_eredmenyek_tombje(orszagos_eredmenyek, parties)[0]
+
+    if isinstance(regionalis_szoras, dict):
+        szorasok = {normalize_party_name(k): v for k, v in regionalis_szoras.items()}
+        regionalis_szoras = np.array([szorasok.get(p, 0.0) for p in parties], dtype=float)
+    megyek = [megye(k) for k in korzetek]
+    megye_index = np.array([list(dict.fromkeys(megyek)).index(m) for m in megyek])
+
+    blokkok = [blokk_meret] * (n_huzas // blokk_meret)
+    if n_huzas % blokk_meret:
+        blokkok.append(n_huzas % blokk_meret)
+    magok = np.random.SeedSequence(mag).spawn(len(blokkok))
+    feladatok = [
+        (seed, n, kozepertek, hibamodell, reszvetel_szazalek, reszvetel_szoras,
+         regionalis_szoras, megye_index, kulhoni_szavazatok, fix_mandatumok,
+         taktikai_atszavazas, taktikai_atszavazas_megye, taktikai_atszavazas_korzet,
+         listas_modszer, kuszob, kozos_listak)
+        for seed, n in zip(magok, blokkok)
+    ]
+
+    munkasok = munkasok or os.cpu_count() or 1
+    if munkasok == 1 or len(feladatok) == 1:
+        _munkas_inditas(alap)
+        reszeredmenyek = list(map(_szimulacio_blokk, feladatok))
+    else:
+        with ProcessPoolExecutor(max_workers=munkasok, initializer=_munkas_inditas, initargs=(alap,)) as pool:
+            reszeredmenyek = list(pool.map(_szimulacio_blokk, feladatok))
+
+    hisztogram = sum(r[0] for r in reszeredmenyek)
+    gyozelmek = sum(r[1] for r in reszeredmenyek)
+
+    # Összesítés
+    mandatumok = np.arange(OSSZES_MANDATUM + 1)
+    valoszinuseg = hisztogram / n_huzas
+    kumulalt = valoszinuseg.cumsum(axis=1)
+    osszesito = pd.DataFrame({
+        "Párt": parties,
+        "Várható mandátum": valoszinuseg @ mandatumok,
+        "Medián": [int(np.searchsorted(k, 0.5)) for k in kumulalt],
+        "5%": [int(np.searchsorted(k, 0.05)) for k in kumulalt],
+        "95%": [int(np.searchsorted(k, 0.95)) for k in kumulalt],
+        "Többség valószínűsége": valoszinuseg[:, TOBBSEG:].sum(axis=1),
+        "Kétharmad valószínűsége": valoszinuseg[:, KETHARMAD:].sum(axis=1),
+    })
+    hisztogram_df = pd.DataFrame(hisztogram.T, index=pd.Index(mandatumok, name="Mandátum"), columns=parties)
+    korzeti_df = pd.DataFrame(gyozelmek / n_huzas, columns=parties)
+    korzeti_df.insert(0, "Körzet", korzetek)
+
+    return {
+        "osszesito": osszesito,
+        "hisztogram": hisztogram_df,
+        "korzeti_gyozelem": korzeti_df,
+    }
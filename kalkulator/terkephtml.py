@@ -0,0 +1,501 @@
+import argparse
+import base64
+import hashlib
+import html
+import json
+import os
+import re
+import unicodedata
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from meres import stopper
+from terkepkalkulator import (
+    DISPLAY_NAMES, FOLYTONOS_SZINEK, PART_COLORS, SzinSkala, hex_szinek, interpolate_color, korzet_to_svg_id,
+    kulonbseg_tartomanyok, terkep_szinezese,
+)
+from terkepsablon import TOMOR_TIZEDESJEGYEK, TOMOR_TURES, terkep_sablon
+
+# Interaktív HTML-térkép külön adatrétegekkel.
+#
+# Az oldal (index.html) a körzethatárokat egyszer, beágyazott SVG-ként tartalmazza; a forgatókönyvek
+# eredményei külön, kicsi adatrétegekben (retegek/<fájlnév>.json) vannak, amelyeket a böngésző tölt le és
+# amelyekkel csak a körzetek kitöltését és a jelmagyarázatot cseréli. A retegek.json jegyzék sorolja fel
+# a rétegeket; egy már közzétett oldalhoz az adatretegek_mentese újabb rétegeket ad, az oldal újratöltéskor
+# látja őket. beagyazott=True esetén a rétegek az oldalba kerülnek, így az fájlként (file://) is működik.
+#
+# Egy réteg: a színek palettája és körzetenként egy paletta-index, a győztes, az előny és a pártok %-ai
+# (a mandatum_kalkulacio_eredmeny.csv oszlopai), oszlop szerinti színezésnél az oszlop értékei, valamint
+# a jelmagyarázat. A tömbök base64 kódolt, little-endian típusos tömbök a térkép körzeteinek sorrendjében;
+# a színeket a Python oldal számolja, így azonosak a terkep_svg színeivel.
+
+# Az adatréteg formátumának verziója
+RETEG_VERZIO = 1
+
+# A paletta-index és a győztes értéke azoknál a körzeteknél, amelyekről a rétegben nincs adat
+NINCS_SZIN = 0xFFFF
+NINCS_GYOZTES = 0xFF
+
+# A térkép körzetsorrendjének azonosítója; az adatréteg csak azonos azonosítójú oldalon használható
+def geometria_azonosito(sablon):
+    return hashlib.sha256("\n".join(sablon.korzet_idk).encode("utf-8")).hexdigest()[:16]
+
+def _tomb(ertekek, dtype):
+    tomb = np.ascontiguousarray(ertekek, dtype=np.dtype(dtype).newbyteorder("<"))
+    return base64.b64encode(tomb.tobytes()).decode("ascii")
+
+# Jelmagyarázat-elemek: felirat, a sáv színei, a sáv alatti három érték és a feliratok színe
+def _part_jelmagyarazat(korzet_df, shade_threshold):
+    kulonbseg_minmax = kulonbseg_tartomanyok(korzet_df)
+    egyeni = korzet_df["Győztes"].value_counts().to_dict()
+    elemek = []
+    for party, (c_light, c_dark) in PART_COLORS.items():
+        min_val, max_val = kulonbseg_minmax[party]
+        if max_val <= 0:
+            continue
+        t_min = min_val / shade_threshold if shade_threshold > 0 else 0.0
+        t_max = min(max_val / shade_threshold, 1.0) if shade_threshold > 0 else 0.0
+        elemek.append({
+            "cim": f"{DISPLAY_NAMES.get(party, party)} ({egyeni.get(party, 0)})",
+            "szinek": [interpolate_color(c_light, c_dark, t_min), interpolate_color(c_light, c_dark, t_max)],
+            "ertekek": [min_val, (min_val + max_val) / 2, max_val],
+            "szin": interpolate_color(c_light, c_dark, 0.8),
+            "egyseg": "%",
+        })
+    return elemek
+
+def _skala_jelmagyarazat(skala, cim):
+    return [{
+        "cim": str(cim or skala.cim or ""),
+        "szinek": list(hex_szinek(skala.szinek)),
+        "ertekek": [skala.vmin, (skala.vmin + skala.vmax) / 2, skala.vmax],
+        "szin": "#333333",
+        "egyseg": "",
+    }]
+
+# Egy forgatókönyv adatrétege (JSON-ba írható dict) a sablon körzetsorrendjében. A színezés a
+# terkep_svg-é (a korzet_df "Különbség" oszlopa ugyanúgy frissül); több sor ugyanarra a körzetre:
+# az utolsó marad.
+def adatreteg(sablon, korzet_df, nev=None, shade_threshold=30, oszlop=None, skala=None):
+    ora = stopper("terkep_html")
+    ora("szinezes")
+    if oszlop is not None and skala is None and oszlop in korzet_df.columns:
+        skala = SzinSkala.oszlophoz(korzet_df, oszlop, FOLYTONOS_SZINEK)
+    szinek, _ = terkep_szinezese(korzet_df, shade_threshold, oszlop, skala)
+    if oszlop is None:
+        jelmagyarazat = _part_jelmagyarazat(korzet_df, shade_threshold)
+    else:
+        jelmagyarazat = _skala_jelmagyarazat(skala, oszlop)
+
+    ora("kodolas")
+    helyek = {}
+    for sor, korzet in enumerate(korzet_df["Körzet"]):
+        i = sablon.index.get(korzet_to_svg_id(korzet))
+        if i is not None:
+            helyek[i] = sor
+    n = len(sablon.korzet_idk)
+    hely = np.fromiter(helyek.keys(), dtype=int, count=len(helyek))
+    sor = np.fromiter(helyek.values(), dtype=int, count=len(helyek))
+
+    paletta, szin_index = np.unique(np.asarray(szinek, dtype=str)[sor], return_inverse=True)
+    szin = np.full(n, NINCS_SZIN, dtype=np.uint16)
+    szin[hely] = szin_index
+
+    partok = [party for party in PART_COLORS if party in korzet_df.columns]
+    reteg = {
+        "verzio": RETEG_VERZIO,
+        "geometria": geometria_azonosito(sablon),
+        "nev": nev,
+        "partok": [DISPLAY_NAMES.get(party, party) for party in partok],
+        "szinek": paletta.tolist(),
+        "szin": _tomb(szin, np.uint16),
+        "jelmagyarazat": jelmagyarazat,
+    }
+
+    def korzetenkent(ertekek):
+        tomb = np.full((n,) + ertekek.shape[1:], np.nan, dtype=np.float32)
+        tomb[hely] = ertekek[sor]
+        return _tomb(tomb, np.float32)
+
+    if partok:
+        reteg["szazalek"] = korzetenkent(korzet_df[partok].to_numpy(dtype=float))
+    if "Győztes" in korzet_df.columns:
+        gyoztes_index = korzet_df["Győztes"].map({party: j for j, party in enumerate(partok)})
+        gyoztes = np.full(n, NINCS_GYOZTES, dtype=np.uint8)
+        gyoztes[hely] = gyoztes_index.fillna(NINCS_GYOZTES).to_numpy(dtype=np.uint8)[sor]
+        reteg["gyoztes"] = _tomb(gyoztes, np.uint8)
+    if "Különbség" in korzet_df.columns:
+        reteg["kulonbseg"] = korzetenkent(korzet_df["Különbség"].to_numpy(dtype=float))
+    if oszlop is not None:
+        reteg["oszlop"] = str(oszlop)
+        reteg["ertek"] = korzetenkent(korzet_df[oszlop].to_numpy(dtype=float))
+    ora.vege()
+    return reteg
+
+# {név: korzet_df vagy CSV-útvonal} vagy (név, ...) párok -> (név, korzet_df) lista; a CSV a
+# mandatum_kalkulacio_eredmeny.csv formátumú
+def _forgatokonyvek(forgatokonyvek):
+    tetelek = list(forgatokonyvek.items()) if isinstance(forgatokonyvek, dict) else list(forgatokonyvek)
+    eredmeny = []
+    for nev, korzet_df in tetelek:
+        if isinstance(korzet_df, (str, os.PathLike)):
+            korzet_df = pd.read_csv(korzet_df, sep=";", encoding="utf-8-sig")
+        eredmeny.append((str(nev), korzet_df))
+    nevek = [nev for nev, _ in eredmeny]
+    if len(set(nevek)) != len(nevek):
+        raise ValueError("A forgatókönyvek nevei nem egyediek")
+    return eredmeny
+
+def _sablon(svg_path, tomor):
+    if tomor:
+        return terkep_sablon(svg_path, tizedesjegyek=TOMOR_TIZEDESJEGYEK, tures=TOMOR_TURES)
+    return terkep_sablon(svg_path)
+
+def _iras(utvonal, szoveg):
+    os.makedirs(os.path.dirname(utvonal) or ".", exist_ok=True)
+    ideiglenes = f"{utvonal}.{os.getpid()}.tmp"
+    with open(ideiglenes, "w", encoding="utf-8") as f:
+        f.write(szoveg)
+    os.replace(ideiglenes, utvonal)
+
+# Egy réteg fájlneve a forgatókönyv nevéből: ékezet nélküli betűk és számjegyek, a többi karakter helyén
+# kötőjel, és a név kivonata, így a név bármilyen (pl. ":" vagy "?" jelet tartalmazó) lehet, és két név
+# akkor sem ütközik, ha ugyanarra a betűsorra egyszerűsödik. A név csak a jegyzékben jelenik meg.
+def _reteg_fajlnev(nev):
+    ascii_nev = unicodedata.normalize("NFKD", nev).encode("ascii", "ignore").decode("ascii")
+    alap = re.sub(r"[^A-Za-z0-9]+", "-", ascii_nev).strip("-")[:40].rstrip("-")
+    kivonat = hashlib.sha256(nev.encode("utf-8")).hexdigest()[:10]
+    return f"{alap}-{kivonat}" if alap else kivonat
+
+# Adatrétegek kiírása (kimeneti_konyvtar/retegek/<fájlnév>.json, lásd _reteg_fajlnev) és a jegyzék
+# (retegek.json) frissítése. A forgatókönyvek neve nem tartalmazhat útvonal-elválasztót ("/" vagy "\\").
+# A jegyzék meglévő bejegyzései megmaradnak, azonos névnél az új réteg lép a régi helyére; ha a jegyzék
+# más körzetsorrendű térképhez készült, újrakezdődik. A jegyzékben a fájlnév a tartalom kivonatával
+# bővül, így a böngésző gyorsítótára nem ad régi réteget. Visszaadja a kiírt rétegek útvonalát.
+def adatretegek_mentese(
+    svg_path,
+    forgatokonyvek,
+    kimeneti_konyvtar="terkep_html",
+    shade_threshold=30,
+    oszlop=None,
+    skala=None,
+    tomor: bool = True
+):
+    sablon = _sablon(svg_path, tomor)
+    geometria = geometria_azonosito(sablon)
+    jegyzek_path = os.path.join(kimeneti_konyvtar, "retegek.json")
+    bejegyzesek = {}
+    if os.path.exists(jegyzek_path):
+        try:
+            with open(jegyzek_path, "r", encoding="utf-8") as f:
+                jegyzek = json.load(f)
+            if jegyzek.get("verzio") == RETEG_VERZIO and jegyzek.get("geometria") == geometria:
+                bejegyzesek = {b["nev"]: b for b in jegyzek["retegek"]}
+            else:
+                print(f"Figyelmeztetés: a jegyzék más térképhez készült, újrakezdve: {jegyzek_path}")
+        except (OSError, ValueError, KeyError, TypeError):
+            print(f"Figyelmeztetés: sérült jegyzék, újrakezdve: {jegyzek_path}")
+
+    forgatokonyvek = _forgatokonyvek(forgatokonyvek)
+    for nev, _ in forgatokonyvek:
+        if "/" in nev or "\\" in nev:
+            raise ValueError(f"A forgatókönyv neve nem tartalmazhat '/' vagy '\\' jelet: {nev!r}")
+
+    utvonalak = []
+    for nev, korzet_df in forgatokonyvek:
+        szoveg = json.dumps(adatreteg(sablon, korzet_df, nev, shade_threshold, oszlop, skala),
+                            ensure_ascii=False, separators=(",", ":"))
+        fajlnev = f"{_reteg_fajlnev(nev)}.json"
+        relativ = f"retegek/{fajlnev}"
+        utvonal = os.path.join(kimeneti_konyvtar, "retegek", fajlnev)
+        _iras(utvonal, szoveg)
+        kivonat = hashlib.sha256(szoveg.encode("utf-8")).hexdigest()[:12]
+        bejegyzesek[nev] = {"nev": nev, "fajl": f"{quote(relativ)}?v={kivonat}"}
+        utvonalak.append(utvonal)
+
+    _iras(jegyzek_path, json.dumps({"verzio": RETEG_VERZIO, "geometria": geometria,
+                                    "retegek": list(bejegyzesek.values())}, ensure_ascii=False, indent=1))
+    return utvonalak
+
+# Az oldal SVG-je: a sablon körzetei "k" osztállyal és eredeti kitöltéssel, a budapesti kiemelés
+# <use> hivatkozásokkal, hogy a kitöltés átállítása a kiemelésben is látsszon
+def _oldal_svg(sablon, bp_zoom_enabled):
+    reszek = [sablon.eleje[sablon.eleje.index("<svg"):]]
+    for darab, stilus in zip(sablon.darabok, sablon.eredeti_stilusok):
+        reszek.append(darab)
+        reszek.append(' class="k"' + stilus)
+    reszek.append(sablon.darabok[-1])
+    if bp_zoom_enabled:
+        reszek.append(str(sablon.budapest_hivatkozasok(BeautifulSoup("<svg/>", "xml"))))
+    reszek.append(sablon.vege)
+    return "".join(reszek)
+
+# JSON egy <script> elembe ágyazva ("</" nem zárhatja le az elemet)
+def _json_script(elem_id, adat):
+    szoveg = json.dumps(adat, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return f'<script type="application/json" id="{elem_id}">{szoveg}</script>'
+
+# Interaktív HTML-térkép: kimeneti_konyvtar/index.html, és beagyazott=False esetén a forgatókönyvek
+# adatrétegei és a jegyzék (lásd adatretegek_mentese). forgatokonyvek: {név: korzet_df vagy CSV-útvonal}
+# vagy (név, ...) párok; üresen is megadható, ha a rétegek később készülnek. A választó az első
+# forgatókönyvvel indul, az oldal címének "#név" része egy adott forgatókönyvet nyit meg.
+# tomor=True (alapból): kvantált, egyszerűsített körvonalak, lásd terkepsablon.TOMOR_TIZEDESJEGYEK.
+def terkep_html(
+    svg_path,
+    forgatokonyvek=(),
+    kimeneti_konyvtar="terkep_html",
+    shade_threshold=30,
+    bp_zoom_enabled=True,
+    oszlop=None,
+    skala=None,
+    tomor: bool = True,
+    beagyazott: bool = False,
+    cim="Választási térkép"
+):
+    sablon = _sablon(svg_path, tomor)
+    tetelek = _forgatokonyvek(forgatokonyvek)
+    nevek = {}
+    for _, korzet_df in tetelek:
+        nevek.update({korzet_to_svg_id(korzet): korzet for korzet in korzet_df["Körzet"]})
+
+    adatok = {
+        "geometria": geometria_azonosito(sablon),
+        "korzetek": sablon.korzet_idk,
+        "nevek": {korzet_id: nevek[korzet_id] for korzet_id in sablon.korzet_idk if korzet_id in nevek},
+        "jegyzek": "retegek.json",
+        "retegek": None,
+    }
+    if beagyazott:
+        adatok["retegek"] = {nev: adatreteg(sablon, korzet_df, nev, shade_threshold, oszlop, skala)
+                             for nev, korzet_df in tetelek}
+    else:
+        adatretegek_mentese(sablon, tetelek, kimeneti_konyvtar, shade_threshold, oszlop, skala)
+
+    ora = stopper("terkep_html")
+    ora("iras")
+    oldal = (
+        _OLDAL
+        .replace("@@cim@@", html.escape(cim))
+        .replace("@@svg@@", _oldal_svg(sablon, bp_zoom_enabled))
+        .replace("@@adatok@@", _json_script("terkep-adatok", adatok))
+        .replace("@@program@@", _PROGRAM)
+    )
+    output_path = os.path.join(kimeneti_konyvtar, "index.html")
+    _iras(output_path, oldal)
+    ora.vege()
+
+    print(f">> HTML térkép elmentve: {output_path}")
+    return output_path
+
+_OLDAL = """<!DOCTYPE html>
+<html lang="hu">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>@@cim@@</title>
+<style>
+body { margin: 0; font-family: sans-serif; color: #222; }
+header { display: flex; gap: 1em; align-items: center; padding: .5em 1em; }
+h1 { font-size: 1.2em; margin: 0; }
+#allapot { color: #a00; }
+#jelmagyarazat { display: flex; flex-wrap: wrap; gap: .5em 2em; padding: 0 1em; }
+.elem { width: 260px; font-weight: bold; font-size: 13px; }
+.sav { height: 18px; }
+.ertekek { display: flex; justify-content: space-between; }
+#terkep svg { display: block; width: 100%; height: auto; stroke-width: 0.1; }
+#terkep .k { stroke: #000; }
+#terkep path.k:hover { stroke: #fff; }
+#tipp { position: fixed; pointer-events: none; background: #fff; border: 1px solid #888; padding: .3em .5em;
+        font-size: 13px; white-space: pre; }
+</style>
+</head>
+<body>
+<header>
+<h1>@@cim@@</h1>
+<select id="forgatokonyv" aria-label="Forgatókönyv"></select>
+<span id="allapot"></span>
+</header>
+<div id="jelmagyarazat"></div>
+<div id="terkep">
+@@svg@@
+</div>
+<div id="tipp" hidden></div>
+@@adatok@@
+<script>
+@@program@@
+</script>
+</body>
+</html>
+"""
+
+_PROGRAM = r"""(function () {
+  "use strict";
+  var adatok = JSON.parse(document.getElementById("terkep-adatok").textContent);
+  var pathok = adatok.korzetek.map(function (id) { return document.getElementById(id); });
+  var eredeti = pathok.map(function (p) { return p ? p.style.fill : ""; });
+  var sorszam = {};
+  adatok.korzetek.forEach(function (id, i) { sorszam[id] = i; });
+  var valaszto = document.getElementById("forgatokonyv");
+  var allapot = document.getElementById("allapot");
+  var tipp = document.getElementById("tipp");
+  var fajlok = {};
+  var retegek = {};
+  var aktiv = null;
+
+  // base64 -> típusos tömb (a Python little-endian tömböket ír, mint a böngészők natív sorrendje)
+  function tomb(szoveg, Tipus) {
+    var binaris = atob(szoveg), bajtok = new Uint8Array(binaris.length);
+    for (var i = 0; i < binaris.length; i++) bajtok[i] = binaris.charCodeAt(i);
+    return new Tipus(bajtok.buffer);
+  }
+
+  function dekodolas(r) {
+    if (r.geometria !== adatok.geometria) throw new Error("Az adatréteg más térképhez készült: " + r.nev);
+    return {
+      partok: r.partok, szinek: r.szinek, jelmagyarazat: r.jelmagyarazat, oszlop: r.oszlop,
+      szin: tomb(r.szin, Uint16Array),
+      gyoztes: r.gyoztes ? tomb(r.gyoztes, Uint8Array) : null,
+      kulonbseg: r.kulonbseg ? tomb(r.kulonbseg, Float32Array) : null,
+      szazalek: r.szazalek ? tomb(r.szazalek, Float32Array) : null,
+      ertek: r.ertek ? tomb(r.ertek, Float32Array) : null
+    };
+  }
+
+  function betoltes(nev) {
+    if (!retegek[nev]) {
+      retegek[nev] = adatok.retegek
+        ? Promise.resolve(adatok.retegek[nev]).then(dekodolas)
+        : fetch(fajlok[nev]).then(function (v) {
+            if (!v.ok) throw new Error(v.status + " " + fajlok[nev]);
+            return v.json();
+          }).then(dekodolas);
+      retegek[nev].catch(function () { delete retegek[nev]; });
+    }
+    return retegek[nev];
+  }
+
+  function szam(ertek, egyseg) { return ertek.toFixed(2) + (egyseg || ""); }
+
+  function jelmagyarazat(elemek) {
+    var doboz = document.getElementById("jelmagyarazat");
+    doboz.textContent = "";
+    elemek.forEach(function (e) {
+      var elem = document.createElement("div"), sav = document.createElement("div");
+      var ertekek = document.createElement("div"), felirat = document.createElement("div");
+      elem.className = "elem";
+      elem.style.color = e.szin;
+      felirat.textContent = e.cim;
+      sav.className = "sav";
+      sav.style.background = "linear-gradient(to right, " + e.szinek.join(", ") + ")";
+      ertekek.className = "ertekek";
+      e.ertekek.forEach(function (v) {
+        var s = document.createElement("span");
+        s.textContent = szam(v, e.egyseg);
+        ertekek.appendChild(s);
+      });
+      elem.appendChild(felirat);
+      elem.appendChild(sav);
+      elem.appendChild(ertekek);
+      doboz.appendChild(elem);
+    });
+  }
+
+  function alkalmazas(r) {
+    aktiv = r;
+    for (var i = 0; i < pathok.length; i++) {
+      if (pathok[i]) pathok[i].style.fill = r.szin[i] === 0xFFFF ? eredeti[i] : r.szinek[r.szin[i]];
+    }
+    jelmagyarazat(r.jelmagyarazat);
+  }
+
+  function hiba(e) { allapot.textContent = "Hiba: " + e.message; }
+
+  function valtas(nev) {
+    allapot.textContent = "Betöltés…";
+    history.replaceState(null, "", "#" + encodeURIComponent(nev));
+    betoltes(nev).then(function (r) {
+      if (valaszto.value !== nev) return;
+      alkalmazas(r);
+      allapot.textContent = "";
+    }, hiba);
+  }
+
+  function indulas(lista) {
+    lista.forEach(function (b) {
+      var opcio = document.createElement("option");
+      opcio.value = opcio.textContent = b.nev;
+      fajlok[b.nev] = b.fajl;
+      valaszto.appendChild(opcio);
+    });
+    if (!lista.length) { allapot.textContent = "Nincs adatréteg."; return; }
+    var kert = decodeURIComponent(location.hash.slice(1));
+    valaszto.value = kert in fajlok ? kert : lista[0].nev;
+    valtas(valaszto.value);
+  }
+
+  valaszto.addEventListener("change", function () { valtas(valaszto.value); });
+
+  document.getElementById("terkep").addEventListener("mousemove", function (e) {
+    var cel = e.target;
+    var id = (cel.getAttribute("href") || cel.getAttribute("xlink:href") || cel.id || "").replace(/^#/, "");
+    var i = sorszam[id];
+    if (i === undefined || !aktiv || aktiv.szin[i] === 0xFFFF) { tipp.hidden = true; return; }
+    var sorok = [adatok.nevek[id] || id];
+    if (aktiv.gyoztes && aktiv.gyoztes[i] !== 0xFF) {
+      var gyoztes = "Győztes: " + aktiv.partok[aktiv.gyoztes[i]];
+      if (aktiv.kulonbseg && !isNaN(aktiv.kulonbseg[i])) gyoztes += " (+" + szam(aktiv.kulonbseg[i], "%") + ")";
+      sorok.push(gyoztes);
+    }
+    if (aktiv.ertek) sorok.push(aktiv.oszlop + ": " + szam(aktiv.ertek[i]));
+    if (aktiv.szazalek) {
+      var n = aktiv.partok.length;
+      aktiv.partok.forEach(function (p, j) {
+        var v = aktiv.szazalek[i * n + j];
+        if (v > 0) sorok.push(p + ": " + szam(v, "%"));
+      });
+    }
+    tipp.textContent = sorok.join("\n");
+    tipp.style.left = (e.clientX + 12) + "px";
+    tipp.style.top = (e.clientY + 12) + "px";
+    tipp.hidden = false;
+  });
+  document.getElementById("terkep").addEventListener("mouseleave", function () { tipp.hidden = true; });
+
+  if (adatok.retegek) {
+    indulas(Object.keys(adatok.retegek).map(function (nev) { return { nev: nev }; }));
+  } else {
+    fetch(adatok.jegyzek, { cache: "no-cache" }).then(function (v) {
+      if (!v.ok) throw new Error(v.status + " " + adatok.jegyzek);
+      return v.json();
+    }).then(function (j) {
+      if (j.geometria !== adatok.geometria) throw new Error("A jegyzék más térképhez készült");
+      indulas(j.retegek);
+    }).catch(hiba);
+  }
+})();"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interaktív HTML-térkép forgatókönyvenkénti adatrétegekkel")
+    parser.add_argument("csv", nargs="*", help="mandatum_kalkulacio_eredmeny.csv formátumú körzeti táblázat(ok); "
+                                               "a forgatókönyv neve a fájlnév")
+    parser.add_argument("--svg", default="2026_korzetek_alap.svg")
+    parser.add_argument("--kimenet", default="terkep_html", help="kimeneti könyvtár")
+    parser.add_argument("--shade-threshold", type=float, default=30)
+    parser.add_argument("--oszlop", default=None, help="színezés egy oszlop értékei szerint")
+    parser.add_argument("--csak-retegek", action="store_true",
+                        help="csak az adatrétegek és a jegyzék frissítése egy meglévő oldalhoz")
+    parser.add_argument("--beagyazott", action="store_true", help="a rétegek az oldalba kerülnek (file:// is működik)")
+    parser.add_argument("--teljes", action="store_true", help="teljes pontosságú körvonalak a tömör helyett")
+    args = parser.parse_args()
+
+    forgatokonyvek = [(os.path.splitext(os.path.basename(csv))[0], csv) for csv in args.csv]
+    if args.csak_retegek:
+        kesz = adatretegek_mentese(args.svg, forgatokonyvek, args.kimenet, args.shade_threshold, args.oszlop,
+                                   tomor=not args.teljes)
+        print(f">> {len(kesz)} adatréteg elmentve: {args.kimenet}")
+    else:
+        terkep_html(args.svg, forgatokonyvek, args.kimenet, args.shade_threshold, oszlop=args.oszlop,
+                    tomor=not args.teljes, beagyazott=args.beagyazott)
@@ -1,9 +1,11 @@
 import pandas as pd
-from bs4 import BeautifulSoup
 import unidecode
 import numpy as np
 from datetime import date
 import os
+from functools import lru_cache
+
+from meres import stopper
 
 PART_COLORS = {
     "Fidesz": ((255, 206, 173), (142, 59, 0)),
@@ -27,6 +29,10 @@ DISPLAY_NAMES = {
 
 GREY = "#F5F5F5"
 
+# Alapértelmezett folytonos skála (világostól sötétkékig) oszlop szerinti színezéshez
+FOLYTONOS_SZINEK = ((247, 251, 255), (107, 174, 214), (8, 48, 107))
+
+@lru_cache(maxsize=None)
 def korzet_to_svg_id(korzetnev):
     s = unidecode.unidecode(korzetnev.lower()).replace("–", "-").replace(" ", "-")
     helyettesites = {
@@ -54,6 +60,16 @@ def interpolate_color(c1, c2, t):
     b = int(c1[2] + (c2[2] - c1[2]) * t)
     return f"#{r:02x}{g:02x}{b:02x}"
 
+# Hexadecimális színkódok (n × 3) egész rgb tömbből
+_HEX = np.array([f"{i:02x}" for i in range(256)])
+
+def hex_szinek(rgb):
+    rgb = np.asarray(rgb, dtype=int)
+    if len(rgb) == 0:
+        return np.array([], dtype=object)
+    kod = np.char.add(np.char.add(np.char.add("#", _HEX[rgb[:, 0]]), _HEX[rgb[:, 1]]), _HEX[rgb[:, 2]])
+    return kod.astype(object)
+
 # Árnyalat kiválasztása a szín alapján
 def szin_kulonbseg_alapjan(row, shade_threshold):
     gyoztes = row["Győztes"]
@@ -64,6 +80,62 @@ def szin_kulonbseg_alapjan(row, shade_threshold):
         return interpolate_color(light, dark, t)
     return GREY
 
+# Körzetenkénti színek egyszerre: a győztes párt világos-sötét skáláján az előny / shade_threshold
+# arányában (1-nél telít), ismeretlen győztesnél szürke. Ugyanazt adja, mint soronként a
+# szin_kulonbseg_alapjan, de pártonként egy tömbművelettel.
+def korzeti_szinek(korzet_df, shade_threshold):
+    gyoztes = korzet_df["Győztes"].to_numpy()
+    kulonbseg = np.abs(korzet_df["Különbség"].to_numpy(dtype=float))
+    if shade_threshold > 0:
+        t = np.minimum(kulonbseg / shade_threshold, 1.0)
+    else:
+        t = np.zeros(len(korzet_df))
+
+    szinek = np.full(len(korzet_df), GREY, dtype=object)
+    for party, (light, dark) in PART_COLORS.items():
+        maszk = gyoztes == party
+        if maszk.any():
+            light, dark = np.array(light), np.array(dark)
+            szinek[maszk] = hex_szinek(light + (dark - light) * t[maszk, None])
+    return szinek
+
+# Folytonos színskála tetszőleges körzeti értékhez (részvétel, pártarány, billenési valószínűség, ...).
+# szinek: a skála rgb pontjai egyenletes közökkel vmin és vmax között; a színek egyszer, "lepesek"
+# fokozatú táblázatba számolódnak, értékenként csak egy indexelés marad. A tartományon kívüli értékek
+# a szélső színt kapják, a hiányzók szürkét. cim: a jelmagyarázat felirata.
+class SzinSkala:
+    def __init__(self, szinek, vmin, vmax, lepesek=256, cim=None):
+        if len(szinek) < 2:
+            raise ValueError("A színskálához legalább két szín kell")
+        if not vmax > vmin:
+            raise ValueError(f"Érvénytelen skálatartomány: {vmin} - {vmax}")
+        self.szinek = [tuple(int(c) for c in szin) for szin in szinek]
+        self.vmin = float(vmin)
+        self.vmax = float(vmax)
+        self.cim = cim
+
+        pontok = np.linspace(0.0, 1.0, len(self.szinek))
+        t = np.linspace(0.0, 1.0, lepesek)
+        rgb = np.column_stack([np.interp(t, pontok, [szin[c] for szin in self.szinek]) for c in range(3)])
+        self.tablazat = hex_szinek(np.round(rgb))
+
+    # Színskála egy körzeti oszlop tényleges tartományára (vmin/vmax felülírható)
+    @classmethod
+    def oszlophoz(cls, korzet_df, oszlop, szinek, vmin=None, vmax=None, lepesek=256):
+        ertekek = korzet_df[oszlop].astype(float)
+        vmin = ertekek.min() if vmin is None else vmin
+        vmax = ertekek.max() if vmax is None else vmax
+        if not vmax > vmin:
+            vmax = vmin + 1.0
+        return cls(szinek, vmin, vmax, lepesek, cim=oszlop)
+
+    def __call__(self, ertekek):
+        ertekek = np.asarray(ertekek, dtype=float)
+        lepesek = len(self.tablazat)
+        t = (ertekek - self.vmin) / (self.vmax - self.vmin)
+        index = np.clip(np.nan_to_num(t) * (lepesek - 1) + 0.5, 0, lepesek - 1).astype(int)
+        return np.where(np.isnan(ertekek), GREY, self.tablazat[index])
+
 # Szöveg kiírása
 def jelmagyarazat(soup, kulonbseg_minmax, shade_threshold, korzet_df):
     defs = soup.new_tag("defs")
@@ -142,9 +214,48 @@ def jelmagyarazat(soup, kulonbseg_minmax, shade_threshold, korzet_df):
 
     soup.svg.append(group)
 
-# Ha akarsz, bp-i körzeteket nagyobbra rakjuk
-def nagyits_budapestet(soup):
-    budapest_ids = [f"budapest-{i:02}" for i in range(1, 17)]
+# Jelmagyarázat egy folytonos színskálához: színátmenetes sáv, alatta a két szélső és a középső érték
+def skala_jelmagyarazat(soup, skala, cim=None):
+    defs = soup.new_tag("defs")
+    grad = soup.new_tag("linearGradient", id="grad_skala", x1="0%", y1="0%", x2="100%", y2="0%")
+    for i, szin in enumerate(skala.szinek):
+        offset = f"{100 * i / (len(skala.szinek) - 1):g}%"
+        grad.append(soup.new_tag("stop", offset=offset, **{"stop-color": hex_szinek([szin])[0]}))
+    defs.append(grad)
+    soup.svg.insert(0, defs)
+
+    group = soup.new_tag("g", id="legend", transform="translate(50, 30)")
+    box_width, box_height = 260, 30
+    group.append(soup.new_tag("rect", x="0", y="0", width=str(box_width), height=str(box_height), fill="url(#grad_skala)"))
+    for pos, val in zip([0, box_width / 2, box_width], [skala.vmin, (skala.vmin + skala.vmax) / 2, skala.vmax]):
+        label = soup.new_tag("text", x=str(pos), y=str(box_height + 18), fill="#333333",
+                             **{"font-size": "16", "text-anchor": "middle", "font-weight": "bold"})
+        label.string = f"{val:.2f}"
+        group.append(label)
+
+    cim = cim or skala.cim
+    if cim:
+        text = soup.new_tag("text", x=str(box_width + 12), y=str(box_height - 3), fill="#333333",
+                            **{"font-size": "18", "font-weight": "bold"})
+        text.string = str(cim)
+        group.append(text)
+    soup.svg.append(group)
+
+BUDAPEST_IDS = [f"budapest-{i:02}" for i in range(1, 17)]
+
+# Egy budapesti körzet nagyított másolata (új path elem) az eredeti körvonalából és stílusából
+def nagyitott_path(soup, korzet_id, d, style):
+    transform, stroke_width = budapest_nagyitas()
+
+    new_path = soup.new_tag("path", d=d)
+    new_path["id"] = korzet_id + "-zoom"
+    szin = style.split(";")[0]
+    new_path["style"] = f"{szin}; stroke: #000; stroke-width: {stroke_width};"
+    new_path["transform"] = transform
+    return new_path
+
+# A budapesti kiemelés helye (transform az eredeti körzeti koordinátákból) és körvonalvastagsága
+def budapest_nagyitas():
     scale = 5.5
     translate_x = 1000
     translate_y = 750
@@ -152,25 +263,63 @@ def nagyits_budapestet(soup):
     pivot_x = 244.1
     pivot_y = 172.8
     stroke_width = 0.05
+    transform = f"translate({translate_x},{translate_y}) scale({scale}) rotate({rotate_deg}) translate({-pivot_x},{-pivot_y})"
+    return transform, stroke_width
 
-    for korzet_id in budapest_ids:
+# Ha akarsz, bp-i körzeteket nagyobbra rakjuk
+def nagyits_budapestet(soup):
+    for korzet_id in BUDAPEST_IDS:
         path = soup.find("path", {"id": korzet_id})
         if path:
-            new_path = soup.new_tag("path", d=path["d"])
-            new_path["id"] = korzet_id + "-zoom"
-            szin = path.get("style", "").split(";")[0]
-            new_path["style"] = f"{szin}; stroke: #000; stroke-width: {stroke_width};"
-            new_path["transform"] = (
-                f"translate({translate_x},{translate_y}) scale({scale}) rotate({rotate_deg}) translate({-pivot_x},{-pivot_y})"
-            )
-            soup.svg.append(new_path)
-
-def terkep_svg(svg_path, korzet_df, shade_threshold=30, bp_zoom_enabled=True):
-    today = date.today().isoformat()
-    os.makedirs("terkep", exist_ok=True)
-    suffix = "_teljes_bp" if bp_zoom_enabled else "_teljes"
-    output_path = f"terkep/{today}{suffix}.svg"
+            soup.svg.append(nagyitott_path(soup, korzet_id, path["d"], path.get("style", "")))
+
+# Alapból a terkep/{mai dátum}{utótag}.svg fájlba ír; output_path megadásával tetszőleges helyre.
+# oszlop (és skala) megadásával a körzetek a győztes helyett az oszlop értékei szerint színeződnek.
+# tomor=True: webre szánt, kvantált és egyszerűsített körvonalú térkép (lásd terkepsablon.TOMOR_*).
+# hivatkozasos=True: színek CSS-osztályokkal, a budapesti kiemelés <use> hivatkozásokkal (lásd TerkepSablon.rendereles).
+# gyorsitotar: gyorsitotar.Gyorsitotar; azonos bemenetre (és változatlan SVG-re) a tárolt térképet írja ki.
+# Sok térképhez lásd terkepsablon.terkep_svg_tomeges.
+def terkep_svg(svg_path, korzet_df, shade_threshold=30, bp_zoom_enabled=True, output_path=None, oszlop=None, skala=None,
+               tomor=False, hivatkozasos=False, gyorsitotar=None):
+    if output_path is None:
+        today = date.today().isoformat()
+        suffix = "_teljes_bp" if bp_zoom_enabled else "_teljes"
+        output_path = f"terkep/{today}{suffix}.svg"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    # Az SVG-t csak egyszer elemezzük és nagyítjuk: a sablon folyamaton belül és lemezen is gyorsítótárazott
+    from terkepsablon import TOMOR_TIZEDESJEGYEK, TOMOR_TURES, terkep_sablon
+    if tomor:
+        sablon = terkep_sablon(svg_path, tizedesjegyek=TOMOR_TIZEDESJEGYEK, tures=TOMOR_TURES)
+    else:
+        sablon = terkep_sablon(svg_path)
 
+    if bp_zoom_enabled:
+        print(">> Budapest nagyítása bekapcsolva.")
+    else:
+        print(">> Budapest nagyítása kikapcsolva.")
+
+    if gyorsitotar is None:
+        svg = sablon.rendereles(korzet_df, shade_threshold, bp_zoom_enabled, oszlop, skala, hivatkozasos)
+    else:
+        # Találatkor a korzet_df "Különbség" oszlopa nem számolódik újra
+        from gyorsitotar import bemenet_kulcs
+        kulcs = bemenet_kulcs("terkep_svg", sablon.forras_hash, sablon.egyszerusites, korzet_df, shade_threshold,
+                              bp_zoom_enabled, oszlop, skala, hivatkozasos)
+        svg = gyorsitotar.szamitas(kulcs, lambda: sablon.rendereles(
+            korzet_df, shade_threshold, bp_zoom_enabled, oszlop, skala, hivatkozasos))
+
+    ora = stopper("terkep_svg")
+    ora("iras")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    ora.vege()
+
+    print(f">> SVG fájl elmentve: {output_path}")
+
+# A körzeti táblázat ellenőrzése és a győztes előnyének (Különbség) újraszámolása a pártok %-aiból;
+# visszaadja a győztes pártonkénti (legkisebb, legnagyobb) előnyét a jelmagyarázathoz
+def kulonbsegek_elokeszitese(korzet_df):
     if "Különbség" not in korzet_df.columns:
         korzet_df["Különbség"] = 0.0
     else:
@@ -178,16 +327,48 @@ def terkep_svg(svg_path, korzet_df, shade_threshold=30, bp_zoom_enabled=True):
     required_columns = ["Körzet", "Győztes"] + list(PART_COLORS.keys())
     if not all(col in korzet_df.columns for col in required_columns):
         raise ValueError(f"A korzet_df-nek tartalmaznia kell a következő oszlopokat: {required_columns}")
-    
-    for i, row in korzet_df.iterrows():
-        gy = row["Győztes"]
-        if gy in PART_COLORS:
-            max_ellenfel = max([row[p] for p in PART_COLORS if p != gy])
-            korzet_df.at[i, "Különbség"] = row[gy] - max_ellenfel
-
-    with open(svg_path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "xml")
 
+    # A győztes %-a mínusz a legjobb ellenfélé, soronkénti ciklus nélkül
+    partok = list(PART_COLORS)
+    ertekek = korzet_df[partok].to_numpy(dtype=float)
+    gyoztes = korzet_df["Győztes"].map({p: j for j, p in enumerate(partok)})
+    ismert = gyoztes.notna().to_numpy()
+    if ismert.any():
+        sorok = ertekek[ismert]
+        oszlopok = gyoztes[ismert].to_numpy(dtype=int)
+        n = np.arange(len(sorok))
+        gyoztes_szazalek = sorok[n, oszlopok]
+        sorok[n, oszlopok] = -np.inf
+        kulonbseg = korzet_df["Különbség"].to_numpy(dtype=float, copy=True)
+        kulonbseg[ismert] = gyoztes_szazalek - sorok.max(axis=1)
+        korzet_df["Különbség"] = kulonbseg
+    return kulonbseg_tartomanyok(korzet_df)
+
+# A győztes pártonkénti (legkisebb, legnagyobb) előnye egy már előkészített körzeti táblázatban
+def kulonbseg_tartomanyok(korzet_df):
+    kulonbseg_minmax = {}
+    for party in PART_COLORS:
+        part_vals = korzet_df[korzet_df["Győztes"] == party]["Különbség"].abs()
+        kulonbseg_minmax[party] = (safe_min(part_vals), safe_max(part_vals))
+    return kulonbseg_minmax
+
+# Körzeti színek és a hozzájuk illő jelmagyarázatot rajzoló függvény (soup -> None).
+# oszlop nélkül a győztes és az előny szerint; oszloppal az oszlop értékei szerint egy folytonos skálán
+# (alapból FOLYTONOS_SZINEK az oszlop tartományára feszítve), ekkor a pártoszlopok nem kellenek.
+def terkep_szinezese(korzet_df, shade_threshold=30, oszlop=None, skala=None):
+    if oszlop is None:
+        kulonbseg_minmax = kulonbsegek_elokeszitese(korzet_df)
+        szinek = korzeti_szinek(korzet_df, shade_threshold)
+        return szinek, lambda soup: jelmagyarazat(soup, kulonbseg_minmax, shade_threshold, korzet_df)
+
+    if "Körzet" not in korzet_df.columns or oszlop not in korzet_df.columns:
+        raise ValueError(f"A korzet_df-nek tartalmaznia kell a következő oszlopokat: {['Körzet', oszlop]}")
+    if skala is None:
+        skala = SzinSkala.oszlophoz(korzet_df, oszlop, FOLYTONOS_SZINEK)
+    return skala(korzet_df[oszlop]), lambda soup: skala_jelmagyarazat(soup, skala, oszlop)
+
+# Az alaptérkép kétszeres nagyítása (viewBox, körvonalak, szövegek) helyben
+def terkep_meretezese(soup):
     svg_tag = soup.find("svg")
     viewbox = svg_tag.get("viewBox")
     if viewbox:
@@ -209,27 +390,29 @@ def terkep_svg(svg_path, korzet_df, shade_threshold=30, bp_zoom_enabled=True):
             text["x"] = str(float(text["x"]) * 2)
         if "y" in text.attrs:
             text["y"] = str(float(text["y"]) * 2)
-    kulonbseg_minmax = {}
-    for party in PART_COLORS:
-        part_vals = korzet_df[korzet_df["Győztes"] == party]["Különbség"].abs()
-        kulonbseg_minmax[party] = (safe_min(part_vals), safe_max(part_vals))
 
-    for _, row in korzet_df.iterrows():
-        korzet_id = korzet_to_svg_id(row["Körzet"])
-        path = soup.find("path", {"id": korzet_id})
+# A térkép elkészítése egy már beolvasott (és ezzel módosuló) SVG-fából, fájlműveletek nélkül.
+# Sok térképhez ugyanarról az alapról a terkepsablon.TerkepSablon gyorsabb.
+def terkep_svg_renderelese(soup, korzet_df, shade_threshold=30, bp_zoom_enabled=True, oszlop=None, skala=None):
+    ora = stopper("terkep_svg")
+    ora("meretezes")
+    terkep_meretezese(soup)
+
+    ora("szinezes")
+    szinek, jelmagyarazat_rajzolasa = terkep_szinezese(korzet_df, shade_threshold, oszlop, skala)
+    for korzet, szin in zip(korzet_df["Körzet"], szinek):
+        path = soup.find("path", {"id": korzet_to_svg_id(korzet)})
         if path:
-            szin = szin_kulonbseg_alapjan(row, shade_threshold)
             path["style"] = f"fill: {szin}; stroke: #000; stroke-width: 0.1;"
 
+    ora("nagyitas")
     if bp_zoom_enabled:
-        print(">> Budapest nagyítása bekapcsolva.")
         nagyits_budapestet(soup)
-    else:
-        print(">> Budapest nagyítása kikapcsolva.")
 
-    jelmagyarazat(soup, kulonbseg_minmax, shade_threshold, korzet_df)
+    ora("jelmagyarazat")
+    jelmagyarazat_rajzolasa(soup)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(str(soup))
-
-    print(f">> SVG fájl elmentve: {output_path}")
+    ora("szerializalas")
+    svg = str(soup)
+    ora.vege()
+    return svg
@@ -0,0 +1,311 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from alapmodell import fajl_hash
+from geometria import egyszerusitett_utvonalak
+from meres import stopper
+from terkepkalkulator import (
+    BUDAPEST_IDS, budapest_nagyitas, korzet_to_svg_id, nagyitott_path, terkep_meretezese, terkep_szinezese,
+)
+
+# A gyorsítótár formátumának verziója; változáskor a régi sablonfájlok érvénytelenek
+SABLON_VERZIO = 1
+
+# Tömör (webes) kimenet alapbeállítása: két tizedesjegyre kvantált koordináták, 0.05 egységnyi tűrésű
+# egyszerűsítés (a kétszeres nagyítás után 0.1 px, a budapesti kiemelésben kb. 0.5 px)
+TOMOR_TIZEDESJEGYEK = 2
+TOMOR_TURES = 0.05
+
+# Jelölő a körzeti path-ok stílusattribútumának helyén a sablon szövegében
+_JELOLO = "@@korzet-stilus-{}@@"
+
+# Előre lefordított térképsablon: az alap SVG egyszer beolvasva, kétszeresére nagyítva és szövegként
+# szétvágva a körzeti path-ok stílusattribútumainál. Rajzoláskor nincs XML-elemzés és fakeresés,
+# csak a körzetek stílusa, a budapesti nagyítás és a jelmagyarázat kerül a darabok közé.
+# A kimenet bájtra azonos a terkep_svg_renderelese kimenetével.
+#
+# eleje: a szöveg a gyökér <svg> nyitótagjáig (a jelmagyarazat <defs> eleme ide kerül),
+# darabok: a gyökér tartalma a stílusattribútumoknál feldarabolva (len(korzet_idk) + 1 darab),
+# vege: a záró </svg> és ami utána jön,
+# korzet_idk: a stílushelyek path-azonosítói, eredeti_stilusok: az ott eredetileg álló attribútumszöveg,
+# budapest: a budapesti körzetek azonosítója -> (körvonal, eredeti stílus) a nagyításhoz,
+# egyszerusites: None (teljes pontosság) vagy (tizedesjegyek, tűrés), lásd geometria.egyszerusitett_utvonalak.
+class TerkepSablon:
+    def __init__(self, eleje, darabok, vege, korzet_idk, eredeti_stilusok, budapest, forras_hash=None,
+                 egyszerusites=None):
+        self.eleje = eleje
+        self.darabok = list(darabok)
+        self.vege = vege
+        self.korzet_idk = list(korzet_idk)
+        self.eredeti_stilusok = list(eredeti_stilusok)
+        self.budapest = {k: tuple(v) for k, v in budapest.items()}
+        self.forras_hash = forras_hash
+        self.egyszerusites = tuple(egyszerusites) if egyszerusites is not None else None
+        self.index = {korzet_id: i for i, korzet_id in enumerate(self.korzet_idk)}
+
+    @classmethod
+    def svg_bol(cls, svg_path, tizedesjegyek=None, tures=0.0):
+        ora = stopper("terkep_sablon")
+        ora("elemzes")
+        with open(svg_path, "r", encoding="utf-8") as f:
+            soup = BeautifulSoup(f.read(), "xml")
+
+        ora("meretezes")
+        terkep_meretezese(soup)
+
+        egyszerusites = None
+        if tizedesjegyek is not None:
+            # A körzeti path-ok körvonalai kvantálva, a közös határok mentén egyformán egyszerűsítve
+            ora("egyszerusites")
+            egyszerusites = (tizedesjegyek, tures)
+            korzet_pathok = [path for path in soup.find_all("path") if path.get("id") and path.get("d")]
+            uj_d = egyszerusitett_utvonalak([path["d"] for path in korzet_pathok], tizedesjegyek, tures)
+            for path, d in zip(korzet_pathok, uj_d):
+                if d is not None:
+                    path["d"] = d
+
+        ora("indexeles")
+        # Azonosítónként az első path számít, ahogy a soup.find is az elsőt adja
+        korzet_idk, eredeti_stilusok, budapest = [], [], {}
+        latott = set()
+        for path in soup.find_all("path"):
+            korzet_id = path.get("id")
+            if korzet_id is None or korzet_id in latott:
+                continue
+            latott.add(korzet_id)
+            if korzet_id in BUDAPEST_IDS:
+                budapest[korzet_id] = (path["d"], path.get("style", ""))
+            eredeti_stilusok.append(_attributum_szoveg(soup, "style", path["style"]) if "style" in path.attrs else "")
+            path["style"] = _JELOLO.format(len(korzet_idk))
+            korzet_idk.append(korzet_id)
+
+        ora("szerializalas")
+        kezdo, zaro = "@@sablon-eleje@@", "@@sablon-vege@@"
+        soup.svg.insert(0, kezdo)
+        soup.svg.append(zaro)
+        szoveg = str(soup)
+        eleje, maradek = szoveg.split(kezdo)
+        tartalom, vege = maradek.split(zaro)
+
+        darabok = []
+        for i in range(len(korzet_idk)):
+            elotte, tartalom = tartalom.split(f' style="{_JELOLO.format(i)}"')
+            darabok.append(elotte)
+        darabok.append(tartalom)
+        ora.vege()
+        return cls(eleje, darabok, vege, korzet_idk, eredeti_stilusok, budapest, forras_hash=fajl_hash(svg_path),
+                   egyszerusites=egyszerusites)
+
+    def mentes(self, cache_path):
+        # Először ideiglenes fájlba írunk, hogy párhuzamos olvasó ne lásson félkész gyorsítótárat
+        ideiglenes = f"{cache_path}.{os.getpid()}.tmp"
+        with open(ideiglenes, "w", encoding="utf-8") as f:
+            json.dump({
+                "verzio": SABLON_VERZIO,
+                "forras_hash": self.forras_hash,
+                "egyszerusites": self.egyszerusites,
+                "eleje": self.eleje,
+                "darabok": self.darabok,
+                "vege": self.vege,
+                "korzet_idk": self.korzet_idk,
+                "eredeti_stilusok": self.eredeti_stilusok,
+                "budapest": self.budapest,
+            }, f, ensure_ascii=False)
+        os.replace(ideiglenes, cache_path)
+
+    # Betöltés a gyorsítótárból, ha az a forrásfájl jelenlegi tartalmához készült; különben újrafordítás és mentés
+    @classmethod
+    def betoltes(cls, svg_path, cache_path=None, tizedesjegyek=None, tures=0.0):
+        cache_path = cache_path or terkep_sablon_gyorsitotar_utvonal(svg_path, tizedesjegyek, tures)
+        forras_hash = fajl_hash(svg_path)
+        egyszerusites = [tizedesjegyek, tures] if tizedesjegyek is not None else None
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    adat = json.load(f)
+                ervenyes = (
+                    adat["verzio"] == SABLON_VERZIO and adat["forras_hash"] == forras_hash
+                    and adat["egyszerusites"] == egyszerusites
+                )
+                if ervenyes:
+                    return cls(adat["eleje"], adat["darabok"], adat["vege"], adat["korzet_idk"],
+                               adat["eredeti_stilusok"], adat["budapest"], forras_hash=forras_hash,
+                               egyszerusites=adat["egyszerusites"])
+            except (OSError, ValueError, KeyError):
+                print(f"Figyelmeztetés: sérült térképsablon-gyorsítótár, újrafordítás: {cache_path}")
+
+        sablon = cls.svg_bol(svg_path, tizedesjegyek, tures)
+        try:
+            sablon.mentes(cache_path)
+        except OSError as e:
+            print(f"Figyelmeztetés: a térképsablon-gyorsítótár nem menthető ({cache_path}): {e}")
+        return sablon
+
+    # Térkép egy körzeti táblázatból (a korzet_df "Különbség" oszlopa frissül, mint a terkep_svg_renderelese-ben);
+    # oszlop/skala: lásd terkepkalkulator.terkep_szinezese.
+    #
+    # hivatkozasos=True esetén a körzetek stílus helyett CSS-osztályt kapnak (színenként egy szabály egy
+    # <style> blokkban), a budapesti kiemelés pedig <use> hivatkozás az eredeti path-okra egy közös
+    # transzformációjú csoportban, így a méret a különböző színek számával nő, nem a körzetek és a körvonalak
+    # hosszával. A klónok nem öröklik az eredeti szülők stílusát, ezért a körvonalvastagság sem a path-on áll:
+    # a térképen a gyökér <svg>-től, a kiemelésben a csoporttól öröklődik.
+    def rendereles(self, korzet_df, shade_threshold=30, bp_zoom_enabled=True, oszlop=None, skala=None,
+                   hivatkozasos=False):
+        ora = stopper("terkep_svg")
+        ora("szinezes")
+        szinek, jelmagyarazat_rajzolasa = terkep_szinezese(korzet_df, shade_threshold, oszlop, skala)
+        # Stílushely indexe -> szín; több sor ugyanarra a körzetre: az utolsó marad
+        helyek = {}
+        for korzet, szin in zip(korzet_df["Körzet"], szinek):
+            i = self.index.get(korzet_to_svg_id(korzet))
+            if i is not None:
+                helyek[i] = szin
+
+        if hivatkozasos:
+            osztalyok = {}
+            for szin in helyek.values():
+                osztalyok.setdefault(szin, f"c{len(osztalyok)}")
+            attributumok = {i: f' class="k {osztalyok[szin]}"' for i, szin in helyek.items()}
+            stilus_blokk = (
+                '<style type="text/css">svg{stroke-width:0.1}.k{stroke:#000}'
+                + "".join(f".{osztaly}{{fill:{szin}}}" for szin, osztaly in osztalyok.items())
+                + "</style>"
+            )
+        else:
+            attributumok = {i: f' style="fill: {szin}; stroke: #000; stroke-width: 0.1;"' for i, szin in helyek.items()}
+            stilus_blokk = ""
+
+        # A nagyított körzetek és a jelmagyarázat egy kis segédfában készülnek, onnan szerializáljuk őket
+        ora("nagyitas")
+        segedfa = BeautifulSoup("<svg/>", "xml")
+        if bp_zoom_enabled and hivatkozasos:
+            segedfa.svg.append(self.budapest_hivatkozasok(segedfa))
+        elif bp_zoom_enabled:
+            for korzet_id in BUDAPEST_IDS:
+                if korzet_id in self.budapest:
+                    d, style = self.budapest[korzet_id]
+                    i = self.index[korzet_id]
+                    if i in helyek:
+                        style = f"fill: {helyek[i]}; stroke: #000; stroke-width: 0.1;"
+                    segedfa.svg.append(nagyitott_path(segedfa, korzet_id, d, style))
+
+        ora("jelmagyarazat")
+        jelmagyarazat_rajzolasa(segedfa)
+        defs, *hozzafuzott = segedfa.svg.contents
+
+        ora("szerializalas")
+        reszek = [self.eleje, stilus_blokk, str(defs)]
+        for i, eredeti in enumerate(self.eredeti_stilusok):
+            reszek.append(self.darabok[i])
+            reszek.append(attributumok.get(i, eredeti))
+        reszek.append(self.darabok[-1])
+        reszek.extend(str(elem) for elem in hozzafuzott)
+        reszek.append(self.vege)
+        svg = "".join(reszek)
+        ora.vege()
+        return svg
+
+    # A budapesti kiemelés <use> hivatkozásokkal a térkép körzeteire, egy közös transzformációjú csoportban.
+    # A hivatkozott path saját transzformációja (a sablon kétszeres nagyítása) is érvényesül, ezt a csoport
+    # a végén visszaszorozza.
+    def budapest_hivatkozasok(self, soup):
+        transform, stroke_width = budapest_nagyitas()
+        csoport = soup.new_tag("g", id="budapest-zoom", transform=f"{transform} scale(0.5)",
+                               style=f"stroke: #000; stroke-width: {stroke_width};")
+        for korzet_id in BUDAPEST_IDS:
+            if korzet_id in self.budapest:
+                csoport.append(soup.new_tag("use", attrs={"href": f"#{korzet_id}", "xlink:href": f"#{korzet_id}"}))
+        return csoport
+
+# Egy attribútum szerializált alakja (" nev=\"ertek\"") a BeautifulSoup XML-kimenete szerint
+def _attributum_szoveg(soup, nev, ertek):
+    tag = soup.new_tag("x")
+    tag[nev] = ertek
+    return str(tag)[len("<x"):-len("/>")]
+
+def terkep_sablon_gyorsitotar_utvonal(svg_path, tizedesjegyek=None, tures=0.0):
+    alap = os.path.splitext(svg_path)[0]
+    if tizedesjegyek is None:
+        return alap + ".sablon.json"
+    return f"{alap}.sablon-{tizedesjegyek}-{tures:g}.json"
+
+# Folyamaton belüli memória: (abszolút útvonal, tizedesjegyek, tűrés) -> ((módosítási idő, méret, gyorsítótár), TerkepSablon)
+_betoltott = {}
+
+# Térképsablon egy SVG-hez: folyamaton belül csak akkor tölt újra, ha a fájl megváltozott.
+# tizedesjegyek megadásával tömör sablon (kvantált, "tures" szerint egyszerűsített körvonalak).
+# Ha már TerkepSablon-t kap, azt adja vissza.
+def terkep_sablon(svg_path, cache_path=None, tizedesjegyek=None, tures=0.0):
+    if isinstance(svg_path, TerkepSablon):
+        return svg_path
+    allapot = os.stat(svg_path)
+    utvonal = (os.path.abspath(svg_path), tizedesjegyek, tures if tizedesjegyek is not None else 0.0)
+    kulcs = (allapot.st_mtime_ns, allapot.st_size, cache_path)
+    if utvonal not in _betoltott or _betoltott[utvonal][0] != kulcs:
+        _betoltott[utvonal] = (kulcs, TerkepSablon.betoltes(svg_path, cache_path, tizedesjegyek, tures))
+    return _betoltott[utvonal][1]
+
+# A munkafolyamatonként egyszer átvett térképsablon
+_sablon = None
+
+def _munkas_inditas(sablon):
+    global _sablon
+    _sablon = sablon
+
+def _terkep_feladat(feladat):
+    output_path, korzet_df, shade_threshold, bp_zoom_enabled, oszlop, skala, hivatkozasos = feladat
+    svg = _sablon.rendereles(korzet_df, shade_threshold, bp_zoom_enabled, oszlop, skala, hivatkozasos)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    return output_path
+
+# Sok térkép egy menetben (pl. Monte Carlo kvantilisek, napi nowcast, kutatóintézetenkénti eredmények).
+# terkepek: {név: korzet_df} vagy (név, korzet_df) párok; a név a kimeneti fájl útvonala
+# a kimeneti_konyvtar-hoz képest (".svg" kiterjesztés nélkül is megadható).
+# A sablon egyszer készül el, és munkafolyamatonként egyszer kerül át; a munkafolyamatok maguk írják
+# a fájlokat, így a kész SVG-k nem utaznak vissza. Visszaadja a kiírt fájlok útvonalát a bemenet sorrendjében.
+# Oszlop szerinti színezésnél közös skala megadásával a térképek színei összevethetők.
+# tomor=True: kvantált, egyszerűsített körvonalak (lásd TOMOR_TIZEDESJEGYEK, TOMOR_TURES);
+# hivatkozasos=True: CSS-osztályok és <use> kiemelés (lásd TerkepSablon.rendereles).
+def terkep_svg_tomeges(
+    svg_path,
+    terkepek,
+    shade_threshold=30,
+    bp_zoom_enabled=True,
+    kimeneti_konyvtar="terkep",
+    munkasok: int = None,
+    oszlop=None,
+    skala=None,
+    tomor: bool = False,
+    hivatkozasos: bool = False
+):
+    if tomor:
+        sablon = terkep_sablon(svg_path, tizedesjegyek=TOMOR_TIZEDESJEGYEK, tures=TOMOR_TURES)
+    else:
+        sablon = terkep_sablon(svg_path)
+    tetelek = list(terkepek.items()) if isinstance(terkepek, dict) else list(terkepek)
+
+    feladatok = []
+    for nev, korzet_df in tetelek:
+        nev = str(nev)
+        output_path = os.path.join(kimeneti_konyvtar, nev if nev.endswith(".svg") else f"{nev}.svg")
+        feladatok.append((output_path, korzet_df, shade_threshold, bp_zoom_enabled, oszlop, skala, hivatkozasos))
+    utvonalak = [f[0] for f in feladatok]
+    if len(set(utvonalak)) != len(utvonalak):
+        raise ValueError("A térképek nevei nem egyediek, a kimeneti fájlok felülírnák egymást")
+    for konyvtar in {os.path.dirname(u) for u in utvonalak}:
+        os.makedirs(konyvtar or ".", exist_ok=True)
+
+    munkasok = min(munkasok or os.cpu_count() or 1, len(feladatok))
+    if munkasok <= 1:
+        _munkas_inditas(sablon)
+        kesz = list(map(_terkep_feladat, feladatok))
+    else:
+        with ProcessPoolExecutor(max_workers=munkasok, initializer=_munkas_inditas, initargs=(sablon,)) as pool:
+            kesz = list(pool.map(_terkep_feladat, feladatok, chunksize=max(1, len(feladatok) // (munkasok * 4))))
+
+    print(f">> {len(kesz)} SVG fájl elmentve: {kimeneti_konyvtar}")
+    return kesz
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loess_motor import ablak_meret, helyi_illesztes, simito_matrix
+
+# Bootstrap konfidenciasávok LOESS trendekhez.
+#
+# A helyi illesztés lineáris y-ban, ezért egy újramintázott sorozat illesztése a sávrács pontjaiban
+# L @ y*, ahol az L simítómátrix csak az x-ektől függ: csoportonként (azonos x-ű szakaszok) egyszer készül,
+# és minden minta, minden párt ugyanazt használja. A maradékok bootstrapjánál y* = ŷ + e*, így a minták
+# illesztésének eltérése a (ŷ-ra alkalmazott) simítástól éppen L @ e*; a sáv a pontos görbe körül ennek
+# az eltérésnek a kvantiliseiből áll. A mintákat blokkonként egy mátrixszorzás számolja, a blokkok
+# munkafolyamatok között oszlanak el.
+#
+# blokk_hossz = 1: független maradék-bootstrap; nagyobb értéknél mozgó blokkos bootstrap az időrendben vett
+# maradékokon (a kutatóintézeti hatások és a közeli kutatások összefüggése miatt szélesebb, reálisabb sáv).
+# A minták magjai (párt, szakasz) szerint a "mag"-ból származnak (SeedSequence), rögzített méretű
+# mintablokkokban, így az eredmény bitre azonos bármennyi munkással és bármilyen pártösszeállítással.
+
+# Egy munkafolyamat egyszerre ennyi mintát számol (a mag-felosztás is ehhez igazodik)
+MINTA_BLOKK = 250
+
+# Egyszerre ennyi sávrácspont sora szorzódik (a nem nulla oszlopok tartományával)
+SOR_BLOKK = 32
+
+# A munkafolyamatonként egyszer átvett csoportok: [(L, oszlop_tartomanyok, maradekok)]
+_csoportok = None
+
+def _munkas_inditas(csoportok):
+    global _csoportok
+    _csoportok = csoportok
+
+# A simítómátrix soronkénti nem nulla oszloptartománya, SOR_BLOKK soronként összevonva
+def oszlop_tartomanyok(L):
+    nem_nulla = L != 0
+    n = L.shape[1]
+    elso = np.where(nem_nulla.any(axis=1), nem_nulla.argmax(axis=1), n)
+    utolso = np.where(nem_nulla.any(axis=1), n - nem_nulla[:, ::-1].argmax(axis=1), 0)
+    return [(int(elso[i:i + SOR_BLOKK].min()), int(utolso[i:i + SOR_BLOKK].max()))
+            for i in range(0, len(L), SOR_BLOKK)]
+
+# Újramintázott maradékok: (n, db) alakú, független vagy mozgó blokkos húzással
+def maradek_mintak(maradekok, db, blokk_hossz, rng):
+    n = len(maradekok)
+    blokk_hossz = min(max(int(blokk_hossz), 1), n)
+    if blokk_hossz == 1:
+        return maradekok[rng.integers(0, n, (n, db))]
+    blokkok = -(-n // blokk_hossz)
+    kezdetek = rng.integers(0, n - blokk_hossz + 1, (blokkok, 1, db))
+    index = (kezdetek + np.arange(blokk_hossz)[None, :, None]).reshape(blokkok * blokk_hossz, db)[:n]
+    return maradekok[index]
+
+def _minta_blokk(feladat):
+    csoport, oszlop, mag, db, blokk_hossz = feladat
+    L, tartomanyok, maradekok = _csoportok[csoport]
+    E = maradek_mintak(maradekok[:, oszlop], db, blokk_hossz, np.random.default_rng(mag))
+    eredmeny = np.empty((len(L), db))
+    for i, (elso, utolso) in enumerate(tartomanyok):
+        sorok = slice(i * SOR_BLOKK, (i + 1) * SOR_BLOKK)
+        eredmeny[sorok] = L[sorok, elso:utolso] @ E[elso:utolso]
+    return eredmeny
+
+# Bootstrap sávok több csoportra egy menetben.
+# csoportok: [(x, Y, span, fok, magok)], Y (n, c) alakú, magok: oszloponként egy SeedSequence-entrópia
+# (int vagy int-lista). Csoportonként visszaadja a sávrácsot (sav_pontok pont x min és max között) és a
+# pontos illesztéshez képesti alsó és felső eltérést, (sav_pontok, c) alakban.
+def bootstrap_savok(
+    csoportok,
+    szint: float = 0.9,
+    mintak: int = 1000,
+    blokk_hossz: int = 1,
+    sav_pontok: int = 200,
+    munkasok: int = None
+):
+    if not 0 < szint < 1:
+        raise ValueError(f"A sáv szintje 0 és 1 közé kell essen: {szint}")
+    if mintak < 1:
+        raise ValueError(f"A bootstrap minták száma legalább 1 kell legyen: {mintak}")
+
+    atadott, feladatok, racsok = [], [], []
+    for g, (x, Y, span, fok, magok) in enumerate(csoportok):
+        x, Y = np.asarray(x, dtype=float), np.asarray(Y, dtype=float).reshape(len(x), -1)
+        sorrend = np.argsort(x, kind="stable")
+        xs, ys = x[sorrend], Y[sorrend]
+        k = ablak_meret(len(xs), span, fok)
+        # A mintapontokbeli illesztés csak a különböző x-ekben (egy napon több kutatás is lehet)
+        egyedi, visszaallitas = np.unique(xs, return_inverse=True)
+        maradekok = ys - helyi_illesztes(xs, ys, egyedi, k, fok)[visszaallitas]
+        maradekok -= [m.mean() for m in maradekok.T]
+        racs = np.linspace(xs.min(), xs.max(), sav_pontok)
+        L = simito_matrix(xs, racs, k, fok)
+        atadott.append((L, oszlop_tartomanyok(L), maradekok))
+        racsok.append(racs)
+
+        blokkok = [MINTA_BLOKK] * (mintak // MINTA_BLOKK) + ([mintak % MINTA_BLOKK] if mintak % MINTA_BLOKK else [])
+        for j in range(Y.shape[1]):
+            for seed, db in zip(np.random.SeedSequence(magok[j]).spawn(len(blokkok)), blokkok):
+                feladatok.append((g, j, seed, db, blokk_hossz))
+
+    munkasok = min(munkasok or os.cpu_count() or 1, len(feladatok))
+    if munkasok <= 1:
+        _munkas_inditas(atadott)
+        reszek = list(map(_minta_blokk, feladatok))
+    else:
+        with ProcessPoolExecutor(max_workers=munkasok, initializer=_munkas_inditas, initargs=(atadott,)) as pool:
+            reszek = list(pool.map(_minta_blokk, feladatok))
+
+    also_q, felso_q = (1 - szint) / 2, 1 - (1 - szint) / 2
+    eredmeny = [(racs, np.empty((sav_pontok, a[2].shape[1])), np.empty((sav_pontok, a[2].shape[1])))
+                for racs, a in zip(racsok, atadott)]
+    gyujto = {}
+    for (g, j, *_), resz in zip(feladatok, reszek):
+        gyujto.setdefault((g, j), []).append(resz)
+    for (g, j), darabok in gyujto.items():
+        eltolasok = np.concatenate(darabok, axis=1)
+        eredmeny[g][1][:, j], eredmeny[g][2][:, j] = np.quantile(eltolasok, [also_q, felso_q], axis=1)
+    return eredmeny
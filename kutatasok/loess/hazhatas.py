@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from loess_motor import ablak_meret, osszevont_illesztes
+from trendek import part_beallitasok, part_szakaszok
+
+# Kutatóintézeti (ház-) hatások becslése a LOESS trenddel együtt, pártonként:
+#
+#     y_i = f(t_i) + b_intézet(i) + e_i,
+#
+# ahol f a párt (kizárt időszakok által elvágott szakaszonkénti) LOESS trendje, b az intézet állandó eltolása.
+# Ez részlegesen lineáris modell; a felváltva illesztő backfitting (f = S(y - Db), b = intézetenkénti átlagos
+# maradék) helyett a Speckman-féle becslés zárt alakban, iteráció nélkül: ha S a LOESS simító a mintapontokban
+# és D az intézetek 0/1 mátrixa, b a ‖(I - S)y - (I - S)D b‖ legkisebb négyzetes megoldása, a trend pedig
+# S(y - Db), vagyis a korrigált pontok LOESS-e. (A backfitting fixpontja ettől a nem szimmetrikus S miatt
+# kissé eltér, tipikusan a hatások hibájánál jóval kevésbé.) Ehhez csak S·y és S·D kell,
+# ami egyetlen többoszlopos, napokra összevont illesztés (lásd osszevont_illesztes), és egy intézetszám ×
+# intézetszám méretű rendszer; n × n simítómátrix vagy időrács × intézet tervezőmátrix nem készül, a
+# legnagyobb tömb (n × intézetszám) is csak a szakaszban előforduló intézetek oszlopaival.
+#
+# S az állandót pontosan visszaadja, így a hatások csak egy közös eltolásig meghatározottak: a referencia
+# intézetek (alapból minden becsült intézet) hatásainak átlaga 0. A min_kutatas-nál kevesebb kutatással
+# szereplő és az ismeretlen intézetek nem kapnak hatást (a pontjaik nem módosulnak), de a trendet segítik.
+# Az azonos x-ű és intézetsorrendű szakaszok (ugyanazon kutatások pártjai) egy illesztésben számolódnak.
+
+# Egy párt pontjai intézetkóddal, dátum szerint rendezve
+def _part_pontok(nezet, party):
+    ertek = nezet.ertek(party)
+    van = ~np.isnan(ertek)
+    return pd.DataFrame({"date": nezet.datumok[van], "value": ertek[van], "intezet": nezet.intezet_kod[van]})
+
+# A korrekció a kizárt időszakokat és a pártonkénti LOESS beállításokat úgy kezeli, mint trendek().
+# nezet: kutatási nézet (kutatastar.KutatasNezet) intézetkódokkal; partok: a számolandó pártok.
+# referencia: intézetnevek, amelyek átlagos hatása 0 (None: minden becsült intézet).
+# Visszaadja: (korrigált hosszú táblázat date, party, value, polling_firm oszlopokkal, amely trendek()-nek és
+# a grafikonnak átadható; hatások DataFrame-je százalékpontban, intézetek × pártok, NaN: nem becsült).
+def hazhatas_korrekcio(
+    nezet,
+    partok,
+    loess_szigor: float = 0.25,
+    loess_fok: int = 1,
+    partonkenti_loess: dict = None,
+    kizart_idoszakok: dict = None,
+    min_kutatas: int = 5,
+    referencia: list = None
+):
+    if nezet.intezet_kod is None:
+        raise ValueError("A kutatási adatokban nincs 'polling_firm' oszlop, a házhatás nem becsülhető")
+    intezetek = nezet.intezetek
+    ismeretlen = set(referencia or []) - set(intezetek)
+    if ismeretlen:
+        print(f"Figyelmeztetés: ismeretlen referenciaintézetek: {', '.join(sorted(ismeretlen))}")
+
+    pontok, csoportok = {}, {}
+    for party in partok:
+        pdata, segments = part_szakaszok(_part_pontok(nezet, party), (kizart_idoszakok or {}).get(party))
+        # A kevés kutatással szereplő intézetek kimaradnak a becslésből
+        darab = np.bincount(pdata["intezet"].to_numpy() + 1, minlength=len(intezetek) + 1)[1:]
+        kod = pdata["intezet"].to_numpy()
+        kod = np.where((kod >= 0) & (darab[kod] >= min_kutatas), kod, -1)
+        pontok[party] = (pdata, kod)
+        span, fok, _ = part_beallitasok(party, loess_szigor, loess_fok, None, partonkenti_loess)
+
+        for seg_start, seg_end in segments:
+            sorok = ((pdata["date"] >= seg_start) & (pdata["date"] <= seg_end)).to_numpy()
+            if sorok.sum() < 3:
+                continue
+            x = (pdata["date"][sorok] - seg_start).dt.days.to_numpy(dtype=float)
+            kulcs = (x.tobytes(), kod[sorok].tobytes(), span, fok)
+            if kulcs not in csoportok:
+                csoportok[kulcs] = (x, kod[sorok], [], [])
+            csoportok[kulcs][2].append(pdata["value"].to_numpy()[sorok])
+            csoportok[kulcs][3].append(party)
+
+    # Pártonként a (I - S)D oszlopainak Gram-mátrixa és (I - S)D, (I - S)y szorzata, szakaszonként összegezve
+    normal = {party: (np.zeros((len(intezetek), len(intezetek))), np.zeros(len(intezetek))) for party in pontok}
+    for (_, _, span, fok), (x, kod, ertekek, tagok) in csoportok.items():
+        elofordul, helyi = np.unique(kod[kod >= 0], return_inverse=True)
+        D = np.zeros((len(x), len(elofordul)))
+        D[np.flatnonzero(kod >= 0), helyi] = 1
+        Z = np.column_stack([D] + ertekek)
+        egyedi, visszaallitas = np.unique(x, return_inverse=True)
+        maradek = Z - osszevont_illesztes(x, Z, egyedi, ablak_meret(len(x), span, fok), fok)[visszaallitas]
+        Dt = maradek[:, :len(elofordul)]
+        gram = Dt.T @ Dt
+        for j, party in enumerate(tagok):
+            DtD, Dty = normal[party]
+            DtD[np.ix_(elofordul, elofordul)] += gram
+            Dty[elofordul] += Dt.T @ maradek[:, len(elofordul) + j]
+
+    hatasok = pd.DataFrame(np.nan, index=pd.Index(intezetek, name="polling_firm"), columns=list(pontok))
+    korrigalt = []
+    for party, (pdata, kod) in pontok.items():
+        DtD, Dty = normal[party]
+        becsult = np.flatnonzero(np.isin(np.arange(len(intezetek)), kod[kod >= 0]) & (np.diag(DtD) > 0))
+        if len(becsult):
+            # A közös eltolás rögzítése a referenciaintézetek átlagával (Lagrange-szorzós rendszer)
+            ref = np.array([intezetek[i] in referencia for i in becsult]) if referencia else np.ones(len(becsult), bool)
+            if not ref.any():
+                print(f"Figyelmeztetés: {party}: nincs becsült referenciaintézet, az összes intézet átlaga 0")
+                ref[:] = True
+            m = len(becsult)
+            rendszer = np.zeros((m + 1, m + 1))
+            rendszer[:m, :m] = DtD[np.ix_(becsult, becsult)]
+            rendszer[:m, m] = rendszer[m, :m] = ref / ref.sum()
+            megoldas, *_ = np.linalg.lstsq(rendszer, np.append(Dty[becsult], 0.0), rcond=None)
+            hatasok.iloc[becsult, hatasok.columns.get_loc(party)] = megoldas[:m]
+
+        b = np.append(np.nan_to_num(hatasok[party].to_numpy()), 0.0)
+        korrigalt.append(pd.DataFrame({
+            "date": pdata["date"].to_numpy(),
+            "party": party,
+            "value": pdata["value"].to_numpy() - b[kod],
+            "polling_firm": [intezetek[i] if i >= 0 else None for i in pdata["intezet"]],
+        }))
+
+    if korrigalt:
+        korrigalt = pd.concat(korrigalt, ignore_index=True)
+    else:
+        korrigalt = pd.DataFrame(columns=["date", "party", "value", "polling_firm"])
+    return korrigalt, hatasok.dropna(how="all")
@@ -0,0 +1,188 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Közvélemény-kutatások oszlopos tára: a CSV egyszer beolvasva és típusosan eltárolva (.npz), a forrásfájl
+# kivonatával érvénytelenítve.
+#
+# A sorok nap szerint (stabilan) rendezettek, a dátum egész nap (1970-01-01 óta, int32), a kutatóintézet
+# kategóriakód (int16, -1: hiányzó), a pártok értékei pártonként folytonos float64 sorok (pártok × kutatások).
+# Így egy dátumtartomány és egy párt kiválasztása másolás nélküli szelet; az intézetekre szűrt nézetek
+# sorindexe a tárban gyorsítótárazódik, az értékek pártonként, első használatkor gyűlnek ki.
+# Egy betöltésből így tetszőleges számú grafikonváltozat (pl. intézetcsoportonként) készülhet.
+
+# A gyorsítótár formátumának verziója; változáskor a régi .npz fájlok érvénytelenek
+TAR_VERZIO = 1
+
+# Nem párt oszlopok a kutatási CSV-ben
+NEM_PART_OSZLOPOK = ("polldate", "polling_firm")
+
+def fajl_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for darab in iter(lambda: f.read(1 << 20), b""):
+            h.update(darab)
+    return h.hexdigest()
+
+class KutatasTar:
+    def __init__(self, napok, intezet_kod, intezetek, partok, ertekek, forras_hash=None, elvalaszto=","):
+        self.napok = np.ascontiguousarray(napok, dtype=np.int32)
+        self.intezet_kod = None if intezet_kod is None else np.ascontiguousarray(intezet_kod, dtype=np.int16)
+        self.intezetek = None if intezetek is None else list(intezetek)
+        self.partok = list(partok)
+        self.ertekek = np.ascontiguousarray(ertekek, dtype=float).reshape(len(self.partok), len(self.napok))
+        self.forras_hash = forras_hash
+        self.elvalaszto = elvalaszto
+        self._part_index = {p: j for j, p in enumerate(self.partok)}
+        self._nezetek = {}
+
+    @classmethod
+    def csv_bol(cls, csv_fajl, csv_elvalaszto=","):
+        df = pd.read_csv(csv_fajl, encoding="utf-8", sep=csv_elvalaszto)
+        df.columns = [c.strip() for c in df.columns]
+        napok = pd.to_datetime(df["polldate"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        sorrend = np.argsort(napok, kind="stable")
+        df = df.iloc[sorrend]
+
+        if "polling_firm" in df.columns:
+            firmak = pd.Categorical(df["polling_firm"])
+            intezet_kod, intezetek = firmak.codes, [str(c) for c in firmak.categories]
+        else:
+            intezet_kod, intezetek = None, None
+        partok = [c for c in df.columns if c.lower() not in NEM_PART_OSZLOPOK and not c.startswith("Unnamed")]
+        ertekek = np.array([pd.to_numeric(df[p], errors="coerce").to_numpy(dtype=float) for p in partok])
+        return cls(napok[sorrend], intezet_kod, intezetek, partok, ertekek.reshape(len(partok), len(df)),
+                   forras_hash=fajl_hash(csv_fajl), elvalaszto=csv_elvalaszto)
+
+    def mentes(self, cache_path):
+        # Először ideiglenes fájlba írunk, hogy párhuzamos olvasó ne lásson félkész gyorsítótárat
+        ideiglenes = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            ideiglenes,
+            verzio=np.array(TAR_VERZIO),
+            forras_hash=np.array(self.forras_hash or ""),
+            elvalaszto=np.array(self.elvalaszto),
+            napok=self.napok,
+            intezet_kod=self.intezet_kod if self.intezet_kod is not None else np.empty(0, np.int16),
+            intezetek=np.array(self.intezetek if self.intezetek is not None else [], dtype=str),
+            van_intezet=np.array(self.intezet_kod is not None),
+            partok=np.array(self.partok, dtype=str),
+            ertekek=self.ertekek,
+        )
+        os.replace(ideiglenes, cache_path)
+
+    @classmethod
+    def npz_bol(cls, cache_path):
+        with np.load(cache_path) as npz:
+            van_intezet = bool(npz["van_intezet"])
+            return cls(
+                npz["napok"],
+                npz["intezet_kod"] if van_intezet else None,
+                npz["intezetek"].tolist() if van_intezet else None,
+                npz["partok"].tolist(),
+                npz["ertekek"],
+                forras_hash=str(npz["forras_hash"]) or None,
+                elvalaszto=str(npz["elvalaszto"]),
+            )
+
+    # Betöltés a gyorsítótárból, ha az a forrásfájl jelenlegi tartalmához (és elválasztójához) készült;
+    # különben beolvasás és mentés
+    @classmethod
+    def betoltes(cls, csv_fajl, csv_elvalaszto=",", cache_path=None):
+        cache_path = cache_path or kutatastar_gyorsitotar_utvonal(csv_fajl)
+        forras_hash = fajl_hash(csv_fajl)
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as npz:
+                    ervenyes = (int(npz["verzio"]) == TAR_VERZIO and str(npz["forras_hash"]) == forras_hash
+                                and str(npz["elvalaszto"]) == csv_elvalaszto)
+                if ervenyes:
+                    return cls.npz_bol(cache_path)
+            except (OSError, ValueError, KeyError):
+                print(f"Figyelmeztetés: sérült kutatási gyorsítótár, újraépítés: {cache_path}")
+
+        tar = cls.csv_bol(csv_fajl, csv_elvalaszto)
+        try:
+            tar.mentes(cache_path)
+        except OSError as e:
+            print(f"Figyelmeztetés: a kutatási gyorsítótár nem menthető ({cache_path}): {e}")
+        return tar
+
+    @property
+    def datumok(self):
+        return pd.to_datetime(self.napok.astype("datetime64[D]"))
+
+    # Szűrt nézet: intézetek (None: mind), dátumtartomány (mettol/meddig dátum vagy None), a határok benne vannak.
+    # Ismeretlen intézetnév nem hiba (nincs ilyen sor); intézetre szűrés "polling_firm" oszlop nélkül ValueError.
+    def nezet(self, intezetek=None, mettol=None, meddig=None):
+        kulcs = (None if intezetek is None else frozenset(intezetek), mettol, meddig)
+        if kulcs not in self._nezetek:
+            eleje = 0 if mettol is None else int(np.searchsorted(self.napok, _nap(mettol), side="left"))
+            vege = len(self.napok) if meddig is None else int(np.searchsorted(self.napok, _nap(meddig), side="right"))
+            sorok = slice(eleje, vege)
+            if intezetek is not None:
+                if self.intezet_kod is None:
+                    raise ValueError("A kutatási adatokban nincs 'polling_firm' oszlop, intézetre nem szűrhető")
+                kodok = [j for j, nev in enumerate(self.intezetek) if nev in set(intezetek)]
+                sorok = eleje + np.flatnonzero(np.isin(self.intezet_kod[eleje:vege], kodok))
+            self._nezetek[kulcs] = KutatasNezet(self, sorok)
+        return self._nezetek[kulcs]
+
+def _nap(datum):
+    return int(np.datetime64(pd.Timestamp(datum).normalize().to_datetime64(), "D").astype(np.int64))
+
+# A tár egy szűrt része; dátumtartomány esetén a tömbök a tár szeletei (másolás nélkül),
+# intézetszűrésnél a pártonkénti értékek első kéréskor gyűlnek ki és a nézetben maradnak
+class KutatasNezet:
+    def __init__(self, tar, sorok):
+        self.tar = tar
+        self.sorok = sorok
+        self.napok = tar.napok[sorok]
+        self.intezet_kod = None if tar.intezet_kod is None else tar.intezet_kod[sorok]
+        self._ertekek = {}
+        self._datumok = None
+
+    def __len__(self):
+        return len(self.napok)
+
+    @property
+    def partok(self):
+        return self.tar.partok
+
+    @property
+    def intezetek(self):
+        return self.tar.intezetek
+
+    @property
+    def datumok(self):
+        if self._datumok is None:
+            self._datumok = pd.to_datetime(self.napok.astype("datetime64[D]"))
+        return self._datumok
+
+    def ertek(self, party):
+        if party not in self._ertekek:
+            self._ertekek[party] = self.tar.ertekek[self.tar._part_index[party], self.sorok]
+        return self._ertekek[party]
+
+    # Egy párt nem hiányzó pontjai date/value DataFrame-ként, dátum szerint rendezve
+    def part_adatok(self, party):
+        ertek = self.ertek(party)
+        van = ~np.isnan(ertek)
+        return pd.DataFrame({"date": self.datumok[van], "value": ertek[van]})
+
+def kutatastar_gyorsitotar_utvonal(csv_fajl):
+    return os.path.splitext(csv_fajl)[0] + ".kutatasok.npz"
+
+# Folyamaton belüli memória: abszolút útvonal -> ((módosítási idő, méret, elválasztó, gyorsítótár), KutatasTar)
+_betoltott = {}
+
+# Kutatási tár egy CSV-hez: folyamaton belül csak akkor tölt újra, ha a fájl megváltozott
+def kutatas_tar(csv_fajl, csv_elvalaszto=",", cache_path=None):
+    allapot = os.stat(csv_fajl)
+    utvonal = os.path.abspath(csv_fajl)
+    kulcs = (allapot.st_mtime_ns, allapot.st_size, csv_elvalaszto, cache_path)
+    if utvonal not in _betoltott or _betoltott[utvonal][0] != kulcs:
+        _betoltott[utvonal] = (kulcs, KutatasTar.betoltes(csv_fajl, csv_elvalaszto, cache_path))
+    return _betoltott[utvonal][1]
@@ -8,11 +8,23 @@ import re
 from scipy.interpolate import make_interp_spline
 from statsmodels.nonparametric.smoothers_lowess import lowess
 
+# Rendezett ablakos LOESS (ugyanazt adja, mint a korábbi pontonkénti változat)
+from loess_motor import loess, loess_interpolalt
+from hazhatas import hazhatas_korrekcio
+from kutatastar import kutatas_tar
+from trendek import trendek
+
 warnings.filterwarnings("ignore", category=np.exceptions.RankWarning)
 
+def loess2(x, y, xnew, span, degree=1):
+    fitted = lowess(y, x, frac=span, it=3, delta=0.0, is_sorted=True, return_sorted=True)
+    x_fit, y_fit = fitted[:, 0], fitted[:, 1]
+    return np.interp(xnew, x_fit, y_fit)
+
 def kozvelemeny_grafikon(
     csv_fajl: str = "de.csv",
     csv_elvalaszto: str = ',',
+    adatok=None,  # előre betöltött kutatastar.KutatasTar; megadva a csv_fajl nem kerül beolvasásra
 
     # X és Y tengely meghatározása
     mettol: str = None,
@@ -32,7 +44,21 @@ def kozvelemeny_grafikon(
     loess_szigor: float = 0.25,
     loess_fok: int = 1,
     loess_pontok: int = 300,
+    loess_tures: float = None,  # százalékpont; megadva a sűrű görbe horgonypontos közelítés (loess_interpolalt)
     partonkenti_loess: dict = None,
+    munkasok: int = None,  # a trendszámítás munkafolyamatai (alapból a magok száma)
+
+    # Bootstrap konfidenciasáv a trendek körül (pl. 0.9); None: nincs sáv
+    sav_szint: float = None,
+    sav_mintak: int = 1000,
+    sav_blokk: int = 1,  # 1: független maradék-bootstrap, nagyobb: mozgó blokkos bootstrap ennyi kutatással
+    sav_atlatszosag: float = 0.15,
+    mag: int = 0,
+
+    # Kutatóintézeti hatások kiszűrése: a pontok és a trendek a becsült intézeti eltolással korrigálva
+    hazhatas: bool = False,
+    hazhatas_referencia: list = None,  # ezen intézetek átlagos hatása 0 (None: minden becsült intézeté)
+    hazhatas_min_kutatas: int = 5,
 
     # Loess, pontok beállítása
     pont_meret: float = 20,
@@ -77,167 +103,67 @@ def kozvelemeny_grafikon(
         "axes.axisbelow": True,
     })
 
-    def loess(x, y, xnew, span=0.3, degree=1, robust=True, iterations=2):
-        x, y, xnew = np.asarray(x), np.asarray(y), np.asarray(xnew)
-        n = len(x)
-        if n < degree + 2:
-            return np.full(len(xnew), np.nan)
-
-        k = max(int(span * n), degree + 1)
-
-        def local_fit(xi, y, x, w):
-            X = np.vstack([np.ones_like(x)] + [(x - xi) ** d for d in range(1, degree + 1)])
-            W = np.diag(w)
-            beta, *_ = np.linalg.lstsq(W @ X.T, W @ y, rcond=None)
-            return beta[0]
-
-        yfit = np.zeros_like(y)
-        for i, xi in enumerate(x):
-            dists = np.abs(x - xi)
-            idx = np.argsort(dists)
-            h = dists[idx[k - 1]]
-            u = dists / h if h > 0 else np.zeros_like(dists)
-            w = np.where(u < 1, (1 - u**3)**3, 0)
-            yfit[i] = local_fit(xi, y, x, w)
-
-        if robust:
-            resid = np.abs(y - yfit)
-            s = np.median(resid)
-            if s == 0:
-                s = np.mean(resid) + 1e-6
-            robustness = (1 - (resid / (6 * s))**2) ** 2
-            robustness[resid > 6 * s] = 0
-
-            for _ in range(iterations):
-                yfit = np.zeros_like(y)
-                for i, xi in enumerate(x):
-                    dists = np.abs(x - xi)
-                    idx = np.argsort(dists)
-                    h = dists[idx[k - 1]]
-                    u = dists / h if h > 0 else np.zeros_like(dists)
-                    w = np.where(u < 1, (1 - u**3)**3, 0) * robustness
-                    yfit[i] = local_fit(xi, y, x, w)
-
-        ynew = np.zeros_like(xnew)
-        for i, xi in enumerate(xnew):
-            dists = np.abs(x - xi)
-            idx = np.argsort(dists)
-            h = dists[idx[k - 1]]
-            u = dists / h if h > 0 else np.zeros_like(dists)
-            w = np.where(u < 1, (1 - u**3)**3, 0)
-            ynew[i] = local_fit(xi, y, x, w)
-
-        return ynew
-
-    def loess2(x, y, xnew, span, degree=1):
-        fitted = lowess(y, x, frac=span, it=3, delta=0.0, is_sorted=True, return_sorted=True)
-        x_fit, y_fit = fitted[:, 0], fitted[:, 1]
-        return np.interp(xnew, x_fit, y_fit)
-    
-    # Adatok beolvasása, ellenőrzése
-    df = pd.read_csv(csv_fajl, encoding="utf-8", sep=csv_elvalaszto)
-    all_parties = [c.strip() for c in df.columns if c.strip().lower() != "polldate" and not c.startswith("Unnamed")]
-    df["date"] = pd.to_datetime(df["polldate"])
+    # Adatok: a CSV egyszer beolvasva, típusos gyorsítótárból (lásd kutatastar); több grafikonváltozat
+    # (pl. különböző intézetcsoportok) ugyanabból a betöltésből készül
+    tar = adatok if adatok is not None else kutatas_tar(csv_fajl, csv_elvalaszto)
+    all_parties = tar.partok
 
     # Kutatókra szűrés
-    if szurt_intezmenyek and "polling_firm" in df.columns:
-        eredeti_sorok = len(df)
-        df = df[df["polling_firm"].isin(szurt_intezmenyek)]
+    if szurt_intezmenyek and tar.intezetek is not None:
+        szurt = tar.nezet(szurt_intezmenyek)
         print(f"Csak a következő intézetek maradtak: {', '.join(szurt_intezmenyek)} "
-              f"({len(df)}/{eredeti_sorok} sor)")
-    elif szurt_intezmenyek and "polling_firm" not in df.columns:
-        print("Figyelmeztetés: 'polling_firm' oszlop nem található, "
-              "de 'szurt_intezmenyek' meg van adva → szűrés kihagyva.")
-    
+              f"({len(szurt)}/{len(tar.napok)} sor)")
+    else:
+        if szurt_intezmenyek:
+            print("Figyelmeztetés: 'polling_firm' oszlop nem található, "
+                  "de 'szurt_intezmenyek' meg van adva → szűrés kihagyva.")
+        szurt_intezmenyek = None
+        szurt = tar.nezet()
 
     filtered_dict = {p: c for p, c in partok_es_szinek.items() if p in all_parties}
     if len(filtered_dict) < len(partok_es_szinek):
         missing = set(partok_es_szinek.keys()) - set(filtered_dict.keys())
         print(f"Hiányzik a fájlból: {', '.join(missing)}")
 
-    df = df[["date"] + list(filtered_dict.keys())]
-
-    start_date = pd.to_datetime(mettol) if mettol else df["date"].min()
-    end_date = pd.to_datetime(meddig) if meddig else df["date"].max()
-    df_visible = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+    start_date = pd.to_datetime(mettol) if mettol else szurt.datumok.min()
+    end_date = pd.to_datetime(meddig) if meddig else szurt.datumok.max()
+    lathato = tar.nezet(szurt_intezmenyek, start_date, end_date)
 
     # Ha nincsen az adott intervallumban adat
-    if df_visible.empty:
-        df_visible = df.copy()
-
-    # Táblázatot átalakítjuk
-    df_long = pd.melt(df_visible, id_vars=["date"], value_vars=list(filtered_dict.keys()),
-                      var_name="party", value_name="value")
-    df_long["party"] = pd.Categorical(df_long["party"], categories=list(filtered_dict.keys()))
+    if not len(lathato):
+        lathato = szurt
 
     # Plot
     fig, ax = plt.subplots(figsize=(szelesseg, magassag))
     ax.axhline(valasztasi_kuszob, color=kuszob_szin, linestyle=kuszob_stilus, linewidth=kuszob_vastagsag)
 
-    # Pontok, trendvonalak
+    # Házhatás-korrekció: a trendek és a pontok a korrigált hosszú táblázatból
+    if hazhatas and lathato.intezet_kod is None:
+        print("Figyelmeztetés: 'polling_firm' oszlop nem található, a házhatás-korrekció kimarad.")
+    elif hazhatas:
+        lathato, hatasok = hazhatas_korrekcio(lathato, list(filtered_dict), loess_szigor, loess_fok,
+                                              partonkenti_loess, kizart_idoszakok, hazhatas_min_kutatas,
+                                              hazhatas_referencia)
+        print("Becsült intézeti hatások (százalékpont):")
+        print(hatasok.round(1).to_string())
+
+    # Trendgörbék minden pártra és szakaszra egy menetben, az ábrázolás csak a kész tömböket rajzolja
+    trend = trendek(lathato, list(filtered_dict), loess_szigor, loess_fok, loess_pontok, loess_tures,
+                    partonkenti_loess, kizart_idoszakok, munkasok, sav_szint, sav_mintak, sav_blokk, mag)
+
+    # Pontok (kizárt időszakok nélkül), trendvonalak a kizárt időszakok által elvágott szakaszokra
     for party, color in filtered_dict.items():
-        pdata = df_long[df_long["party"] == party].dropna(subset=["value"]).sort_values("date")
-
-        # Kizárt időszakok
-        excluded_ranges = []
-        if kizart_idoszakok and party in kizart_idoszakok:
-            for (start, end) in kizart_idoszakok[party]:
-                start = pd.to_datetime(start)
-                end = pd.to_datetime(end)
-                excluded_ranges.append((start, end))
-                pdata = pdata[~((pdata["date"] >= start) & (pdata["date"] <= end))]
-
-        if len(pdata) < 3:
+        if party not in trend:
             continue
-
-        # Pontok (kizárt időszakok nélkül)
+        pdata = trend[party]["pontok"]
         ax.scatter(
             pdata["date"], pdata["value"],
             s=pont_meret, color=color,
             alpha=pont_atlatszosag, edgecolor="white", linewidth=0.6
         )
-
-        segments = []
-        segment_start = pdata["date"].min()
-        segment_end = pdata["date"].max()
-
-        if not excluded_ranges:
-            segments = [(segment_start, segment_end)]
-        else:
-            excluded_ranges = sorted(excluded_ranges, key=lambda x: x[0])
-            current_start = segment_start
-            for (start, end) in excluded_ranges:
-                if start > current_start and start <= segment_end:
-                    segments.append((current_start, start - pd.Timedelta(days=1)))
-                current_start = end + pd.Timedelta(days=1)
-
-            if segments:
-                last_end = segments[-1][1]
-                if last_end < segment_end:
-                    segments.append((last_end + pd.Timedelta(days=1), segment_end))
-            else:
-                if segment_start < segment_end:
-                    segments.append((segment_start, segment_end))
-
-        #  Külön trendvonalak húzása a kizárt időszakok által elvágott ponthalmazokra
-        for (seg_start, seg_end) in segments:
-            seg_data = pdata[(pdata["date"] >= seg_start) & (pdata["date"] <= seg_end)]
-            if len(seg_data) < 3:
-                continue
-            x = (seg_data["date"] - seg_data["date"].min()).dt.days.values
-            y = seg_data["value"].values
-            x_dense = np.linspace(min(x), max(x), loess_pontok)
-
-            if partonkenti_loess and party in partonkenti_loess:
-                span = partonkenti_loess[party].get("loess_szigor", loess_szigor)
-                fok = partonkenti_loess[party].get("loess_fok", loess_fok)
-            else:
-                span = loess_szigor
-                fok = loess_fok
-
-            y_smooth = loess(x, y, x_dense, span, degree=fok)
-           
-            date_dense = seg_data["date"].min() + pd.to_timedelta(x_dense, unit="D")
+        for date_dense, sav_also, sav_felso in trend[party]["savok"]:
+            ax.fill_between(date_dense, sav_also, sav_felso, color=color, alpha=sav_atlatszosag, linewidth=0)
+        for date_dense, y_smooth in trend[party]["gorbek"]:
             ax.plot(date_dense, y_smooth, color=color, linewidth=trend_vastagsag, label=None)
 
         ax.plot([], [], color=color, linewidth=trend_vastagsag, label=party)
@@ -312,88 +238,89 @@ def kozvelemeny_grafikon(
 
 # Futtatás
 
-partok_es_szinek = {
-    "TISZA": "#112866",
-    "Fidesz": "#FF6A00",
-    "Dobrev Klára Pártja": "#0067AA",
-    "Mi Hazánk": "#688D1B",
-    "MKKP": "#808080",
-    "Momentum": "#8E6FCE",
-    "MSZP": "#CC0000",
-    "Párbeszéd": "#39B54A",
-    "Jobbik": "#047B60",
-    "LMP": "#54B586",
-    "Mindenki Magyarországa": "#001166",
-    "Második Reformkor": "#F1DB7B",
-    "Nép Pártján": "#023854",
-    "Szociáldemokrata-zöld koalíció": "#6BC4FF",
-    "Egyéb": "#505050"
-}
-
-valasztasi_eredmenyek = [
-    {
-        "datum": "2024-06-09",
-        "adatok": {"Fidesz": 44.34, "TISZA": 29.86, "Szociáldemokrata-zöld koalíció": 8.15, "Mi Hazánk": 6.79, "Momentum": 3.70, "MKKP": 3.60, "Jobbik": 1.01, "LMP": 0.88, "Második Reformkor": 0.68, "Mindenki Magyarországa": 0.65}
+if __name__ == "__main__":
+
+    partok_es_szinek = {
+        "TISZA": "#112866",
+        "Fidesz": "#FF6A00",
+        "Dobrev Klára Pártja": "#0067AA",
+        "Mi Hazánk": "#688D1B",
+        "MKKP": "#808080",
+        "Momentum": "#8E6FCE",
+        "MSZP": "#CC0000",
+        "Párbeszéd": "#39B54A",
+        "Jobbik": "#047B60",
+        "LMP": "#54B586",
+        "Mindenki Magyarországa": "#001166",
+        "Második Reformkor": "#F1DB7B",
+        "Nép Pártján": "#023854",
+        "Szociáldemokrata-zöld koalíció": "#6BC4FF",
+        "Egyéb": "#505050"
+    }
+
+    valasztasi_eredmenyek = [
+        {
+            "datum": "2024-06-09",
+            "adatok": {"Fidesz": 44.34, "TISZA": 29.86, "Szociáldemokrata-zöld koalíció": 8.15, "Mi Hazánk": 6.79, "Momentum": 3.70, "MKKP": 3.60, "Jobbik": 1.01, "LMP": 0.88, "Második Reformkor": 0.68, "Mindenki Magyarországa": 0.65}
+        }
+    ]
+
+    kizart_idoszakok = {
+        "Dobrev Klára Pártja": [("2024-03-28", "2024-06-16")],
+        "MSZP": [("2024-03-28", "2024-06-16")],
+        "Párbeszéd": [("2024-03-28", "2024-06-16")],
+        "Egyéb": [("2022-03-28", "2024-06-16")],
+        "Nép Pártján": [("2024-06-09", "2026-12-12")],
+        "MSZP": [("2024-06-09", "2026-12-12")],
+        "Párbeszéd": [("2024-06-09", "2026-12-12")],
+        "LMP": [("2024-06-09", "2026-12-12")],
+        "Második Reformkor": [("2024-06-09", "2026-12-12")],
+        "Mindenki Magyarországa": [("2024-06-09", "2026-12-12")],
+        "Jobbik": [("2024-06-09", "2026-12-12")],
+    }
+
+    partonkenti_loess = {
+        "Szociáldemokrata-zöld koalíció": {"loess_szigor": 1, "loess_fok": 1},
     }
-]
-
-kizart_idoszakok = {
-    "Dobrev Klára Pártja": [("2024-03-28", "2024-06-16")],
-    "MSZP": [("2024-03-28", "2024-06-16")],
-    "Párbeszéd": [("2024-03-28", "2024-06-16")],
-    "Egyéb": [("2022-03-28", "2024-06-16")],
-    "Nép Pártján": [("2024-06-09", "2026-12-12")],
-    "MSZP": [("2024-06-09", "2026-12-12")],
-    "Párbeszéd": [("2024-06-09", "2026-12-12")],
-    "LMP": [("2024-06-09", "2026-12-12")],
-    "Második Reformkor": [("2024-06-09", "2026-12-12")],
-    "Mindenki Magyarországa": [("2024-06-09", "2026-12-12")],
-    "Jobbik": [("2024-06-09", "2026-12-12")],
-}
-
-partonkenti_loess = {
-    "Szociáldemokrata-zöld koalíció": {"loess_szigor": 1, "loess_fok": 1},
-}
-
-fix_vonalak = [
-    {"datum": "2022-04-04", "szin": "#999999", "vastagsag": 1.5, "stilus": "-"},
-    {"datum": "2026-04-12", "szin": "#999999", "vastagsag": 1.5, "stilus": "-"},
-]
-
-
-narancsos_kutatok= ["Nézőpont", "Társadalomkutató", "Századvég", "Századvég/McLaughlin", "Real-PR 93"]
-narancsmentes_kutatok= ["21 Kutató", "Medián", "Publicus", "ZRI", "IDEA", ""]
-
-kozvelemeny_grafikon(
-    csv_fajl="hu.csv",
-    csv_elvalaszto=";",
-    mettol="2022-05-04",
-    meddig="2026-05-12",
-    y_hatarok=(0, 65),
-    y_offset_negativ=-2,
-    valasztasi_kuszob=5,
-    kuszob_stilus="--",
-    kuszob_vastagsag=2.2,
-    kuszob_szin="#999999",
-    pont_meret=30,
-    pont_atlatszosag=0.45,
-    trend_vastagsag=3,
-    eredmeny_meret_szorzo=3.0,      
-    eredmeny_atlatszosag_szorzo=1, 
-    racs_szin="white",
-    racs_vastagsag=1.5,
-    racs_alvonal_szin="#ffffffaa",
-    racs_alvonal_vastagsag=0.6,
-    racs_lathato=True,
-    partok_es_szinek=partok_es_szinek,
-    kizart_idoszakok=kizart_idoszakok,
-    szurt_intezmenyek=None,
-    valasztasi_eredmenyek=valasztasi_eredmenyek,
-    loess_szigor=0.70,
-    loess_fok=1,
-    loess_pontok=2500,
-    partonkenti_loess=None,
-    fix_vonalak=fix_vonalak,
-    kimenet="test"
-)
 
+    fix_vonalak = [
+        {"datum": "2022-04-04", "szin": "#999999", "vastagsag": 1.5, "stilus": "-"},
+        {"datum": "2026-04-12", "szin": "#999999", "vastagsag": 1.5, "stilus": "-"},
+    ]
+
+
+    narancsos_kutatok= ["Nézőpont", "Társadalomkutató", "Századvég", "Századvég/McLaughlin", "Real-PR 93"]
+    narancsmentes_kutatok= ["21 Kutató", "Medián", "Publicus", "ZRI", "IDEA", ""]
+
+    kozvelemeny_grafikon(
+        csv_fajl="hu.csv",
+        csv_elvalaszto=";",
+        mettol="2022-05-04",
+        meddig="2026-05-12",
+        y_hatarok=(0, 65),
+        y_offset_negativ=-2,
+        valasztasi_kuszob=5,
+        kuszob_stilus="--",
+        kuszob_vastagsag=2.2,
+        kuszob_szin="#999999",
+        pont_meret=30,
+        pont_atlatszosag=0.45,
+        trend_vastagsag=3,
+        eredmeny_meret_szorzo=3.0,      
+        eredmeny_atlatszosag_szorzo=1, 
+        racs_szin="white",
+        racs_vastagsag=1.5,
+        racs_alvonal_szin="#ffffffaa",
+        racs_alvonal_vastagsag=0.6,
+        racs_lathato=True,
+        partok_es_szinek=partok_es_szinek,
+        kizart_idoszakok=kizart_idoszakok,
+        szurt_intezmenyek=None,
+        valasztasi_eredmenyek=valasztasi_eredmenyek,
+        loess_szigor=0.70,
+        loess_fok=1,
+        loess_pontok=2500,
+        partonkenti_loess=None,
+        fix_vonalak=fix_vonalak,
+        kimenet="test"
+    )
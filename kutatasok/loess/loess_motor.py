@@ -0,0 +1,350 @@
+import numpy as np
+
+# LOESS rendezett x-en, pontonként csak a k legközelebbi pont ablakán: O(m·k) idő és O(blokk·k) memória
+# a teljes távolságrendezés és az n×n súlymátrix helyett.
+#
+# Ugyanazt számolja, mint a korábbi loess (tricube súlyok, bisquare robusztusság), annak sajátosságaival:
+#   - h a k-adik legkisebb távolság, a h távolságra eső pontok súlya már 0 (u < 1 feltétel),
+#     h = 0 esetén (k-nál több azonos x) minden pont súlya 1,
+#   - a súlyok a sorokat szorozzák (W·X, W·y), így a legkisebb négyzetek súlya w²,
+#   - a robusztussági súlyok az első illesztésből egyszer számolódnak, az iterációk nem frissítik,
+#   - a kiértékelés xnew-ban csak tricube súlyokkal történik, a robusztus illesztés erre nem hat.
+# A helyi illesztés súlyozott normálegyenletekkel, blokkonként egyszerre oldódik meg; a lokális koordináta
+# h-val skálázott, ami a tengelymetszetet (az illesztett értéket) nem változtatja, de jól kondicionál.
+# Ahol a rendszer szinguláris vagy rosszul kondicionált (pl. a pozitív súlyú pontok között fok + 1-nél
+# kevesebb különböző x van), a pontonkénti lstsq minimális normájú megoldása marad, mint eddig.
+
+# Egy blokk legfeljebb ennyi (kiértékelési pont × ablak) elemet dolgoz fel egyszerre
+BLOKK_ELEMEK = 1 << 20
+
+# A normálegyenletek legnagyobb kondíciószáma; felette a pontonkénti lstsq számol
+MAX_KONDICIO = 1e8
+
+# Ablakszélesség: a span-nyi hányad, legalább fok + 1, legfeljebb az összes pont
+def ablak_meret(n, span, degree):
+    return min(max(int(span * n), degree + 1), n)
+
+# A k legközelebbi pont ablakának kezdete és a k-adik legkisebb távolság (h) minden q pontra.
+# A k legközelebbi pont rendezett x-ben összefüggő ablak; a kezdete az első olyan lo, amelyre
+# q - xs[lo] <= xs[lo + k] - q, ez monoton, így pontonként bináris kereséssel adódik.
+def kozeli_ablakok(xs, q, k):
+    n = len(xs)
+    pos = np.searchsorted(xs, q)
+    also = np.clip(pos - k, 0, n - k)
+    felso = np.clip(pos, 0, n - k)
+    while True:
+        aktiv = also < felso
+        if not aktiv.any():
+            break
+        kozep = (also + felso) // 2
+        balra = np.zeros_like(aktiv)
+        balra[aktiv] = q[aktiv] - xs[kozep[aktiv]] <= xs[kozep[aktiv] + k] - q[aktiv]
+        felso = np.where(aktiv & balra, kozep, felso)
+        also = np.where(aktiv & ~balra, kozep + 1, also)
+    h = np.maximum(np.abs(xs[also] - q), np.abs(xs[also + k - 1] - q))
+    return also, h
+
+# Az eredeti pontonkénti illesztés (minimális normájú lstsq); a nulla súlyú sorok nem számítanak,
+# ezért elég az ablak pontjaival hívni
+def _lstsq_illesztes(xi, x, y, w, degree):
+    X = np.vstack([np.ones_like(x)] + [(x - xi) ** d for d in range(1, degree + 1)])
+    W = np.diag(w)
+    beta, *_ = np.linalg.lstsq(W @ X.T, W @ y, rcond=None)
+    return beta[0]
+
+# Helyi polinomillesztés értéke a q pontokban rendezett (xs, ys) adatokon.
+# ys lehet (n, c) alakú is: azonos x-ekhez tartozó több sorozat (pl. ugyanazon kutatások pártjai) egyszerre
+# illeszthető, az ablakok, súlyok és a normálegyenletek mátrixa közös, csak a jobb oldal oszloponkénti;
+# az eredmény ekkor (len(q), c) alakú, és oszloponként ugyanaz, mintha külön illesztenénk.
+# robusztussag: pontonkénti szorzó a tricube súlyokhoz (xs sorrendjében), vagy None.
+def helyi_illesztes(xs, ys, q, k, degree, robusztussag=None):
+    xs, ys, q = np.asarray(xs), np.asarray(ys), np.asarray(q)
+    Y = ys.reshape(len(ys), -1)
+    also, h = kozeli_ablakok(xs, q, k)
+    return _ablakos_illesztes(xs, Y, q, also, h, k, degree, robusztussag).reshape((len(q),) + ys.shape[1:])
+
+# A helyi illesztés adott ablakokkal (kezdet, h, k szélesség); a h-nál nem közelebbi pontok súlya 0,
+# így az ablak a szükségesnél szélesebb is lehet
+def _ablakos_illesztes(xs, Y, q, also, h, k, degree, robusztussag=None):
+    eredmeny = np.empty((len(q), Y.shape[1]))
+    hatvanyok = np.arange(degree + 1)
+    lepes = max(1, BLOKK_ELEMEK // (k * Y.shape[1]))
+
+    for eleje in range(0, len(q), lepes):
+        b = slice(eleje, eleje + lepes)
+        qb, hb = q[b], h[b]
+        index = also[b, None] + np.arange(k)
+        # yw: (pont, sorozat, ablak), hogy az ablak menti összegzés oszloponként is ugyanúgy fusson
+        xw, yw = xs[index], np.ascontiguousarray(Y.T[:, index].transpose(1, 0, 2))
+
+        d = np.abs(xw - qb[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = d / hb[:, None]
+        w = np.where(u < 1, (1 - u**3)**3, 0)
+        if robusztussag is not None:
+            w = w * robusztussag[index]
+
+        # Súlyozott normálegyenletek a skálázott t = (x - q) / h koordinátában
+        w2 = w * w
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (xw - qb[:, None]) / hb[:, None]
+        t_hatvany = np.ones_like(t)
+        momentumok, jobb_oldal = [], []
+        for p in range(2 * degree + 1):
+            momentumok.append((w2 * t_hatvany).sum(axis=1))
+            if p <= degree:
+                jobb_oldal.append(((w2 * t_hatvany)[:, None, :] * yw).sum(axis=2))
+            t_hatvany = t_hatvany * t
+        S = np.stack(momentumok, axis=1)
+        A = S[:, hatvanyok[:, None] + hatvanyok[None, :]]
+        T = np.stack(jobb_oldal, axis=1)
+
+        # Szinguláris vagy rosszul kondicionált rendszernél (kevés különböző x pozitív súllyal, alulcsorduló
+        # súlyok) az eredeti lstsq dönt
+        megoldhato = hb > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            megoldhato[megoldhato] = np.linalg.cond(A[megoldhato]) < MAX_KONDICIO
+
+        blokk = np.empty((len(qb), Y.shape[1]))
+        if megoldhato.any():
+            # Oszloponként külön jobb oldallal: a több jobb oldalas LAPACK-megoldás kerekítése eltérne
+            for j in range(Y.shape[1]):
+                blokk[megoldhato, j] = np.linalg.solve(A[megoldhato], T[megoldhato][:, :, j:j + 1])[:, 0, 0]
+        for i in np.flatnonzero(~megoldhato):
+            if hb[i] > 0:
+                blokk[i] = [_lstsq_illesztes(qb[i], xw[i], yj, w[i], degree) for yj in yw[i]]
+            else:
+                # h = 0: minden pont súlya 1 (robusztus illesztésnél a robusztussági súly)
+                w_mind = np.ones(len(xs)) if robusztussag is None else robusztussag
+                blokk[i] = [_lstsq_illesztes(qb[i], xs, yj, w_mind, degree) for yj in Y.T]
+        eredmeny[b] = blokk
+    return eredmeny
+
+# Helyi illesztés azonos x-ek összevonásával: ugyanaz, mint helyi_illesztes(xs, ys, q, k, degree), de a
+# normálegyenletek napokon (különböző x-eken) összegződnek, nem kutatásokon. Egy x-hez tartozó m pont
+# hozzájárulása w²·tᵖ·Σy = (w·√m)²·tᵖ·ȳ, így elég az x-enkénti átlag √m szorzójú súllyal. A h továbbra is
+# a k-adik legkisebb távolság az összes pont között; a h távolságra eső pontok súlya 0, ezért az, hogy a
+# holtversenyből melyik pont kerülne az ablakba, nem számít, és az eredmény a kerekítésen belül egyezik.
+# Sok kutatásnál kevés naponként (pl. több tízezer sor néhány ezer napon) a költség a napok számával arányos.
+def osszevont_illesztes(xs, ys, q, k, degree):
+    xs, ys, q = np.asarray(xs), np.asarray(ys), np.asarray(q)
+    Y = ys.reshape(len(ys), -1)
+    egyedi, elso, darab = np.unique(xs, return_index=True, return_counts=True)
+    atlagok = np.add.reduceat(Y, elso, axis=0) / darab[:, None]
+    _, h = kozeli_ablakok(xs, q, k)
+    also = np.searchsorted(egyedi, q - h, side="left")
+    felso = np.searchsorted(egyedi, q + h, side="right")
+    szelesseg = int(max((felso - also).max(initial=0), 1))
+    also = np.clip(also, 0, len(egyedi) - szelesseg)
+    eredmeny = _ablakos_illesztes(egyedi, atlagok, q, also, h, szelesseg, degree, np.sqrt(darab))
+    return eredmeny.reshape((len(q),) + ys.shape[1:])
+
+# A helyi illesztés lineáris y-ban: a q pontokbeli értékek L @ ys alakban írhatók. Visszaadja a (len(q), n)
+# alakú L simítómátrixot (rendezett xs-hez), amely ablakonként legfeljebb k nem nulla elemet tartalmaz
+# (h = 0 esetén a sor az összes pontra kiterjed). Sok y-ra ugyanazokkal az x-ekkel (pl. bootstrap minták)
+# egyetlen mátrixszorzás adja az illesztéseket; L @ ys a kerekítési hibán belül egyezik helyi_illesztes-sel.
+def simito_matrix(xs, q, k, degree):
+    xs, q = np.asarray(xs), np.asarray(q)
+    n = len(xs)
+    also, h = kozeli_ablakok(xs, q, k)
+    L = np.zeros((len(q), n))
+    hatvanyok = np.arange(degree + 1)
+    egyseg = np.zeros(degree + 1)
+    egyseg[0] = 1
+    lepes = max(1, BLOKK_ELEMEK // k)
+
+    for eleje in range(0, len(q), lepes):
+        b = slice(eleje, eleje + lepes)
+        qb, hb = q[b], h[b]
+        index = also[b, None] + np.arange(k)
+        xw = xs[index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.abs(xw - qb[:, None]) / hb[:, None]
+            t = (xw - qb[:, None]) / hb[:, None]
+        w = np.where(u < 1, (1 - u**3)**3, 0)
+        w2 = w * w
+        X = t[..., None] ** hatvanyok
+        A = np.einsum("bk,bki,bkj->bij", w2, X, X)
+
+        # Az illesztett érték e1ᵀ A⁻¹ Xᵀ W² y, így a sor a súlyok és az A⁻¹ első sorával vett polinom szorzata
+        megoldhato = hb > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            megoldhato[megoldhato] = np.linalg.cond(A[megoldhato]) < MAX_KONDICIO
+        sorok = np.zeros((len(qb), k))
+        if megoldhato.any():
+            c = np.linalg.solve(A[megoldhato], np.broadcast_to(egyseg[:, None], (megoldhato.sum(), degree + 1, 1)))
+            sorok[megoldhato] = w2[megoldhato] * (X[megoldhato] @ c)[..., 0]
+        for i in np.flatnonzero(~megoldhato & (hb > 0)):
+            X_i = np.vstack([np.ones(k)] + [(xw[i] - qb[i]) ** d for d in range(1, degree + 1)]).T
+            sorok[i] = np.linalg.pinv(w[i][:, None] * X_i)[0] * w[i]
+        np.put_along_axis(L[b], index, sorok, axis=1)
+        for i in np.flatnonzero(hb == 0):
+            X_i = np.vstack([np.ones(n)] + [(xs - qb[i]) ** d for d in range(1, degree + 1)]).T
+            L[eleje + i] = np.linalg.pinv(X_i)[0]
+    return L
+
+def _rendezett(x, y):
+    sorrend = np.argsort(x, kind="stable")
+    return sorrend, x[sorrend], y[sorrend]
+
+# Bisquare robusztussági súlyok a maradékokból (6 mediánnyi maradék felett 0)
+def bisquare_sulyok(resid):
+    resid = np.abs(resid)
+    s = np.median(resid)
+    if s == 0:
+        s = np.mean(resid) + 1e-6
+    robustness = (1 - (resid / (6 * s))**2) ** 2
+    robustness[resid > 6 * s] = 0
+    return robustness
+
+# Illesztett értékek a mintapontokban (az x sorrendjében), robust=True esetén a bisquare súlyozott
+# iterációk után
+def loess_illesztes(x, y, span=0.3, degree=1, robust=True, iterations=2):
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(x)
+    if n < degree + 2:
+        return np.full(n, np.nan)
+    k = ablak_meret(n, span, degree)
+    sorrend, xs, ys = _rendezett(x, y)
+
+    yfit = np.zeros_like(y)
+    yfit[sorrend] = helyi_illesztes(xs, ys, xs, k, degree)
+    if robust:
+        robustness = bisquare_sulyok(y - yfit)
+        # A súlyok az iterációk között nem változnak, így minden iteráció ugyanazt adja
+        if iterations > 0:
+            yfit[sorrend] = helyi_illesztes(xs, ys, xs, k, degree, robustness[sorrend])
+    return yfit
+
+# LOESS görbe az xnew pontokban; a korábbi loess(x, y, xnew, ...) helyett, azonos eredménnyel.
+# A robust és iterations paraméterek a kimenetre nem hatnak (lásd fent), csak a hívások miatt maradtak.
+# y lehet (n, c) alakú is (több sorozat közös x-ekkel), ekkor az eredmény xnew.shape + (c,) alakú.
+def loess(x, y, xnew, span=0.3, degree=1, robust=True, iterations=2):
+    x, y, xnew = np.asarray(x), np.asarray(y), np.asarray(xnew)
+    n = len(x)
+    if n < degree + 2:
+        return np.full((len(xnew),) + y.shape[1:], np.nan)
+    k = ablak_meret(n, span, degree)
+    _, xs, ys = _rendezett(x, y)
+
+    ynew = np.zeros(xnew.shape + y.shape[1:], dtype=xnew.dtype)
+    ynew[...] = helyi_illesztes(xs, ys, xnew.ravel(), k, degree).reshape(ynew.shape)
+    return ynew
+
+# A sávszélesség szerinti derivált közelítésének relatív lépése (lásd loess_interpolalt)
+H_LEPES = 1e-4
+
+# Az elfogadott, legfeljebb ennyi lépésnyi horgonyközök minden belső pontja pontosan számolódik
+ROVID_SZAKASZ = 8
+
+# Pontos illesztés a q pontokban, és az illesztett érték deriváltja h szerint (rögzített q mellett, egyoldali
+# differenciával a kisebb h felé, hogy az ablakon kívüli pontok ne kapjanak súlyt); h = 0 esetén a derivált 0.
+# A két illesztés egy hívásban, közös ablakokkal fut.
+def _illesztes_h_derivalttal(xs, ys, q, k, degree):
+    also, h = kozeli_ablakok(xs, q, k)
+    pozitiv = np.flatnonzero(h > 0)
+    eredmeny = _ablakos_illesztes(xs, ys, np.concatenate([q, q[pozitiv]]), np.concatenate([also, also[pozitiv]]),
+                                  np.concatenate([h, h[pozitiv] * (1 - H_LEPES)]), k, degree)
+    ertek = eredmeny[:len(q)]
+    derivalt = np.zeros_like(ertek)
+    derivalt[pozitiv] = (ertek[pozitiv] - eredmeny[len(q):]) / (H_LEPES * h[pozitiv, None])
+    return ertek, derivalt
+
+# LOESS görbe az xnew pontokban horgonypontos közelítéssel: pontos illesztés csak a horgonyokban, köztük
+# interpoláció.
+#
+# Az illesztett érték f(q) = F(q, h(q)), ahol F(q, h) a rögzített h sávszélességű helyi illesztés. F mindkét
+# változójában sima (a súly a h távolságban nullára fut, deriváltjaival együtt), a h szerinti skálán változik;
+# h(q), a k-adik legkisebb távolság viszont szakaszonként lineáris, 1 meredekségű, és minden ponton törik,
+# ahol a k legközelebbi pont ablaka változik, azaz nagyjából adatpontonként. A görbe apró, adatsűrűségű
+# törései ebből jönnek (zajos adatnál, kis k mellett századszázalékpont nagyságúak), és a horgonyok közti
+# szakaszok ellenőrzőpontjai ezeket nem láthatják. Ezért h(q)-t minden xnew pontban pontosan számoljuk
+# (ez csak bináris keresés), és a horgonyok közti interpoláció F-re vonatkozik: az érték és ∂F/∂h
+# lineáris interpolációja mellé a h(q) eltérése a h lineáris interpolációjától, ∂F/∂h-val szorozva. Így
+# a törések elsőrendben pontosan benne vannak, a maradék hiba F második deriváltjaival arányos, sima.
+#
+# A kezdeti horgonyok legfeljebb h negyedére vannak egymástól. Minden két horgony közti szakasz negyedelő
+# pontjaiban pontos illesztés készül, ezek is horgonyok lesznek; ha bármelyikben az eltérés nagyobb
+# "tures" negyedénél, a szakasz négy része újra sorra kerül. A ∂F/∂h interpolációjának hibáját a negyedelő
+# pontokban mért eltérés és a szakasz összes xnew pontjában vett legnagyobb h-eltérés szorzata becsüli
+# (nem csak az ellenőrzőpontokbeli h-eltérés), ennek is tures negyedén belül kell maradnia. Ahol a horgonyok
+# már csak néhány xnew lépésnyire vannak (ROVID_SZAKASZ), a görbe a kimeneti rács léptékén is érdes (kis k,
+# erős zaj, szigorú tűrés), ott a negyedelő pontok nem jellemzik a köztes pontokat: az elfogadott rövid
+# szakaszok minden belső pontja pontos illesztést kap; ez a pontos loess költségét nem lépi túl. A költség a görbe alakjától függ, nem az xnew
+# pontok számától (horgonyonként három illesztés); tures=0 a pontos loess-t adja.
+# (n, c) alakú y-nál a horgonyok közösek, egy szakasz akkor finomodik, ha bármelyik sorozatban hibás.
+def loess_interpolalt(x, y, xnew, span=0.3, degree=1, tures=0.01, robust=True, iterations=2):
+    x, y, xnew = np.asarray(x), np.asarray(y), np.asarray(xnew)
+    n = len(x)
+    if n < degree + 2:
+        return np.full((len(xnew),) + y.shape[1:], np.nan)
+    k = ablak_meret(n, span, degree)
+    _, xs, ys = _rendezett(x, y)
+    ys = ys.reshape(n, -1)
+
+    sorrend = np.argsort(xnew.ravel(), kind="stable")
+    q = xnew.ravel()[sorrend].astype(float)
+    m = len(q)
+    pontos = np.full((m, ys.shape[1]), np.nan)
+    derivalt = np.full((m, ys.shape[1]), np.nan)
+    _, h = kozeli_ablakok(xs, q, k)
+
+    def pontos_illesztes(index):
+        pontos[index], derivalt[index] = _illesztes_h_derivalttal(xs, ys, q[index], k, degree)
+
+    # Közelítés az i pontokban az a és b horgonyok között (azonos alakú indextömbök): az érték, a ∂F/∂h
+    # interpolációja, és h eltérése a lineáris interpolációjától
+    def kozelites(i, a, b):
+        hossz = q[b] - q[a]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            arany = np.where(hossz > 0, (q[i] - q[a]) / hossz, 0.0)[..., None]
+        h_elteres = h[i] - (h[a] + (h[b] - h[a]) * arany[..., 0])
+        g = derivalt[a] + (derivalt[b] - derivalt[a]) * arany
+        return pontos[a] + (pontos[b] - pontos[a]) * arany + g * h_elteres[..., None], g, h_elteres
+
+    horgonyok = [0]
+    i = 0
+    while i < m - 1:
+        i = max(i + 1, int(np.searchsorted(q, q[i] + h[i] / 4, side="right")) - 1)
+        horgonyok.append(min(i, m - 1))
+    horgonyok = np.unique(horgonyok)
+    pontos_illesztes(horgonyok)
+
+    # Szakaszonként a negyedelő pontokban ellenőrzünk; a hibás szakaszok negyedei újra sorra kerülnek
+    eleje, vege = horgonyok[:-1], horgonyok[1:]
+    while True:
+        hosszu = vege - eleje >= 2
+        eleje, vege = eleje[hosszu], vege[hosszu]
+        if not len(eleje):
+            break
+        pontok = eleje[:, None] + (vege - eleje)[:, None] * np.arange(1, 4) // 4
+        pontok = np.maximum(pontok, eleje[:, None] + 1)
+        pontos_illesztes(np.unique(pontok))
+        becsles, g, _ = kozelites(pontok, eleje[:, None], vege[:, None])
+        g_hiba = np.abs(g - derivalt[pontok]).max(axis=(1, 2))
+        # A szakaszok összes belső pontja egy tömbben, a szakaszonkénti legnagyobb h-eltéréshez
+        darab = vege - eleje + 1
+        kezdetek = np.cumsum(darab) - darab
+        szakasz = np.repeat(np.arange(len(eleje)), darab)
+        belso = eleje[szakasz] + np.arange(darab.sum()) - kezdetek[szakasz]
+        _, _, h_elteres = kozelites(belso, eleje[szakasz], vege[szakasz])
+        h_elteres = np.maximum.reduceat(np.abs(h_elteres), kezdetek)
+        rossz = ~((np.abs(becsles - pontos[pontok]) <= tures / 4).all(axis=(1, 2))
+                  & (g_hiba * h_elteres <= tures / 4))
+        rovid = ~rossz & (vege - eleje <= ROVID_SZAKASZ)
+        if rovid.any():
+            belso = np.concatenate([np.arange(a + 1, b) for a, b in zip(eleje[rovid], vege[rovid])])
+            belso = belso[np.isnan(pontos[belso, 0])]
+            if len(belso):
+                pontos_illesztes(belso)
+        hatarok = np.concatenate([eleje[rossz, None], pontok[rossz], vege[rossz, None]], axis=1)
+        eleje, vege = hatarok[:, :-1].ravel(), hatarok[:, 1:].ravel()
+
+    ismert = np.flatnonzero(~np.isnan(pontos[:, 0]))
+    hely = np.searchsorted(ismert, np.arange(m), side="right") - 1
+    ertekek = np.empty((m, ys.shape[1]))
+    ertekek[sorrend] = kozelites(np.arange(m), ismert[hely], ismert[np.minimum(hely + 1, len(ismert) - 1)])[0]
+    ertekek[sorrend[ismert]] = pontos[ismert]
+    ynew = np.zeros(xnew.shape + y.shape[1:], dtype=xnew.dtype)
+    ynew[...] = ertekek.reshape(ynew.shape)
+    return ynew
@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from loess_motor import ablak_meret, helyi_illesztes, kozeli_ablakok, loess_interpolalt
+
+# Az állapotfájl formátumának verziója; változáskor a régi .npz fájlok érvénytelenek
+ALLAPOT_VERZIO = 2
+
+# Dátumok egész napokként (1970-01-01 óta), a trendállapot x-tengelye
+def napok(datumok):
+    datumok = pd.to_datetime(pd.Series(datumok)).dt.normalize()
+    return ((datumok - pd.Timestamp("1970-01-01")).dt.days).to_numpy(dtype=float)
+
+# Egy sorozat (pl. egy párt) LOESS trendjének tartós, bővíthető állapota: a napi rácson vett görbe és
+# a mintapontokbeli illesztés.
+#
+# Új kutatások hozzáadásakor csak az a rész számolódik újra, amelyre az új pont hatással lehet: egy q pont
+# ablaka (a k legközelebbi pont) csak akkor változik, ha valamelyik új pont legfeljebb h(q) távolságra esik
+# tőle. Amíg az ablakméret (k = span · n) változatlan, a többi érték bitre ugyanaz, mint a teljes újraillesztésé,
+# így a frissítés költsége az érintett ablakkal arányos, nem a teljes történettel. Ha k változik (nagyjából
+# minden 1/span-adik új pontnál), minden h módosul, ekkor teljes újraszámolás jön; tures > 0 esetén ez
+# horgonypontos közelítéssel (loess_interpolalt), így ennek költsége sem függ a rács felbontásától.
+# A trend nem robusztus, mint a grafikon loess() görbéje (a kiértékelés ott is csak tricube súlyokkal
+# történik, lásd loess_motor), így bisquare súlyok sem kellenek. Az ellenorzes() a teljes újraillesztéssel
+# veti össze az állapotot.
+class TrendAllapot:
+    def __init__(self, x, y, span=0.25, degree=1, tures=0.0):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        sorrend = np.argsort(x, kind="stable")
+        self.x, self.y = x[sorrend], y[sorrend]
+        self.span, self.degree, self.tures = span, degree, tures
+        self._teljes_szamitas()
+
+    @classmethod
+    def datumokbol(cls, datumok, ertekek, span=0.25, degree=1, tures=0.0):
+        return cls(napok(datumok), ertekek, span, degree, tures)
+
+    @property
+    def n(self):
+        return len(self.x)
+
+    # A görbe a napi rácson, dátumokkal
+    def gorbe_datumokkal(self):
+        return pd.Timestamp("1970-01-01") + pd.to_timedelta(self.racs, unit="D"), self.gorbe
+
+    def _racs_illesztes(self, q):
+        if self.tures:
+            return loess_interpolalt(self.x, self.y, q, self.span, self.degree, tures=self.tures)
+        return helyi_illesztes(self.x, self.y, q, self.k, self.degree)
+
+    # A mintapontokbeli illesztés a kijelölt pontokban, csak a különböző x-ekben számolva
+    def _minta_illesztes(self, maszk):
+        egyedi, visszaallitas = np.unique(self.x[maszk], return_inverse=True)
+        return helyi_illesztes(self.x, self.y, egyedi, self.k, self.degree)[visszaallitas]
+
+    def _teljes_szamitas(self):
+        self.k = ablak_meret(self.n, self.span, self.degree)
+        self.racs = np.arange(self.x[0], self.x[-1] + 1) if self.n else np.empty(0)
+        if self.n < self.degree + 2:
+            self.gorbe = np.full(len(self.racs), np.nan)
+            self.yfit = np.full(self.n, np.nan)
+            return
+        self.gorbe = self._racs_illesztes(self.racs)
+        self.yfit = self._minta_illesztes(np.ones(self.n, dtype=bool))
+
+    # Új kutatások hozzáadása (x napokban, lásd napok()). Visszaadja az újraszámolt rácspontok számát.
+    def hozzaadas(self, x_uj, y_uj):
+        x_uj, y_uj = np.atleast_1d(np.asarray(x_uj, dtype=float)), np.atleast_1d(np.asarray(y_uj, dtype=float))
+        if len(x_uj) != len(y_uj):
+            raise ValueError(f"Az új x és y hossza eltér: {len(x_uj)} != {len(y_uj)}")
+        if not len(x_uj):
+            return 0
+        sorrend = np.argsort(x_uj, kind="stable")
+        x_uj, y_uj = x_uj[sorrend], y_uj[sorrend]
+
+        regi_k, regi_n = self.k, self.n
+        if regi_n < self.degree + 2 or ablak_meret(regi_n + len(x_uj), self.span, self.degree) != regi_k:
+            self._beszuras(x_uj, y_uj)
+            self._teljes_szamitas()
+            return len(self.racs)
+
+        # Az érintett rácspontok és mintapontok a régi h szerint (a h távolságra eső pont is érintettnek számít)
+        _, h_racs = kozeli_ablakok(self.x, self.racs, regi_k)
+        _, h_minta = kozeli_ablakok(self.x, self.x, regi_k)
+        erintett_racs = self._kozeli(self.racs, x_uj, h_racs)
+        erintett_minta = self._kozeli(self.x, x_uj, h_minta)
+
+        uj_helyek = self._beszuras(x_uj, y_uj)
+        erintett_minta = np.insert(erintett_minta, uj_helyek - np.arange(len(uj_helyek)), True)
+
+        # A rács bővül, ha az új pontok a korábbi tartományon kívül esnek; ezek a napok is újraszámolódnak
+        eleje, vege = self.racs[0], self.racs[-1]
+        balra = np.arange(self.x[0], eleje)
+        jobbra = np.arange(vege + 1, self.x[-1] + 1)
+        self.racs = np.concatenate([balra, self.racs, jobbra])
+        self.gorbe = np.concatenate([np.full(len(balra), np.nan), self.gorbe, np.full(len(jobbra), np.nan)])
+        erintett_racs = np.concatenate([np.ones(len(balra), bool), erintett_racs, np.ones(len(jobbra), bool)])
+
+        if erintett_racs.any():
+            self.gorbe[erintett_racs] = helyi_illesztes(self.x, self.y, self.racs[erintett_racs], self.k, self.degree)
+        self.yfit = np.insert(self.yfit, uj_helyek - np.arange(len(uj_helyek)), np.nan)
+        self.yfit[erintett_minta] = self._minta_illesztes(erintett_minta)
+        return int(erintett_racs.sum())
+
+    # Azok a q pontok, amelyekhez valamelyik (rendezett) új pont legfeljebb h távolságra van; h = 0 esetén
+    # (k-nál több kutatás ugyanazon a napon) az illesztés minden pontot használ, így mindig érintett
+    @staticmethod
+    def _kozeli(q, x_uj, h):
+        jobb = np.searchsorted(x_uj, q).clip(0, len(x_uj) - 1)
+        bal = (jobb - 1).clip(0, len(x_uj) - 1)
+        tavolsag = np.minimum(np.abs(x_uj[jobb] - q), np.abs(x_uj[bal] - q))
+        return (tavolsag <= h) | (h == 0)
+
+    # Az új pontok beszúrása a rendezett tömbökbe (azonos x-nél a régiek után, mint a stabil rendezésnél);
+    # visszaadja az új pontok helyét a bővített tömbben
+    def _beszuras(self, x_uj, y_uj):
+        helyek = np.searchsorted(self.x, x_uj, side="right")
+        self.x = np.insert(self.x, helyek, x_uj)
+        self.y = np.insert(self.y, helyek, y_uj)
+        return helyek + np.arange(len(helyek))
+
+    # A legnagyobb eltérés a pontos teljes újraillesztéstől (görbe és mintapontokbeli illesztés);
+    # tures = 0 mellett 0, tures > 0 mellett legfeljebb tures
+    def ellenorzes(self):
+        teljes = TrendAllapot(self.x, self.y, self.span, self.degree)
+        if not len(self.racs) or np.isnan(teljes.gorbe).all():
+            return 0.0
+        return float(max(np.abs(self.gorbe - teljes.gorbe).max(), np.abs(self.yfit - teljes.yfit).max()))
+
+    def mentes(self, path):
+        # Először ideiglenes fájlba írunk, hogy párhuzamos olvasó ne lásson félkész állapotot
+        ideiglenes = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            ideiglenes,
+            verzio=np.array(ALLAPOT_VERZIO),
+            beallitasok=np.array([self.span, self.degree, self.tures]),
+            x=self.x, y=self.y, racs=self.racs, gorbe=self.gorbe,
+            yfit=self.yfit,
+        )
+        os.replace(ideiglenes, path)
+
+    @classmethod
+    def betoltes(cls, path):
+        with np.load(path) as npz:
+            if int(npz["verzio"]) != ALLAPOT_VERZIO:
+                raise ValueError(f"A trendállapot más verziójú ({int(npz['verzio'])}), újra kell építeni: {path}")
+            allapot = cls.__new__(cls)
+            span, degree, tures = npz["beallitasok"].tolist()
+            allapot.span, allapot.degree, allapot.tures = span, int(degree), tures
+            allapot.x, allapot.y = npz["x"], npz["y"]
+            allapot.racs, allapot.gorbe = npz["racs"], npz["gorbe"]
+            allapot.yfit = npz["yfit"]
+        allapot.k = ablak_meret(allapot.n, allapot.span, allapot.degree)
+        return allapot
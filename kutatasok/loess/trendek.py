@@ -0,0 +1,156 @@
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bootstrap import bootstrap_savok
+from loess_motor import loess, loess_interpolalt
+
+# Trendgörbék számítása az ábrázolástól függetlenül: egy hívás a hosszú formátumú kutatási táblázatból
+# (date, party, value) minden párt minden (kizárt időszakok által elvágott) szakaszára.
+#
+# Az azonos x-ű (ugyanazon kutatásokból álló) és azonos beállítású szakaszok egy csoportba kerülnek, és egy
+# többoszlopos illesztéssel számolódnak: az ablakok, a súlyok és a normálegyenletek mátrixa közös, csak a jobb
+# oldal pártonkénti (lásd helyi_illesztes). Az eredmény oszloponként bitre ugyanaz, mint a külön illesztésé.
+# Az egymástól független csoportok munkafolyamatok között oszlanak el.
+# sav_szint megadásakor a görbék köré bootstrap konfidenciasáv is készül (lásd bootstrap.py), a csoport
+# simítómátrixával; a minták magja a "mag", a párt neve és a szakasz sorszáma, így egy párt sávja nem függ
+# attól, milyen más pártok szerepelnek a táblázatban.
+
+# Egy párt pontjai a kizárt időszakok nélkül, és a trendszakaszok (kezdet, vég) dátumpárjai
+def part_szakaszok(pdata, kizart=None):
+    excluded_ranges = []
+    for (start, end) in kizart or []:
+        start = pd.to_datetime(start)
+        end = pd.to_datetime(end)
+        excluded_ranges.append((start, end))
+        pdata = pdata[~((pdata["date"] >= start) & (pdata["date"] <= end))]
+    if pdata.empty:
+        return pdata, []
+
+    segments = []
+    segment_start = pdata["date"].min()
+    segment_end = pdata["date"].max()
+
+    if not excluded_ranges:
+        segments = [(segment_start, segment_end)]
+    else:
+        excluded_ranges = sorted(excluded_ranges, key=lambda x: x[0])
+        current_start = segment_start
+        for (start, end) in excluded_ranges:
+            if start > current_start and start <= segment_end:
+                segments.append((current_start, start - pd.Timedelta(days=1)))
+            current_start = end + pd.Timedelta(days=1)
+
+        if segments:
+            last_end = segments[-1][1]
+            if last_end < segment_end:
+                segments.append((last_end + pd.Timedelta(days=1), segment_end))
+        else:
+            if segment_start < segment_end:
+                segments.append((segment_start, segment_end))
+    return pdata, segments
+
+# Egy párt pontjai dátum szerint rendezve, a hosszú táblázatból vagy kutatási nézetből (kutatastar.KutatasNezet)
+def part_pontok(adatok, party):
+    if isinstance(adatok, pd.DataFrame):
+        return adatok[adatok["party"] == party].dropna(subset=["value"]).sort_values("date")
+    return adatok.part_adatok(party)
+
+# Egy párt illesztési beállításai (span, fok, tűrés), a pártonkénti felülírásokkal
+def part_beallitasok(party, loess_szigor, loess_fok, loess_tures=None, partonkenti_loess=None):
+    if partonkenti_loess and party in partonkenti_loess:
+        return (partonkenti_loess[party].get("loess_szigor", loess_szigor),
+                partonkenti_loess[party].get("loess_fok", loess_fok),
+                partonkenti_loess[party].get("loess_tures", loess_tures))
+    return loess_szigor, loess_fok, loess_tures
+
+# Egy csoport illesztése: közös x, az Y oszlopai a csoport szakaszai
+def _csoport_illesztes(feladat):
+    x, Y, span, fok, tures, pontok = feladat
+    x_dense = np.linspace(min(x), max(x), pontok)
+    if tures is None:
+        return loess(x, Y, x_dense, span, degree=fok)
+    return loess_interpolalt(x, Y, x_dense, span, degree=fok, tures=tures)
+
+# Minden párt minden szakaszának trendgörbéje.
+# df_long: date, party, value oszlopok, vagy kutatási nézet (kutatastar); partok: a számolandó pártok sorrendben.
+# Visszaadja: {párt: {"pontok": a párt pontjai (kizárt időszakok nélkül, dátum szerint rendezve),
+#                      "gorbek": [(dátumok, értékek), ...] szakaszonként,
+#                      "savok": [(dátumok, alsó, felső), ...] szakaszonként, ha van sav_szint}};
+# a 3-nál kevesebb pontú pártok kimaradnak, a 3-nál kevesebb pontú szakaszok nem kapnak görbét.
+# munkasok: a munkafolyamatok száma (alapból a magok száma, 1: a hívó folyamatában számol).
+# sav_szint: a konfidenciasáv szintje (pl. 0.9), sav_mintak: bootstrap minták száma, sav_blokk: a mozgó
+# blokkos bootstrap blokkhossza (1: független maradék-bootstrap).
+def trendek(
+    df_long,
+    partok,
+    loess_szigor: float = 0.25,
+    loess_fok: int = 1,
+    loess_pontok: int = 300,
+    loess_tures: float = None,
+    partonkenti_loess: dict = None,
+    kizart_idoszakok: dict = None,
+    munkasok: int = None,
+    sav_szint: float = None,
+    sav_mintak: int = 1000,
+    sav_blokk: int = 1,
+    mag: int = 0
+):
+    eredmeny = {}
+    csoportok = {}
+    for party in partok:
+        pdata = part_pontok(df_long, party)
+        pdata, segments = part_szakaszok(pdata, (kizart_idoszakok or {}).get(party))
+        if len(pdata) < 3:
+            continue
+        eredmeny[party] = {"pontok": pdata, "gorbek": [None] * len(segments), "savok": [None] * len(segments)}
+        span, fok, tures = part_beallitasok(party, loess_szigor, loess_fok, loess_tures, partonkenti_loess)
+
+        for i, (seg_start, seg_end) in enumerate(segments):
+            seg_data = pdata[(pdata["date"] >= seg_start) & (pdata["date"] <= seg_end)]
+            if len(seg_data) < 3:
+                continue
+            kezdet = seg_data["date"].min()
+            x = (seg_data["date"] - kezdet).dt.days.values
+            kulcs = (x.tobytes(), span, fok, tures)
+            if kulcs not in csoportok:
+                csoportok[kulcs] = (x, [], [])
+            csoportok[kulcs][1].append(seg_data["value"].values)
+            csoportok[kulcs][2].append((party, i, kezdet))
+
+    feladatok = [(x, np.column_stack(ertekek), *kulcs[1:], loess_pontok)
+                 for kulcs, (x, ertekek, _) in csoportok.items()]
+    illeszto_munkasok = min(munkasok or os.cpu_count() or 1, len(feladatok))
+    if illeszto_munkasok <= 1:
+        illesztesek = list(map(_csoport_illesztes, feladatok))
+    else:
+        with ProcessPoolExecutor(max_workers=illeszto_munkasok) as pool:
+            illesztesek = list(pool.map(_csoport_illesztes, feladatok,
+                                        chunksize=max(1, len(feladatok) // (illeszto_munkasok * 4))))
+
+    for (x, _, tagok), Y in zip(csoportok.values(), illesztesek):
+        x_dense = np.linspace(min(x), max(x), loess_pontok)
+        for j, (party, i, kezdet) in enumerate(tagok):
+            eredmeny[party]["gorbek"][i] = (kezdet + pd.to_timedelta(x_dense, unit="D"), Y[:, j])
+
+    if sav_szint is not None:
+        savok = bootstrap_savok(
+            [(x, np.column_stack(ertekek), span, fok,
+              [[mag, zlib.crc32(str(party).encode("utf-8")), i] for party, i, _ in tagok])
+             for (_, span, fok, _), (x, ertekek, tagok) in csoportok.items()],
+            szint=sav_szint, mintak=sav_mintak, blokk_hossz=sav_blokk, munkasok=munkasok,
+        )
+        for (x, _, tagok), (racs, also, felso) in zip(csoportok.values(), savok):
+            x_dense = np.linspace(min(x), max(x), loess_pontok)
+            for j, (party, i, _) in enumerate(tagok):
+                datumok, gorbe = eredmeny[party]["gorbek"][i]
+                eredmeny[party]["savok"][i] = (datumok, gorbe + np.interp(x_dense, racs, also[:, j]),
+                                               gorbe + np.interp(x_dense, racs, felso[:, j]))
+
+    for adat in eredmeny.values():
+        adat["gorbek"] = [g for g in adat["gorbek"] if g is not None]
+        adat["savok"] = [s for s in adat["savok"] if s is not None]
+    return eredmeny